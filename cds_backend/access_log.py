@@ -0,0 +1,135 @@
+"""
+Structured access log written off the request thread.
+
+Each request produces at most one JSON line (method, route, status,
+duration, bytes, DB time). Records go through a bounded queue to a
+QueueListener thread that does the I/O, so a slow stdout never shows up in
+request latency; when the queue is full the record is dropped and counted.
+
+Sampling is per endpoint (``rates``, default ``default_rate``); slow
+requests and server errors are always kept. DB time comes from SQLAlchemy
+cursor events and is accumulated on ``flask.g`` by track_db_time().
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+QUEUE_SIZE = 10000
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.access, separators=(",", ":"), default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the request: full queue -> dropped record."""
+
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record  # the formatter only needs record.access
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class AccessLog:
+    def __init__(self, handler=None, default_rate=1.0, rates=None, slow_ms=1000, queue_size=QUEUE_SIZE):
+        if handler is None:
+            handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(JsonFormatter())
+        self.handler = handler
+        self.default_rate = default_rate
+        self.rates = rates or {}
+        self.slow_ms = slow_ms
+        self.queue_handler = DroppingQueueHandler(queue.Queue(queue_size))
+        self._listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_listener(self):
+        # threads do not survive fork, so each worker process starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._listener = logging.handlers.QueueListener(self.queue_handler.queue, self.handler)
+                self._listener.start()
+                self._pid = os.getpid()
+
+    def keep(self, endpoint, status, duration_ms):
+        if duration_ms >= self.slow_ms or status >= 500:
+            return True
+        rate = self.rates.get(endpoint, self.default_rate)
+        return rate >= 1 or random.random() < rate
+
+    def log(self, fields):
+        self._ensure_listener()
+        self.queue_handler.handle(logging.makeLogRecord(
+            {"name": "cds_backend.access", "levelno": logging.INFO, "levelname": "INFO", "msg": "access", "access": fields}
+        ))
+
+    def flush(self):
+        """Wait until queued records are written (tests, shutdown)."""
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._pid = None
+
+
+def start_request():
+    g.request_started = time.perf_counter()
+    g.db_seconds = 0.0
+    g.db_queries = 0
+
+
+def request_fields(request, resp):
+    """The access record for the current request (call from after_request)."""
+    duration_ms = (time.perf_counter() - g.request_started) * 1000 if "request_started" in g else 0.0
+    return {
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()) + "Z",
+        "method": request.method,
+        "route": request.url_rule.rule if request.url_rule else None,
+        "endpoint": request.endpoint,
+        "path": request.path,
+        "status": resp.status_code,
+        "duration_ms": round(duration_ms, 2),
+        "bytes": resp.content_length,  # None for streamed bodies
+        "db_ms": round(g.get("db_seconds", 0.0) * 1000, 2),
+        "db_queries": g.get("db_queries", 0),
+        "origin": request.headers.get("Origin"),
+    }
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    if has_request_context() and "db_queries" in g:
+        g.db_seconds += time.perf_counter() - started
+        g.db_queries += 1
+
+
+def track_db_time():
+    """Accumulate query count and time per request on every engine."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
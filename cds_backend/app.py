@@ -1,25 +1,40 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, make_response, g, url_for
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from datetime import datetime
-import time
+from datetime import datetime, timedelta, timezone
+import json
+import base64
+import hashlib
+import csv
+import zlib
+from io import StringIO
+from functools import wraps
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import uuid
 import os
+import sys
+import time
 from dotenv import load_dotenv
 from werkzeug.utils import secure_filename
-from flask import send_from_directory, abort
+from werkzeug.datastructures import FileStorage
+from flask import redirect, abort, stream_with_context
 import logging
 from itsdangerous import URLSafeTimedSerializer as Serializer, BadSignature, SignatureExpired
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
-
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-    secure=True
-)
+
+# Allow running this file directly (python app.py) as well as cds_backend.app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from cds_backend.proof_store import ProofStore
+from cds_backend.media_storage import CloudinaryStorage, create_storage, guess_type
+from cds_backend import derivatives
+from cds_backend.file_serving import serve_path, serve_stream
+from cds_backend import static_assets
+from cds_backend import access_log
+from cds_backend import metrics
+from cds_backend.query_profiler import QueryProfiler
+from cds_backend.upload_sessions import UploadSessions, UploadSessionError, UploadNotFound
+from cds_backend.caches import TTLCache, VersionedCache
+from cds_backend import migrations
 
 # Load environment variables
 basedir = os.path.abspath(os.path.dirname(__file__))
@@ -53,17 +68,126 @@ db = SQLAlchemy(app)
 ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "change_this_password")
 SECRET_KEY = os.environ.get("SECRET_KEY") or os.environ.get("FLASK_SECRET") or os.urandom(24).hex()
 ADMIN_TOKEN_EXPIRY = int(os.environ.get("ADMIN_TOKEN_EXPIRY", 3600))
+ADMIN_TOKEN_CACHE_SIZE = int(os.environ.get("ADMIN_TOKEN_CACHE_SIZE", 256))
+MAX_BULK_REFERENCES = int(os.environ.get("MAX_BULK_REFERENCES", 1000))
+DEFAULT_PAGE_SIZE = int(os.environ.get("DEFAULT_PAGE_SIZE", 50))
+MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", 200))
+CHANGE_FEED_PAGE_SIZE = int(os.environ.get("CHANGE_FEED_PAGE_SIZE", 1000))
+UPLOAD_CONCURRENCY = int(os.environ.get("UPLOAD_CONCURRENCY", 4))  # parallel Cloudinary uploads per request
+DONATION_GOAL = int(os.environ.get("DONATION_GOAL", 0)) or None
 UPLOAD_FOLDER = os.environ.get("GALLERY_FOLDER", os.path.join(os.getcwd(), "gallery_images"))
-ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "pdf"}
+PROOF_STORE_FOLDER = os.environ.get("PROOF_STORE_FOLDER", os.path.join(UPLOAD_FOLDER, "proofs"))
+PROOF_DISCARD_DELAY = int(os.environ.get("PROOF_DISCARD_DELAY", 600))  # seconds, see discard_proof()
+# Media storage backends: "cloudinary", "local" or "memory" (see media_storage.py)
+MEDIA_STORAGE = os.environ.get("MEDIA_STORAGE", "cloudinary")
+MEDIA_FOLDER = os.environ.get("MEDIA_FOLDER", os.path.join(UPLOAD_FOLDER, "media"))
+MEDIA_BASE_URL = os.environ.get("MEDIA_BASE_URL", "/media")  # e.g. https://api.example.org/media
+PROOF_STORAGE = os.environ.get("PROOF_STORAGE", "local")
+MEDIA_STORAGE_LATENCY = float(os.environ.get("MEDIA_STORAGE_LATENCY", 0))  # memory backend only
+# Applied by CloudinaryStorage on its first call, not at import
+CLOUDINARY_CREDENTIALS = {
+    "cloud_name": os.getenv("CLOUDINARY_CLOUD_NAME"),
+    "api_key": os.getenv("CLOUDINARY_API_KEY"),
+    "api_secret": os.getenv("CLOUDINARY_API_SECRET"),
+}
+# Proof keys are content hashes, so the admin browser may keep its copy for a day
+PROOF_CACHE_CONTROL = "private, max-age=86400"
+UPLOAD_SESSIONS_FOLDER = os.environ.get("UPLOAD_SESSIONS_FOLDER", os.path.join(UPLOAD_FOLDER, "upload_sessions"))
+UPLOAD_SESSION_TTL = int(os.environ.get("UPLOAD_SESSION_TTL", 24 * 3600))
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+MAX_UPLOAD_CHUNK_SIZE = int(os.environ.get("MAX_UPLOAD_CHUNK_SIZE", 8 * 1024 * 1024))
+MAX_CHUNKED_UPLOAD_BYTES = int(os.environ.get("MAX_CHUNKED_UPLOAD_BYTES", 50 * 1024 * 1024))
+PROOF_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "pdf"}
+IMAGE_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
+
+# Static frontend: the repo root, then frontend_cds/ and image/ (first match wins)
+FRONTEND_DIR = os.path.abspath(os.path.join(basedir, '..'))
+STATIC_DIRS = ("", "frontend_cds", "image")
+STATIC_PRECOMPRESS = os.environ.get("STATIC_PRECOMPRESS", "True") == "True"
+
+# Access log: one JSON line per sampled request; slow ones and 5xx always
+ACCESS_LOG_SAMPLE_RATE = float(os.environ.get("ACCESS_LOG_SAMPLE_RATE", 1.0))
+ACCESS_LOG_SAMPLE_RATES = json.loads(os.environ.get("ACCESS_LOG_SAMPLE_RATES", "{}"))  # endpoint -> rate
+ACCESS_LOG_SLOW_MS = float(os.environ.get("ACCESS_LOG_SLOW_MS", 1000))
+
+# Bearer token required to scrape /metrics; unset leaves it open (private network)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# Development/staging SQL profiler (see query_profiler.py)
+QUERY_PROFILER = os.environ.get("QUERY_PROFILER", "False") == "True"
+QUERY_PROFILER_SLOW_MS = float(os.environ.get("QUERY_PROFILER_SLOW_MS", 100))
+QUERY_PROFILER_N_PLUS_ONE = int(os.environ.get("QUERY_PROFILER_N_PLUS_ONE", 5))
+
+IDEMPOTENCY_CACHE_TTL = int(os.environ.get("IDEMPOTENCY_CACHE_TTL", 300))
+
+# Cache-Control per endpoint for the versioned (ETag) list routes; override
+# any of them with a JSON object in the CACHE_CONTROL environment variable.
+app.config["CACHE_CONTROL"] = {
+    "gallery_list": "public, max-age=60",
+    "list_albums": "public, max-age=60",
+    "album_images": "public, max-age=60",
+    "list_bank_accounts": "public, no-cache",
+    "paid_users": "public, no-cache",
+    "donation_stats": "public, max-age=30",
+    **json.loads(os.environ.get("CACHE_CONTROL", "{}")),
+}
 
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+media_storage = create_storage(
+    MEDIA_STORAGE, root=MEDIA_FOLDER, base_url=MEDIA_BASE_URL, latency=MEDIA_STORAGE_LATENCY,
+    resource_type="image", credentials=CLOUDINARY_CREDENTIALS
+)
+proof_store = ProofStore(PROOF_STORE_FOLDER, create_storage(
+    PROOF_STORAGE, root=PROOF_STORE_FOLDER, latency=MEDIA_STORAGE_LATENCY,
+    resource_type="image", delivery_type="authenticated", credentials=CLOUDINARY_CREDENTIALS
+))
+media_storage.observer = proof_store.storage.observer = metrics.observe_storage_call
+upload_sessions = UploadSessions(UPLOAD_SESSIONS_FOLDER, ttl=UPLOAD_SESSION_TTL)
+# url path -> Asset; files added after startup are not served until a restart.
+# The repo's own gallery_images/ holds old receipts even when GALLERY_FOLDER
+# points elsewhere.
+static_manifest = static_assets.build_manifest(
+    FRONTEND_DIR, STATIC_DIRS, exclude=(basedir, UPLOAD_FOLDER, os.path.join(FRONTEND_DIR, "gallery_images")),
+    precompress=STATIC_PRECOMPRESS, log=app.logger.info,
+)
+
+access_logger = access_log.AccessLog(
+    default_rate=ACCESS_LOG_SAMPLE_RATE, rates=ACCESS_LOG_SAMPLE_RATES, slow_ms=ACCESS_LOG_SLOW_MS
+)
+access_log.track_db_time()
+with app.app_context():
+    metrics.track_pool(db.engine)
+query_profiler = QueryProfiler(
+    app.logger.warning, slow_ms=QUERY_PROFILER_SLOW_MS, n_plus_one=QUERY_PROFILER_N_PLUS_ONE
+)
+
+
+def after_fork():
+    """Per-process setup for servers that fork a preloaded app (gunicorn.conf.py).
+
+    Importing the app opens no connections; this makes sure a worker never
+    reuses one inherited from the parent. The engine gets a fresh pool and
+    the old connections are left for the parent to close.
+    """
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+# idempotency_key -> reference for recent submissions, so hot retries skip the DB
+_idempotency_cache = TTLCache(maxsize=10000, ttl=IDEMPOTENCY_CACHE_TTL)
 
 # Token serializer
 _token_serializer = Serializer(SECRET_KEY, salt='admin-token')
+_verified_tokens = TTLCache(maxsize=ADMIN_TOKEN_CACHE_SIZE, ttl=ADMIN_TOKEN_EXPIRY)
 
 # Database Models
 class Donation(db.Model):
     __tablename__ = 'donations'
+    __table_args__ = (
+        db.Index('ix_donations_status_created_at', 'status', 'created_at', 'id'),
+        db.Index('ix_donations_created_at', 'created_at', 'id'),
+        db.Index('ix_donations_bank_account_id', 'bank_account_id', 'created_at'),
+        db.Index('ix_donations_change_seq', 'change_seq', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     fullname = db.Column(db.String(150), nullable=False)
     email = db.Column(db.String(150), nullable=True)
@@ -76,15 +200,24 @@ class Donation(db.Model):
     approved_at = db.Column(db.DateTime, nullable=True)
     bank_account_id = db.Column(db.Integer, db.ForeignKey('bank_accounts.id'), nullable=True)
     idempotency_key = db.Column(db.String(100), unique=True, nullable=True)
+    processing_status = db.Column(db.String(20), default="queued")  # queued/done/rejected/failed
+    processing_error = db.Column(db.String(255), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    change_seq = db.Column(db.BigInteger, nullable=True)  # see next_change_seq()
 
 
 class Image(db.Model):
     __tablename__ = 'images'
+    __table_args__ = (
+        db.Index('ix_images_taken_at_id', 'taken_at', 'id'),
+        db.Index('ix_images_title_id', 'title', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255), nullable=False)
-    url = db.Column(db.String(500), nullable=True)        # to store cloudinary url
-    public_id = db.Column(db.String(255), nullable=True)  # to store cloudinary public_id
+    url = db.Column(db.String(500), nullable=True)        # CDN or /media URL
+    public_id = db.Column(db.String(255), nullable=True)  # media storage key (Cloudinary public_id)
+    has_variants = db.Column(db.Boolean, default=False)  # resized copies stored, see derivatives.py
     title = db.Column(db.String(255), nullable=True)
     taken_at = db.Column(db.DateTime, nullable=True)
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -92,6 +225,7 @@ class Image(db.Model):
 
 class BankAccount(db.Model):
     __tablename__ = 'bank_accounts'
+    __table_args__ = (db.Index('ix_bank_accounts_active_created_at', 'active', 'created_at'),)
     id = db.Column(db.Integer, primary_key=True)
     bank_name = db.Column(db.String(128), nullable=False)
     account_name = db.Column(db.String(128), nullable=False)
@@ -101,23 +235,68 @@ class BankAccount(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
-# Initialize database
-with app.app_context():
-    db.create_all()
-    app.logger.info("Database tables created successfully")
-    
-    # Auto-migrate images table to add url and public_id if not existing
-    try:
-        if "postgresql" in app.config.get("SQLALCHEMY_DATABASE_URI", ""):
-            migration_sql = """
-            ALTER TABLE images ADD COLUMN IF NOT EXISTS url VARCHAR(500);
-            ALTER TABLE images ADD COLUMN IF NOT EXISTS public_id VARCHAR(255);
-            """
-            db.session.execute(db.text(migration_sql))
-            db.session.commit()
-            app.logger.info("Images table migration completed")
-    except Exception as e:
-        app.logger.warning(f"Images table already up to date or migration not needed: {e}")
+class ProofBlob(db.Model):
+    __tablename__ = 'proof_blobs'
+    key = db.Column(db.String(80), primary_key=True)  # "<sha256>.<ext>", see proof_store.py
+    size = db.Column(db.Integer, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    mime_type = db.Column(db.String(100), nullable=True)
+    page_count = db.Column(db.Integer, nullable=True)
+    has_thumbnail = db.Column(db.Boolean, default=False)
+    has_variants = db.Column(db.Boolean, default=False)
+    processed_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class DonationStat(db.Model):
+    """Running totals of paid donations, kept in step by mark_donations_paid().
+
+    scope is 'overall' (bucket ''), 'day' (bucket = donation date, YYYY-MM-DD)
+    or 'account' (bucket = bank_account_id, or 'none').
+    """
+    __tablename__ = 'donation_stats'
+    scope = db.Column(db.String(20), primary_key=True)
+    bucket = db.Column(db.String(32), primary_key=True)
+    total_amount = db.Column(db.BigInteger, nullable=False, default=0)
+    donation_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class CollectionVersion(db.Model):
+    """Counter bumped by every write to a collection; list routes derive their ETag from it."""
+    __tablename__ = 'collection_versions'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    __table_args__ = (db.Index('ix_jobs_status_run_after', 'status', 'run_after'),)
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default="{}")  # JSON
+    status = db.Column(db.String(20), nullable=False, default="queued")  # queued/running/failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class MediaDeletion(db.Model):
+    """Outbox of stored files to remove once their rows are gone (see worker.py)."""
+    __tablename__ = 'media_deletions'
+    __table_args__ = (db.Index('ix_media_deletions_status_run_after', 'status', 'run_after'),)
+    id = db.Column(db.Integer, primary_key=True)
+    storage_key = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="queued")  # queued/failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# The schema is managed by versioned migrations (cds_backend/migrations/);
+# apply them with `python cds_backend/migrate.py` before starting the app.
 
 
 # Helper Functions
@@ -129,66 +308,490 @@ def generate_admin_token(name=None):
 
 
 def verify_admin_token(token):
-    try:
-        _token_serializer.loads(token, max_age=ADMIN_TOKEN_EXPIRY)
+    """Check a token's signature and age, remembering tokens that passed.
+
+    Cached entries expire when the token itself does, so a cache hit never
+    accepts a token the serializer would reject as expired.
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    if _verified_tokens.get(key):
         return True
+    try:
+        _, issued_at = _token_serializer.loads(token, max_age=ADMIN_TOKEN_EXPIRY, return_timestamp=True)
     except (SignatureExpired, BadSignature):
         return False
+    remaining = ADMIN_TOKEN_EXPIRY - (datetime.now(timezone.utc) - issued_at).total_seconds()
+    if remaining > 0:
+        _verified_tokens.set(key, True, ttl=remaining)
+    return True
 
 
 def is_admin_authorized(req):
+    """Whether the current request carries admin credentials.
+
+    Checked once per request; the answer and the time it took are kept on g.
+    """
+    if "admin_authorized" in g:
+        return g.admin_authorized
+    started = time.perf_counter()
+    authorized = False
     auth = req.headers.get('Authorization', '')
-    if auth.startswith('Bearer '):
-        token = auth.split(' ', 1)[1].strip()
-        return verify_admin_token(token)
-    
     legacy = req.headers.get('X-ADMIN-KEY', '')
-    if legacy and legacy == ADMIN_PASSWORD:
-        return True
-    
     t = req.args.get('token')
-    if t:
-        return verify_admin_token(t)
-    
-    return False
+    if auth.startswith('Bearer '):
+        authorized = verify_admin_token(auth.split(' ', 1)[1].strip())
+    elif legacy and legacy == ADMIN_PASSWORD:
+        authorized = True
+    elif t:
+        authorized = verify_admin_token(t)
+    g.admin_authorized = authorized
+    g.auth_seconds = time.perf_counter() - started
+    metrics.observe_auth(req.endpoint, g.auth_seconds)
+    return authorized
+
+
+def admin_required(view):
+    """Reject requests without admin credentials (CORS preflights pass through)."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'OPTIONS' and not is_admin_authorized(request):
+            return jsonify({"message": "Unauthorized"}), 401
+        return view(*args, **kwargs)
+    return wrapper
 
 
-def allowed_file(filename):
-    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+@app.after_request
+def add_auth_server_timing(resp):
+    if "auth_seconds" in g:
+        resp.headers.add("Server-Timing", f"auth;dur={g.auth_seconds * 1000:.2f}")
+    return resp
 
 
-# Logging middleware
-@app.before_request
-def log_request_info():
+def file_extension(filename):
+    return filename.rsplit(".", 1)[1].lower() if "." in filename else ""
+
+
+def allowed_file(filename, extensions=PROOF_EXTENSIONS):
+    return file_extension(filename) in extensions
+
+
+def dialect_insert(table):
+    """INSERT construct with ON CONFLICT support for the configured database."""
+    if db.engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
+def retain_proof(key, size):
+    """Add a reference to a stored proof, creating its index row if needed."""
+    stmt = dialect_insert(ProofBlob.__table__).values(
+        key=key, size=size, ref_count=1, created_at=datetime.utcnow()
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ProofBlob.__table__.c.key],
+        set_={"ref_count": ProofBlob.__table__.c.ref_count + 1},
+    )
+    db.session.execute(stmt)
+
+
+def discard_proof(key, created):
+    """Queue removal of a freshly stored proof after a failed insert (call after rollback).
+
+    The file is not deleted here: a concurrent identical upload may already
+    have found it (created=False) without having committed its reference.
+    The worker removes it after PROOF_DISCARD_DELAY if no donation took it up.
+    """
+    if not created:
+        return
     try:
-        app.logger.info(f"Request: {request.method} {request.path} from {request.headers.get('Origin')}")
+        enqueue_job("discard_proof", delay=PROOF_DISCARD_DELAY, key=key)
+        db.session.commit()
+    except Exception as e:  # an orphaned file is harmless; the response must not fail for it
+        db.session.rollback()
+        app.logger.error(f"Could not queue removal of proof {key}: {e}")
+
+
+def parse_date_param(value, end=False):
+    """Parse an ISO date/datetime filter value; a bare end date covers that whole day."""
+    parsed = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def donation_filters(params):
+    """Build filter conditions from min_amount/max_amount/date_from/date_to/bank_account_id.
+
+    Raises ValueError for malformed values.
+    """
+    conditions = []
+    if params.get("min_amount") not in (None, ""):
+        conditions.append(Donation.amount >= int(params["min_amount"]))
+    if params.get("max_amount") not in (None, ""):
+        conditions.append(Donation.amount <= int(params["max_amount"]))
+    if params.get("date_from"):
+        conditions.append(Donation.created_at >= parse_date_param(params["date_from"]))
+    if params.get("date_to"):
+        date_to = params["date_to"]
+        if len(date_to) == 10:
+            conditions.append(Donation.created_at < parse_date_param(date_to, end=True))
+        else:
+            conditions.append(Donation.created_at <= parse_date_param(date_to))
+    if params.get("bank_account_id") not in (None, ""):
+        conditions.append(Donation.bank_account_id == int(params["bank_account_id"]))
+    return conditions
+
+
+def encode_cursor(*values):
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError for tampered or malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
     except Exception:
-        pass
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def page_limit(params):
+    limit = int(params.get("limit") or DEFAULT_PAGE_SIZE)
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def donation_page(conditions, params):
+    """One page of donations, newest first, keyed on (created_at, id).
+
+    Returns (rows, next_cursor). Raises ValueError for bad limit/cursor values.
+    """
+    limit = page_limit(params)
+    query = Donation.query.filter(*conditions)
+    if params.get("cursor"):
+        created_at, last_id = decode_cursor(params["cursor"])
+        query = query.filter(
+            db.tuple_(Donation.created_at, Donation.id)
+            < (datetime.fromisoformat(created_at), int(last_id))
+        )
+    rows = query.order_by(Donation.created_at.desc(), Donation.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at.isoformat(), rows[-1].id)
+    return rows, next_cursor
+
+
+def stat_buckets(created_at, bank_account_id):
+    """The donation_stats rows a paid donation counts towards."""
+    buckets = [("overall", ""), ("account", str(bank_account_id) if bank_account_id else "none")]
+    if created_at:
+        buckets.append(("day", created_at.date().isoformat()))
+    return buckets
+
+
+def add_to_stats(deltas):
+    """Apply {(scope, bucket): [amount, count]} increments with one upsert."""
+    if not deltas:
+        return
+    table = DonationStat.__table__
+    stmt = dialect_insert(table).values([
+        {"scope": scope, "bucket": bucket, "total_amount": amount, "donation_count": count}
+        for (scope, bucket), (amount, count) in deltas.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.scope, table.c.bucket],
+        set_={
+            "total_amount": table.c.total_amount + stmt.excluded.total_amount,
+            "donation_count": table.c.donation_count + stmt.excluded.donation_count,
+        },
+    )
+    db.session.execute(stmt)
+
+
+def compute_donation_stats():
+    """Recompute every donation_stats row from the donations table."""
+    totals = (db.func.sum(Donation.amount), db.func.count(Donation.id))
+    paid = db.session.query(*totals).filter(Donation.status == "paid")
+    amount, count = paid.one()
+    stats = {("overall", ""): [int(amount), count]} if count else {}
+    
+    by_account = paid.with_entities(Donation.bank_account_id, *totals).group_by(Donation.bank_account_id)
+    for bank_account_id, amount, count in by_account:
+        stats[("account", str(bank_account_id) if bank_account_id else "none")] = [int(amount), count]
+    
+    day = db.func.date(Donation.created_at)
+    by_day = paid.filter(Donation.created_at.isnot(None)).with_entities(day, *totals).group_by(day)
+    for bucket, amount, count in by_day:
+        stats[("day", str(bucket))] = [int(amount), count]
+    return stats
+
+
+def mark_donations_paid(conditions, admin_name):
+    """Approve every pending donation matching *conditions* with one UPDATE.
+
+    Also updates donation_stats in the same transaction. Returns
+    (updated references, approval time); the caller commits.
+    """
+    approved_at = datetime.utcnow()
+    stmt = (
+        db.update(Donation)
+        .where(Donation.status == "pending", *conditions)
+        .values(status="paid", approved_by=admin_name, approved_at=approved_at,
+                updated_at=approved_at)
+        .returning(Donation.id, Donation.reference, Donation.amount, Donation.created_at, Donation.bank_account_id)
+    )
+    ids, updated, deltas = [], [], {}
+    for donation_id, reference, amount, created_at, bank_account_id in db.session.execute(stmt):
+        ids.append(donation_id)
+        updated.append(reference)
+        for bucket in stat_buckets(created_at, bank_account_id):
+            delta = deltas.setdefault(bucket, [0, 0])
+            delta[0] += amount
+            delta[1] += 1
+    if updated:
+        add_to_stats(deltas)
+        bump_collection_version("paid_donations")
+        stamp_change_seq(ids)
+    return updated, approved_at
+
+
+def bump_collection_version(name):
+    """Invalidate ETags for *name*; call inside the writing transaction.
+
+    Returns the new version.
+    """
+    table = CollectionVersion.__table__
+    stmt = dialect_insert(table).values(name=name, version=1).on_conflict_do_update(
+        index_elements=[table.c.name], set_={"version": table.c.version + 1}
+    ).returning(table.c.version)
+    return db.session.execute(stmt).scalar()
+
+
+def next_change_seq():
+    """Allocate the change_seq for a donation write (the /admin/changes feed).
+
+    The counter row stays locked until the writing transaction commits, so
+    sequence numbers become visible in increasing order and a reader that
+    has seen N will never later find a committed change below N. Call it
+    as late as possible in the transaction.
+    """
+    return bump_collection_version("donations")
+
+
+def stamp_change_seq(ids):
+    """Give the donations *ids* just written one new change_seq.
+
+    Called after the write has affected rows, so a no-op write neither
+    advances the sequence nor takes the counter lock.
+    """
+    db.session.execute(
+        db.update(Donation).where(Donation.id.in_(ids)).values(change_seq=next_change_seq())
+    )
+
+
+def collection_version(name):
+    return db.session.query(CollectionVersion.version).filter_by(name=name).scalar() or 0
+
+
+def versioned_collection(name, vary=None):
+    """Serve a list route with a strong ETag and answer If-None-Match with 304.
+
+    The ETag combines the collection version with the path and query string,
+    so a matching request is answered from one primary-key lookup without
+    loading or serializing any rows. *vary* returns anything else the
+    response depends on (e.g. today's date) to fold into the ETag.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.full_path + (f"|{vary()}" if vary else "")
+            variant = hashlib.sha1(key.encode()).hexdigest()[:12]
+            g.collection_version = collection_version(name)  # the view may reuse it
+            etag = f"{name}-{g.collection_version}-{variant}"
+            cache_control = app.config["CACHE_CONTROL"].get(request.endpoint, "no-cache")
+            
+            if request.if_none_match.contains(etag):
+                resp = make_response("", 304)
+            else:
+                resp = make_response(view(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+            resp.set_etag(etag)
+            resp.headers["Cache-Control"] = cache_control
+            return resp
+        return wrapper
+    return decorator
+
+
+BankAccountsSnapshot = namedtuple("BankAccountsSnapshot", ["json", "by_id"])
+
+
+def load_bank_accounts():
+    """Build the cached view: /bank-accounts response bytes plus every account by id."""
+    accounts = BankAccount.query.order_by(BankAccount.created_at.desc()).all()
+    by_id = {a.id: {
+        "id": a.id,
+        "bank_name": a.bank_name,
+        "account_name": a.account_name,
+        "account_number": a.account_number,
+        "bank_type": a.bank_type
+    } for a in accounts}
+    active = [by_id[a.id] for a in accounts if a.active]
+    return BankAccountsSnapshot(json.dumps(active).encode(), by_id)
+
+
+_bank_accounts_cache = VersionedCache(load_bank_accounts)
+
+
+def bank_accounts_snapshot(version=None):
+    """Bank accounts as of the latest committed write, rebuilt only after one.
+
+    Pass *version* when the caller has already read it this request.
+    """
+    if version is None:
+        version = collection_version("bank_accounts")
+    return _bank_accounts_cache.get(version)
+
+
+def enqueue_job(kind, delay=0, **payload):
+    """Queue background work for worker.py; committed with the caller's transaction.
+
+    The job is held back for *delay* seconds.
+    """
+    db.session.add(Job(kind=kind, payload=json.dumps(payload),
+                       run_after=datetime.utcnow() + timedelta(seconds=delay)))
+
+
+def delete_images(conditions):
+    """Delete matching Image rows with one statement and queue their stored files.
+
+    The files are removed later by the worker (MediaDeletion outbox), so a
+    slow or failing storage backend cannot hold up or roll back the delete.
+    Returns the deleted ids; the caller commits.
+    """
+    stmt = db.delete(Image).where(*conditions).returning(Image.id, Image.public_id, Image.has_variants)
+    deleted = db.session.execute(stmt).all()
+    keys = []
+    for _, public_id, has_variants in deleted:
+        if public_id:
+            keys.append(public_id)
+        if public_id and has_variants:
+            keys += [derivatives.derived_key(public_id, v, f) for v, f in derivatives.all_variants()]
+    if keys:
+        db.session.execute(db.insert(MediaDeletion), [{"storage_key": k} for k in keys])
+    if deleted:
+        bump_collection_version("images")
+    return [row.id for row in deleted]
+
+
+def release_all_proofs():
+    """Drop every proof reference; returns the keys whose files can be removed."""
+    keys = [key for (key,) in db.session.query(ProofBlob.key)]
+    ProofBlob.query.delete()
+    return keys
+
+
+@app.before_request
+def start_request_timer():
+    access_log.start_request()
+    metrics.start_request(request)
+
+
+@app.after_request
+def write_access_log(resp):
+    fields = access_log.request_fields(request, resp)
+    if access_logger.keep(request.endpoint, resp.status_code, fields["duration_ms"]):
+        access_logger.log(fields)
+    metrics.observe_request(request, resp)
+    return resp
+
+
+@app.before_request
+def start_query_profile():
+    if QUERY_PROFILER:
+        query_profiler.start()
+
+
+@app.after_request
+def finish_query_profile(resp):
+    return query_profiler.finish(resp, db.engine, request.endpoint)
+
+
+@app.teardown_request
+def end_request_metrics(exc):
+    metrics.end_request()
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    if METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {METRICS_TOKEN}':
+        return jsonify({"message": "Unauthorized"}), 401
+    body, content_type = metrics.render()
+    return app.response_class(body, content_type=content_type)
+
+
+def duplicate_donation_response(idempotency_key, reference):
+    app.logger.warning(f"Duplicate donation blocked: {idempotency_key}")
+    return jsonify({
+        "message": "This donation was already submitted",
+        "reference": reference
+    }), 409
+
+
+# Exportable columns for /download-csv, in default order
+CSV_COLUMNS = {
+    "fullname": Donation.fullname,
+    "email": Donation.email,
+    "phone": Donation.phone,
+    "amount": Donation.amount,
+    "reference": Donation.reference,
+    "status": Donation.status,
+    "created_at": Donation.created_at,
+    "approved_by": Donation.approved_by,
+    "approved_at": Donation.approved_at,
+    "bank_account_id": Donation.bank_account_id,
+    "bank_name": BankAccount.bank_name,
+    "account_number": BankAccount.account_number,
+}
+CSV_BATCH_SIZE = 1000
+CSV_CHUNK_SIZE = 64 * 1024
 
 
 # Routes
 @app.route("/donate", methods=["POST"])
 def donate():
-    idempotency_key = request.form.get("idempotency_key", "").strip()
+    return create_donation(request.form, request.files.get('proof'))
+
+
+def create_donation(form, proof):
+    """Record a pending donation from form fields and a proof FileStorage.
+
+    Shared by /donate and finalized chunked uploads; returns a response.
+    """
+    idempotency_key = form.get("idempotency_key", "").strip()
     if not idempotency_key:
         return jsonify({"message": "Missing idempotency key"}), 400
     
-    # Check for duplicate
-    existing = Donation.query.filter_by(idempotency_key=idempotency_key).first()
-    if existing:
-        app.logger.warning(f"Duplicate donation blocked: {idempotency_key}")
-        return jsonify({
-            "message": "This donation was already submitted",
-            "reference": existing.reference
-        }), 409
+    # Recently seen in this process; otherwise the INSERT below detects it
+    existing_reference = _idempotency_cache.get(idempotency_key)
+    if existing_reference:
+        return duplicate_donation_response(idempotency_key, existing_reference)
     
     # Get form data
-    fullname = request.form.get("fullname", "").strip()
-    email = request.form.get("email", "").strip()
-    phone = request.form.get("phone", "").strip()
+    fullname = form.get("fullname", "").strip()
+    email = form.get("email", "").strip()
+    phone = form.get("phone", "").strip()
     
     try:
-        amount = int(float(request.form.get("amount", 0)))
+        amount = int(float(form.get("amount", 0)))
     except Exception:
         return jsonify({"message": "Invalid amount provided"}), 400
     
@@ -197,20 +800,16 @@ def donate():
         return jsonify({"message": "Full name, email, and amount are required"}), 400
     
     # Handle proof file
-    proof = request.files.get('proof')
     if not proof or proof.filename == '':
         return jsonify({"message": "Proof of payment file is required"}), 400
     
     if not allowed_file(proof.filename):
         return jsonify({"message": "Unsupported proof file type (allowed: png,jpg,jpeg,gif,pdf)"}), 400
     
-    filename = secure_filename(proof.filename)
-    prefix = str(int(time.time()))
-    stored_name = f"{prefix}_{filename}"
-    save_path = os.path.join(UPLOAD_FOLDER, stored_name)
-    
     try:
-        proof.save(save_path)
+        proof_key, proof_size, proof_created = proof_store.save_stream(
+            proof.stream, file_extension(proof.filename)
+        )
     except Exception as e:
         app.logger.error(f"Failed to save proof file: {e}")
         return jsonify({"message": "Failed to save proof file"}), 500
@@ -219,27 +818,50 @@ def donate():
     reference = uuid.uuid4().hex[:12]
     
     # Get bank account ID
-    bank_account_id = request.form.get('bank_account_id')
+    bank_account_id = form.get('bank_account_id')
     try:
         bank_account_id = int(bank_account_id) if bank_account_id else None
     except Exception:
         bank_account_id = None
     
-    # Create donation record
-    donation = Donation(
+    # Create donation record; a concurrent or earlier submission with the
+    # same idempotency key makes this insert a no-op instead of an error
+    insert_donation = dialect_insert(Donation.__table__).values(
         fullname=fullname,
         email=email,
         phone=phone,
         amount=amount,
         reference=reference,
-        proof_filename=stored_name,
+        proof_filename=proof_key,
         status='pending',
         bank_account_id=bank_account_id,
         idempotency_key=idempotency_key
-    )
+    ).on_conflict_do_nothing(
+        index_elements=[Donation.__table__.c.idempotency_key]
+    ).returning(Donation.__table__.c.id)
     
-    db.session.add(donation)
-    db.session.commit()
+    try:
+        inserted = db.session.execute(insert_donation).scalar()
+        if inserted is None:
+            db.session.rollback()
+            existing_reference = db.session.query(Donation.reference).filter_by(
+                idempotency_key=idempotency_key
+            ).scalar()
+            discard_proof(proof_key, proof_created)
+            _idempotency_cache.set(idempotency_key, existing_reference)
+            return duplicate_donation_response(idempotency_key, existing_reference)
+        
+        retain_proof(proof_key, proof_size)
+        enqueue_job("process_proof", reference=reference)
+        stamp_change_seq([inserted])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        discard_proof(proof_key, proof_created)
+        app.logger.error(f"Failed to record donation: {e}")
+        return jsonify({"message": "Failed to record donation"}), 500
+    
+    _idempotency_cache.set(idempotency_key, reference)
     
     message = (
         "Donation recorded as pending with proof of payment.\n"
@@ -269,102 +891,286 @@ def donation_status(reference):
     }
     
     if donation.bank_account_id:
-        bank_account = BankAccount.query.get(donation.bank_account_id)
-        if bank_account:
-            result["bank_account"] = {
-                "id": bank_account.id,
-                "bank_name": bank_account.bank_name,
-                "account_name": bank_account.account_name,
-                "account_number": bank_account.account_number,
-                "bank_type": bank_account.bank_type
-            }
+        result["bank_account"] = bank_accounts_snapshot().by_id.get(donation.bank_account_id)
     
     return jsonify(result)
 @app.route('/admin/reset-donations', methods=['POST'])
+@admin_required
 def reset_donations():
-    if not is_admin_authorized(request):
-        return jsonify({"message": "Unauthorized"}), 401
-
     try:
-        # delete all donations
+        # delete all donations and their pending processing jobs
         deleted_rows = Donation.query.delete()
+        Job.query.filter_by(kind="process_proof").delete()
+        proof_keys = release_all_proofs()
+        DonationStat.query.delete()
+        bump_collection_version("paid_donations")
         db.session.commit()
+        _idempotency_cache.clear()
+
+        deleted_files = sum(1 for key in proof_keys if proof_store.delete(key))
 
         return jsonify({
             "message": "Reset successful",
-            "deleted_rows": deleted_rows
+            "deleted_rows": deleted_rows,
+            "deleted_files": deleted_files
         })
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
 
+def proof_variants(key):
+    """srcset-ready /protected-proof URLs (the admin appends its token)."""
+    return derivatives.srcset({
+        (variant, fmt): url_for("protected_proof", filename=key, variant=variant, format=fmt)
+        for variant, fmt in derivatives.all_variants()
+    })
+
+
 @app.route("/pending-donations", methods=["GET"])
+@admin_required
 def pending_donations():
-    if not is_admin_authorized(request):
-        return jsonify({"message": "Unauthorized"}), 401
-    
-    donations = Donation.query.filter_by(status="pending").all()
+    # ?status=pending (default), paid or all, plus the donation_filters() fields
+    status = request.args.get("status", "pending")
+    try:
+        conditions = donation_filters(request.args)
+        if status != "all":
+            conditions.append(Donation.status == status)
+        donations, next_cursor = donation_page(conditions, request.args)
+    except (TypeError, ValueError) as e:
+        return jsonify({"message": f"Invalid query parameter: {e}"}), 400
+    
+    keys = {d.proof_filename for d in donations if proof_store.is_key(d.proof_filename)}
+    if proof_store.storage.resizes_on_delivery:
+        has_variants = ProofBlob.mime_type.like("image/%")  # resized on delivery, nothing stored
+    else:
+        has_variants = ProofBlob.has_variants.is_(True)
+    with_variants = {key for (key,) in db.session.query(ProofBlob.key).filter(
+        ProofBlob.key.in_(keys), has_variants
+    )} if keys else set()
     
-    return jsonify([{
-        "fullname": d.fullname,
-        "phone": d.phone,
-        "amount": d.amount,
-        "reference": d.reference,
-        "status": d.status,
-        "proof_filename": d.proof_filename,
-        "approved_by": d.approved_by,
-        "approved_at": d.approved_at.isoformat() if d.approved_at else None
-    } for d in donations])
+    return jsonify({
+        "items": [{
+            "fullname": d.fullname,
+            "phone": d.phone,
+            "amount": d.amount,
+            "reference": d.reference,
+            "status": d.status,
+            "proof_filename": d.proof_filename,
+            "processing_status": d.processing_status,
+            "processing_error": d.processing_error,
+            "bank_account_id": d.bank_account_id,
+            "approved_by": d.approved_by,
+            "approved_at": d.approved_at.isoformat() if d.approved_at else None,
+            "created_at": d.created_at.isoformat() if d.created_at else None,
+            "proof_variants": proof_variants(d.proof_filename) if d.proof_filename in with_variants else None
+        } for d in donations],
+        "next_cursor": next_cursor
+    })
 
 
 @app.route("/paid-users", methods=["GET"])
+@versioned_collection("paid_donations")
 def paid_users():
-    donations = Donation.query.filter_by(status="paid").all()
+    try:
+        conditions = donation_filters(request.args)
+        conditions.append(Donation.status == "paid")
+        donations, next_cursor = donation_page(conditions, request.args)
+    except (TypeError, ValueError) as e:
+        return jsonify({"message": f"Invalid query parameter: {e}"}), 400
     
-    return jsonify([{
-        "fullname": d.fullname,
-        "phone": d.phone,
-        "amount": d.amount,
-        "reference": d.reference
-    } for d in donations])
+    return jsonify({
+        "items": [{
+            "fullname": d.fullname,
+            "phone": d.phone,
+            "amount": d.amount,
+            "reference": d.reference
+        } for d in donations],  # public: no proof keys
+        "next_cursor": next_cursor
+    })
+
+
+def utc_today():
+    return datetime.utcnow().date()
+
+
+@app.route("/stats", methods=["GET"])
+@versioned_collection("paid_donations", vary=lambda: utc_today().isoformat())  # by_day moves at midnight
+def donation_stats():
+    """Totals of paid donations from the pre-aggregated donation_stats table."""
+    try:
+        days = max(1, min(int(request.args.get("days", 30)), 366))
+    except ValueError:
+        return jsonify({"message": "days must be a number"}), 400
+    since = (utc_today() - timedelta(days=days - 1)).isoformat()
+    
+    rows = DonationStat.query.filter(db.or_(
+        DonationStat.scope != "day", DonationStat.bucket >= since
+    )).all()
+    
+    overall = next((r for r in rows if r.scope == "overall"), None)
+    total = overall.total_amount if overall else 0
+    
+    return jsonify({
+        "total_raised": total,
+        "donation_count": overall.donation_count if overall else 0,
+        "goal": DONATION_GOAL,
+        "progress": round(total / DONATION_GOAL, 4) if DONATION_GOAL else None,
+        "by_bank_account": [{
+            "bank_account_id": None if r.bucket == "none" else int(r.bucket),
+            "total": r.total_amount,
+            "count": r.donation_count
+        } for r in rows if r.scope == "account"],
+        "by_day": sorted(({
+            "date": r.bucket,
+            "total": r.total_amount,
+            "count": r.donation_count
+        } for r in rows if r.scope == "day"), key=lambda d: d["date"])
+    })
+
+
+@app.route("/admin/changes", methods=["GET"])
+@admin_required
+def donation_changes():
+    """NDJSON feed of donations created or updated after ?since=<cursor>.
+
+    Changes are ordered by (change_seq, id). Every line carries the cursor
+    that resumes right after it, and X-Next-Cursor holds the cursor for the
+    next page (the given one if nothing changed); X-Has-More says whether
+    to fetch again straight away. Deletions (admin reset) are not reported.
+    """
+    since = request.args.get("since", "")
+    try:
+        limit = min(int(request.args.get("limit") or CHANGE_FEED_PAGE_SIZE), CHANGE_FEED_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        after = tuple(int(v) for v in decode_cursor(since)) if since else (0, 0)
+        if len(after) != 2:
+            raise ValueError("Invalid cursor")
+    except (TypeError, ValueError) as e:
+        return jsonify({"message": f"Invalid query parameter: {e}"}), 400
+    
+    rows = (
+        db.session.query(
+            Donation.change_seq, Donation.id, Donation.reference, Donation.fullname,
+            Donation.email, Donation.phone, Donation.amount, Donation.status,
+            Donation.bank_account_id, Donation.approved_by, Donation.approved_at,
+            Donation.created_at, Donation.updated_at,
+        )
+        .filter(db.tuple_(Donation.change_seq, Donation.id) > after)
+        .order_by(Donation.change_seq, Donation.id)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1].change_seq, rows[-1].id) if rows else since
+    
+    def generate_changes():
+        for row in rows:
+            record = {k: (v.isoformat() if isinstance(v, datetime) else v)
+                      for k, v in row._asdict().items() if k != "id"}
+            record["cursor"] = encode_cursor(row.change_seq, row.id)
+            yield json.dumps(record) + "\n"
+    
+    return app.response_class(generate_changes(), mimetype="application/x-ndjson", headers={
+        "X-Next-Cursor": next_cursor,
+        "X-Has-More": "true" if has_more else "false",
+    })
 
 
 @app.route("/admin/validate-donation", methods=["POST"])
+@admin_required
 def validate_donation():
-    if not is_admin_authorized(request):
-        return jsonify({"message": "Unauthorized"}), 401
-    
     data = request.get_json() or {}
     reference = data.get("reference")
     
     if not reference:
         return jsonify({"message": "Reference required"}), 400
     
-    donation = Donation.query.filter_by(reference=reference).first()
+    admin_name = request.headers.get("X-ADMIN-NAME", "admin")
     
-    if not donation:
-        return jsonify({"message": "Reference not found"}), 404
+    updated, approved_at = mark_donations_paid([Donation.reference == reference], admin_name)
+    db.session.commit()
     
-    if donation.status == "paid":
+    if not updated:
+        status = db.session.query(Donation.status).filter_by(reference=reference).scalar()
+        if status is None:
+            return jsonify({"message": "Reference not found"}), 404
         return jsonify({"message": "Already marked as paid"}), 200
     
+    return jsonify({
+        "message": "Donation validated",
+        "approved_by": admin_name,
+        "approved_at": approved_at.isoformat()
+    }), 200
+
+
+@app.route("/admin/validate-donations", methods=["POST"])
+@admin_required
+def validate_donations():
+    """Approve many pending donations at once.
+
+    Body: {"references": [...]} or filter fields
+    (min_amount, max_amount, date_from, date_to, bank_account_id).
+    """
+    data = request.get_json() or {}
+    if not isinstance(data, dict):
+        return jsonify({"message": "Body must be a JSON object"}), 400
+    references = data.get("references")
     admin_name = request.headers.get("X-ADMIN-NAME", "admin")
     
-    donation.status = "paid"
-    donation.approved_by = admin_name
-    donation.approved_at = datetime.utcnow()
+    if references is not None:
+        if not isinstance(references, list) or not references:
+            return jsonify({"message": "references must be a non-empty list"}), 400
+        if not all(isinstance(r, str) for r in references):
+            return jsonify({"message": "references must be strings"}), 400
+        references = list(dict.fromkeys(references))
+        if len(references) > MAX_BULK_REFERENCES:
+            return jsonify({"message": f"At most {MAX_BULK_REFERENCES} references per request"}), 400
+        conditions = [Donation.reference.in_(references)]
+    else:
+        try:
+            conditions = donation_filters(data)
+        except (TypeError, ValueError):
+            return jsonify({"message": "Invalid filter value"}), 400
+        if not conditions:
+            return jsonify({"message": "references or a filter is required"}), 400
     
-    db.session.commit()
+    try:
+        updated, approved_at = mark_donations_paid(conditions, admin_name)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Bulk validation failed: {e}")
+        return jsonify({"message": "Bulk validation failed"}), 500
+    
+    if references is None:
+        results = [{"reference": ref, "result": "updated"} for ref in updated]
+    else:
+        updated_set = set(updated)
+        existing = dict(
+            db.session.query(Donation.reference, Donation.status)
+            .filter(Donation.reference.in_([r for r in references if r not in updated_set]))
+        ) if len(updated_set) < len(references) else {}
+        results = [{
+            "reference": ref,
+            "result": "updated" if ref in updated_set
+            else "already_paid" if existing.get(ref) == "paid"
+            else "not_found"
+        } for ref in references]
     
     return jsonify({
-        "message": "Donation validated",
+        "message": f"{len(updated)} donation(s) validated",
+        "updated": len(updated),
         "approved_by": admin_name,
-        "approved_at": donation.approved_at.isoformat()
+        "approved_at": approved_at.isoformat(),
+        "results": results
     }), 200
 
 
 @app.route('/admin/bank-accounts', methods=['GET', 'POST', 'OPTIONS'])
+@admin_required
 def admin_bank_accounts():
     if request.method == 'OPTIONS':
         resp = app.make_response(('', 204))
@@ -374,9 +1180,6 @@ def admin_bank_accounts():
         return resp
     
     if request.method == 'GET':
-        if not is_admin_authorized(request):
-            return jsonify({"message": "Unauthorized"}), 401
-        
         accounts = BankAccount.query.order_by(BankAccount.created_at.desc()).all()
         
         return jsonify([{
@@ -390,15 +1193,6 @@ def admin_bank_accounts():
         } for a in accounts])
     
     if request.method == 'POST':
-        token_q = request.args.get('token')
-        if token_q and verify_admin_token(token_q):
-            authorized = True
-        else:
-            authorized = is_admin_authorized(request)
-        
-        if not authorized:
-            return jsonify({"message": "Unauthorized"}), 401
-        
         data = request.get_json() if request.is_json else request.form.to_dict()
         
         bank_name = data.get('bank_name', '').strip()
@@ -419,22 +1213,15 @@ def admin_bank_accounts():
         )
         
         db.session.add(account)
+        bump_collection_version("bank_accounts")
         db.session.commit()
         
         return jsonify({"message": "Added", "id": account.id}), 201
 
 
 @app.route('/admin/bank-accounts/<int:acc_id>', methods=['PUT', 'DELETE'])
+@admin_required
 def admin_bank_account_item(acc_id):
-    token_q = request.args.get('token')
-    if token_q and verify_admin_token(token_q):
-        authorized = True
-    else:
-        authorized = is_admin_authorized(request)
-    
-    if not authorized:
-        return jsonify({"message": "Unauthorized"}), 401
-    
     account = BankAccount.query.get(acc_id)
     
     if not account:
@@ -442,6 +1229,7 @@ def admin_bank_account_item(acc_id):
     
     if request.method == 'DELETE':
         db.session.delete(account)
+        bump_collection_version("bank_accounts")
         db.session.commit()
         return jsonify({"message": "Deleted"}), 200
     
@@ -459,153 +1247,474 @@ def admin_bank_account_item(acc_id):
         if 'active' in data:
             account.active = str(data['active']).lower() in ['1', 'true', 'yes']
         
+        bump_collection_version("bank_accounts")
         db.session.commit()
         
         return jsonify({"message": "Updated"}), 200
 
 
 @app.route('/bank-accounts', methods=['GET'])
+@versioned_collection("bank_accounts")
 def list_bank_accounts():
-    accounts = BankAccount.query.filter_by(active=True).order_by(BankAccount.created_at.desc()).all()
-    
-    return jsonify([{
-        "id": a.id,
-        "bank_name": a.bank_name,
-        "account_name": a.account_name,
-        "account_number": a.account_number,
-        "bank_type": a.bank_type
-    } for a in accounts])
-
-ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
-
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    snapshot = bank_accounts_snapshot(g.collection_version)
+    return app.response_class(snapshot.json, mimetype="application/json")
 
 @app.route('/upload-image', methods=['POST'])
 def upload_image():
-    files = request.files.getlist('file')
+    return ingest_gallery_images(request.files.getlist('file'), request.form)
+
 
+def ingest_gallery_images(files, form):
+    """Upload FileStorage objects to Cloudinary and record them as one album.
+
+    Shared by /upload-image and finalized chunked uploads; returns a response.
+    """
     if not files:
         return jsonify({'message': 'No files uploaded'}), 400
 
-    album_title = request.form.get('album_title', '')
-    album_date = request.form.get('album_date')
-    app.logger.info(f"Request files: {request.files}")
-    app.logger.info(f"Request form: {request.form}")
-   
-    uploaded_urls = []
-
+    album_title = form.get('album_title', '')
+    album_date = form.get('album_date')
+    
+    try:
+        taken_at = datetime.fromisoformat(album_date) if album_date else None
+    except ValueError:
+        return jsonify({'message': 'Invalid album_date'}), 400
+    
+    results = []
+    pending = []
     for f in files:
         if not f or f.filename == '':
             continue
-
-        if not allowed_file(f.filename):
+        if not allowed_file(f.filename, IMAGE_EXTENSIONS):
             app.logger.warning(f"Skipped unsupported file: {f.filename}")
+            results.append({'filename': f.filename, 'ok': False, 'error': 'Unsupported file type'})
             continue
+        result = {'filename': f.filename, 'ok': False}
+        results.append(result)
+        pending.append((f, result))
+    
+    def upload(f):
+        key = f"gallery/{uuid.uuid4().hex}.{file_extension(f.filename)}"
+        media_storage.put(key, f.stream, f.mimetype)
+        has_variants = False
+        if not media_storage.resizes_on_delivery and derivatives.available():
+            try:
+                f.stream.seek(0)
+                has_variants = derivatives.generate(media_storage, f.stream, {
+                    (variant, fmt): derivatives.derived_key(key, variant, fmt)
+                    for variant, fmt in derivatives.all_variants()
+                })
+            except Exception as e:
+                app.logger.warning(f"Could not create variants of {f.filename}: {e}")
+        return key, has_variants
+    
+    # Upload to the media storage backend, a few files at a time
+    rows = []
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(UPLOAD_CONCURRENCY, len(pending))) as pool:
+            futures = [(pool.submit(upload, f), f, result) for f, result in pending]
+            for future, f, result in futures:
+                try:
+                    key, has_variants = future.result()
+                except Exception as e:
+                    app.logger.error(f"Upload failed for file {f.filename}: {e}")
+                    result['error'] = 'Upload failed'
+                    continue
+                url = media_storage.url(key)
+                result.update(ok=True, url=url)
+                rows.append({
+                    'filename': f.filename,
+                    'url': url,          # CDN URL or /media/<key>
+                    'public_id': key,    # media storage key, for future delete
+                    'has_variants': has_variants,
+                    'title': album_title,
+                    'taken_at': taken_at,
+                    'uploaded_at': datetime.utcnow(),
+                })
+    
+    if not rows:
+        return jsonify({'message': 'No valid images were uploaded', 'results': results}), 400
+    
+    try:
+        db.session.execute(db.insert(Image), rows)
+        bump_collection_version("images")
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Failed to record {len(rows)} uploaded image(s): {e}")
+        return jsonify({'message': 'Failed to save uploaded images', 'results': results}), 500
+    
+    uploaded_urls = [row['url'] for row in rows]
+    response = {
+        'message': 'Uploaded',
+        'urls': uploaded_urls,
+        'uploaded': len(rows),
+        'failed': len(results) - len(rows),
+        'results': results,
+    }
+    if len(uploaded_urls) == 1:
+        response['url'] = uploaded_urls[0]
+    return jsonify(response), 201
 
-        # Upload directly to Cloudinary
-        try: 
-            result = cloudinary.uploader.upload(
-                f,
-                folder="gallery",
-                resource_type="image"
-            )
 
-            image = Image(
-                filename=f.filename,
-                url=result['secure_url'],          # CDN URL
-                public_id=result['public_id'],     # for future delete
-                title=album_title,
-                taken_at=datetime.fromisoformat(album_date) if album_date else None
-            )
+# Resumable chunked uploads (see upload_sessions.py)
+UPLOAD_KINDS = {"proof": PROOF_EXTENSIONS, "image": IMAGE_EXTENSIONS}
 
-            db.session.add(image)
-            db.session.commit()
-            uploaded_urls.append(result['secure_url'])
-        except Exception as e:
-            db.session.rollback()
-            app.logger.error(f"Upload or DB insert failed for file {f.filename}: {e}")
-            continue
-    
-    if len(uploaded_urls) == 0:
-        return jsonify({'message': 'No valid images were uploaded'}), 400
-    
-    if len(uploaded_urls) == 1:
-        return jsonify({'message': 'Uploaded', 'url': uploaded_urls[0], 'urls': uploaded_urls}), 201
+
+def upload_session_error(e):
+    return jsonify({"message": str(e)}), 404 if isinstance(e, UploadNotFound) else 400
+
+
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    """Start a chunked upload.
+
+    Body: {"filename", "size", "kind": "proof"|"image", "chunk_size"?}.
+    Chunks are then PUT to /uploads/<id>/chunks/<index>, progress read from
+    GET /uploads/<id>, and the file handed on by POST /uploads/<id>/finalize.
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"message": "Body must be a JSON object"}), 400
+    filename = secure_filename(str(data.get("filename", "")))
+    kind = data.get("kind")
+    requested_chunk_size = data.get("chunk_size")
+    try:
+        size = int(data.get("size", 0))
+        chunk_size = UPLOAD_CHUNK_SIZE if requested_chunk_size is None else int(requested_chunk_size)
+    except (TypeError, ValueError):
+        return jsonify({"message": "size and chunk_size must be integers"}), 400
+    # int() would quietly take true or 1.5
+    if chunk_size <= 0 or isinstance(requested_chunk_size, (bool, float)):
+        return jsonify({"message": "chunk_size must be a positive integer"}), 400
+    chunk_size = min(chunk_size, MAX_UPLOAD_CHUNK_SIZE)
+    
+    if kind not in UPLOAD_KINDS:
+        return jsonify({"message": "kind must be 'proof' or 'image'"}), 400
+    if not allowed_file(filename, UPLOAD_KINDS[kind]):
+        return jsonify({"message": f"Unsupported file type (allowed: {','.join(sorted(UPLOAD_KINDS[kind]))})"}), 400
+    if size > MAX_CHUNKED_UPLOAD_BYTES:
+        return jsonify({"message": f"File too large (max {MAX_CHUNKED_UPLOAD_BYTES} bytes)"}), 413
+    
+    upload_sessions.purge_expired()
+    try:
+        upload_id = upload_sessions.create(filename, size, chunk_size, kind=kind)
+    except UploadSessionError as e:
+        return upload_session_error(e)
     
-    return jsonify({'message': 'Uploaded', 'urls': uploaded_urls}), 201
+    return jsonify({"upload_id": upload_id, "chunk_size": chunk_size, "received": []}), 201
 
 
-@app.route('/gallery', methods=['GET'])
-def gallery_list():
-    images = Image.query.order_by(Image.taken_at.desc(), Image.title.asc()).all()
+@app.route('/uploads/<upload_id>/chunks/<int:index>', methods=['PUT'])
+def put_upload_chunk(upload_id, index):
+    """Raw chunk bytes in the body; ?offset= is optional and must be index * chunk_size."""
+    try:
+        offset = request.args.get("offset")
+        received = upload_sessions.write_chunk(
+            upload_id, index, request.stream, offset=int(offset) if offset is not None else None
+        )
+    except ValueError:
+        return jsonify({"message": "offset must be an integer"}), 400
+    except UploadSessionError as e:
+        return upload_session_error(e)
     
-    base = request.host_url.rstrip('/')
+    return jsonify({"received": received}), 200
+
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    try:
+        meta = upload_sessions.meta(upload_id)
+        received = upload_sessions.received(upload_id)
+    except UploadSessionError as e:
+        return upload_session_error(e)
     
-    return jsonify([{
+    return jsonify({
+        "upload_id": upload_id,
+        "filename": meta["filename"],
+        "kind": meta["kind"],
+        "size": meta["size"],
+        "chunk_size": meta["chunk_size"],
+        "received": received,
+        "complete": received == [[0, meta["size"]]],
+    })
+
+
+@app.route('/uploads/<upload_id>/finalize', methods=['POST'])
+def finalize_upload(upload_id):
+    """Hand the assembled file to /donate or /upload-image handling.
+
+    Takes the same form fields as those routes (as form data or JSON). The
+    session is kept if the ingest rejects the fields, so finalize can be
+    retried without sending the chunks again.
+    """
+    try:
+        meta = upload_sessions.meta(upload_id)
+        if not upload_sessions.is_complete(upload_id):
+            return jsonify({
+                "message": "Upload is incomplete",
+                "received": upload_sessions.received(upload_id)
+            }), 409
+    except UploadSessionError as e:
+        return upload_session_error(e)
+    
+    fields = request.get_json(silent=True)
+    if fields is None:
+        fields = request.form
+    elif not isinstance(fields, dict):
+        return jsonify({"message": "Body must be a JSON object"}), 400
+    with open(upload_sessions.data_path(upload_id), "rb") as f:
+        upload = FileStorage(stream=f, filename=meta["filename"])
+        if meta["kind"] == "proof":
+            resp = make_response(create_donation(fields, upload))
+        else:
+            resp = make_response(ingest_gallery_images([upload], fields))
+    
+    if resp.status_code < 300:
+        upload_sessions.delete(upload_id)
+    return resp
+
+
+def image_variants(img):
+    """srcset-ready URLs for an image, or None when only the original exists."""
+    if not img.public_id:
+        return None
+    urls = {}
+    for variant, fmt in derivatives.all_variants():
+        url = media_storage.variant_url(img.public_id, derivatives.VARIANT_WIDTHS[variant], fmt)
+        if url is None:
+            if not img.has_variants:
+                return None
+            url = media_storage.url(derivatives.derived_key(img.public_id, variant, fmt))
+        urls[(variant, fmt)] = url
+    return derivatives.srcset(urls)
+
+
+def image_json(img):
+    return {
         'id': img.id,
         'filename': img.filename,
         'title': img.title,
         'taken_at': img.taken_at.isoformat() if img.taken_at else None,
         'uploaded_at': img.uploaded_at.isoformat(),
-        'url': img.url  # Using the Cloudinary CDN URL
-    } for img in images])
+        'url': img.url,  # the original, from the CDN or /media
+        **(image_variants(img) or {})
+    }
 
 
-@app.route('/gallery-image/<path:filename>', methods=['GET'])
-def serve_gallery_image(filename):
-    safe = secure_filename(filename)
-    full = os.path.join(UPLOAD_FOLDER, safe)
-    
-    if not os.path.exists(full):
-        return send_from_directory(
-        os.path.join(app.root_path, 'static'),
-        'image-missing.png'
-    )
+def album_condition(title):
+    """Images of one album; untitled uploads (NULL or '') form the '' album."""
+    if title:
+        return Image.title == title
+    return db.or_(Image.title == '', Image.title.is_(None))
 
+
+@app.route('/gallery', methods=['GET'])
+@versioned_collection("images")
+def gallery_list():
+    """All images, newest album date first, keyed on (taken_at, id); undated last."""
+    try:
+        limit = page_limit(request.args)
+        query = Image.query
+        if request.args.get("cursor"):
+            taken_at, last_id = decode_cursor(request.args["cursor"])
+            last_id = int(last_id)
+            if taken_at is None:
+                query = query.filter(Image.taken_at.is_(None), Image.id < last_id)
+            else:
+                taken_at = datetime.fromisoformat(taken_at)
+                query = query.filter(db.or_(
+                    Image.taken_at < taken_at,
+                    db.and_(Image.taken_at == taken_at, Image.id < last_id),
+                    Image.taken_at.is_(None),
+                ))
+    except (TypeError, ValueError) as e:
+        return jsonify({"message": f"Invalid query parameter: {e}"}), 400
+    
+    images = query.order_by(Image.taken_at.desc().nulls_last(), Image.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(images) > limit:
+        images = images[:limit]
+        last = images[-1]
+        next_cursor = encode_cursor(last.taken_at.isoformat() if last.taken_at else None, last.id)
+    
+    return jsonify({"items": [image_json(img) for img in images], "next_cursor": next_cursor})
+
+
+@app.route('/albums', methods=['GET'])
+@versioned_collection("images")
+def list_albums():
+    """One summary per album title: date, image count and a cover image URL."""
+    title = db.func.coalesce(Image.title, '')
+    rows = (
+        db.session.query(
+            title.label("title"),
+            db.func.max(Image.taken_at).label("taken_at"),
+            db.func.count(Image.id).label("count"),
+            db.func.min(Image.id).label("cover_id"),
+        )
+        .group_by(title)
+        .order_by(db.func.max(Image.taken_at).desc().nulls_last(), title)
+        .all()
+    )
+    covers = dict(
+        db.session.query(Image.id, Image.url).filter(Image.id.in_([r.cover_id for r in rows]))
+    ) if rows else {}
+    
+    return jsonify([{
+        "title": r.title,
+        "taken_at": r.taken_at.isoformat() if r.taken_at else None,
+        "count": r.count,
+        "cover_url": covers.get(r.cover_id),
+        "images_url": url_for("album_images", title=r.title) if r.title else url_for("album_images"),
+    } for r in rows])
+
+
+@app.route('/albums/images', methods=['GET'], defaults={'title': ''})
+@app.route('/albums/<path:title>/images', methods=['GET'])
+@versioned_collection("images")
+def album_images(title):
+    """Images of one album in upload order, keyed on id. /albums/images is the untitled album."""
+    try:
+        limit = page_limit(request.args)
+        query = Image.query.filter(album_condition(title))
+        if request.args.get("cursor"):
+            (last_id,) = decode_cursor(request.args["cursor"])
+            query = query.filter(Image.id > int(last_id))
+    except (TypeError, ValueError) as e:
+        return jsonify({"message": f"Invalid query parameter: {e}"}), 400
+    
+    images = query.order_by(Image.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(images) > limit:
+        images = images[:limit]
+        next_cursor = encode_cursor(images[-1].id)
     
-    return send_from_directory(UPLOAD_FOLDER, safe)
+    return jsonify({"items": [image_json(img) for img in images], "next_cursor": next_cursor})
+
+
+@app.route('/gallery-image/<path:filename>', methods=['GET'])
+def serve_gallery_image(filename):
+    full = os.path.join(UPLOAD_FOLDER, secure_filename(filename))
+    if not os.path.isfile(full):
+        full = os.path.join(app.root_path, 'static', 'image-missing.png')
+    return serve_path(full, cache_control="public, max-age=86400")
+
+
+@app.route('/media/<path:key>', methods=['GET'])
+def serve_media(key):
+    """Gallery files for the local and memory backends; Cloudinary URLs point at its CDN."""
+    if isinstance(media_storage, CloudinaryStorage):
+        return redirect(media_storage.url(key))
+    # keys are random, so a stored file never changes
+    cache_control = "public, max-age=31536000, immutable"
+    try:
+        full = media_storage.local_path(key)
+    except ValueError:
+        abort(404)
+    if full is not None:
+        return serve_path(full, cache_control=cache_control)
+    try:
+        stored = media_storage.open(key)
+    except FileNotFoundError:
+        abort(404)
+    return serve_stream(stored, guess_type(key), key.replace("/", "-"), cache_control)
 
 
 @app.route('/protected-proof/<path:filename>', methods=['GET'])
+@admin_required
 def protected_proof(filename):
-    if not is_admin_authorized(request):
-        return jsonify({"message": "Unauthorized"}), 401
-    
-    safe = secure_filename(filename)
-    full = os.path.join(UPLOAD_FOLDER, safe)
-    
-    if not os.path.exists(full):
-        abort(404)
+    """Proofs and their variants, sent once the admin check has passed.
+
+    Store keys are content hashes, so the ETag is the key and the browser
+    may keep its private copy; FILE_OFFLOAD hands the transfer to the proxy.
+    """
+    if proof_store.is_key(filename):
+        # ?variant=thumb alone is the JPEG thumbnail; with &format= any derivative
+        variant, fmt = request.args.get('variant'), request.args.get('format')
+        if fmt is not None:
+            if (variant, fmt) not in derivatives.all_variants():
+                abort(404)
+            url = proof_store.storage.variant_url(
+                proof_store.storage_key(filename), derivatives.VARIANT_WIDTHS[variant], fmt
+            )
+            if url is not None:
+                return redirect(url)  # signed URL, resized by the backend
+            storage_key = proof_store.variant_key(filename, variant, fmt)
+        elif variant == 'thumb':
+            storage_key = proof_store.thumbnail_key(filename)
+        else:
+            storage_key = proof_store.storage_key(filename)
+        etag = storage_key.replace("/", "-")
+        full = proof_store.storage.local_path(storage_key)
+        if full is not None:
+            return serve_path(full, etag=etag, cache_control=PROOF_CACHE_CONTROL)
+        try:
+            stored = proof_store.storage.open(storage_key)
+        except FileNotFoundError:
+            abort(404)
+        return serve_stream(stored, guess_type(storage_key), etag, PROOF_CACHE_CONTROL)
     
-    return send_from_directory(UPLOAD_FOLDER, safe)
+    # Proofs uploaded before the content-addressed store (see migrate_proofs.py)
+    return serve_path(os.path.join(UPLOAD_FOLDER, secure_filename(filename)))
+
 
 @app.route('/admin/delete-image/<int:image_id>', methods=['DELETE'])
+@admin_required
 def admin_delete_image(image_id):
-    # Check if admin authorized via your helper function
-    if not is_admin_authorized(request):
-        return jsonify({"message": "Unauthorized"}), 401
-
-    # Get image record from DB
-    image = Image.query.get(image_id)
-    if not image:
-        return jsonify({"message": "Image not found"}), 404
-
     try:
-        # Delete image from Cloudinary if public_id is stored (adjust if you store it)
-        if hasattr(image, 'public_id') and image.public_id:
-            cloudinary.uploader.destroy(image.public_id)
-        
-        # Delete from database
-        db.session.delete(image)
+        deleted = delete_images([Image.id == image_id])
         db.session.commit()
-
-        return jsonify({"message": "Image deleted successfully"}), 200
-
     except Exception as e:
         app.logger.error(f"Failed to delete image {image_id}: {e}")
         db.session.rollback()
         return jsonify({"message": "Failed to delete image", "error": str(e)}), 500
+    
+    if not deleted:
+        return jsonify({"message": "Image not found"}), 404
+    return jsonify({"message": "Image deleted successfully"}), 200
+
+
+@app.route('/admin/delete-images', methods=['POST'])
+@admin_required
+def admin_delete_images():
+    """Delete many gallery images at once.
+
+    Body: {"ids": [...]} or {"album_title": "..."} ("" is the untitled album).
+    Stored files are removed in the background.
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"message": "Body must be a JSON object"}), 400
+    ids = data.get("ids")
+    
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            return jsonify({"message": "ids must be a non-empty list"}), 400
+        if len(ids) > MAX_BULK_REFERENCES:
+            return jsonify({"message": f"At most {MAX_BULK_REFERENCES} ids per request"}), 400
+        try:
+            conditions = [Image.id.in_([int(i) for i in ids])]
+        except (TypeError, ValueError):
+            return jsonify({"message": "ids must be integers"}), 400
+    elif isinstance(data.get("album_title"), str):
+        conditions = [album_condition(data["album_title"])]
+    else:
+        return jsonify({"message": "Provide ids or album_title"}), 400
+    
+    try:
+        deleted = delete_images(conditions)
+        db.session.commit()
+    except Exception as e:
+        app.logger.error(f"Failed to delete images: {e}")
+        db.session.rollback()
+        return jsonify({"message": "Failed to delete images"}), 500
+    
+    return jsonify({
+        "message": f"{len(deleted)} image(s) deleted",
+        "deleted": len(deleted),
+        "ids": deleted
+    }), 200
 
 @app.route('/admin/login', methods=['POST'])
 def admin_login():
@@ -620,59 +1729,89 @@ def admin_login():
 
 
 @app.route('/download-csv', methods=['GET'])
+@admin_required
 def download_csv():
-    if not is_admin_authorized(request):
-        return jsonify({"message": "Unauthorized"}), 401
-    
-    import csv
-    from io import StringIO
-    
-    donations = Donation.query.all()
-    
-    si = StringIO()
-    cw = csv.writer(si)
-    cw.writerow(['fullname', 'phone', 'amount', 'reference', 'status'])
-    
-    for d in donations:
-        cw.writerow([d.fullname, d.phone, d.amount, d.reference, d.status])
+    """Stream donations as CSV.
+
+    Query parameters: status (pending/paid/all), the donation_filters()
+    fields, columns (comma-separated subset of CSV_COLUMNS) and gzip=1 for
+    a .csv.gz download. Rows are read in batches through a server-side
+    cursor and written out in chunks, so memory use does not grow with the
+    table.
+    """
+    columns = [c.strip() for c in request.args.get("columns", "").split(",") if c.strip()]
+    columns = columns or list(CSV_COLUMNS)
+    unknown = [c for c in columns if c not in CSV_COLUMNS]
+    if unknown:
+        return jsonify({"message": f"Unknown columns: {', '.join(unknown)}"}), 400
+    
+    status = request.args.get("status", "all")
+    try:
+        conditions = donation_filters(request.args)
+    except (TypeError, ValueError) as e:
+        return jsonify({"message": f"Invalid query parameter: {e}"}), 400
+    if status != "all":
+        conditions.append(Donation.status == status)
+    
+    rows = (
+        db.session.query(*(CSV_COLUMNS[c] for c in columns))
+        .select_from(Donation)
+        .outerjoin(BankAccount, Donation.bank_account_id == BankAccount.id)
+        .filter(*conditions)
+        .order_by(Donation.created_at, Donation.id)
+        .yield_per(CSV_BATCH_SIZE)
+    )
     
-    output = si.getvalue()
+    def generate_csv():
+        buf = StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([v.isoformat() if isinstance(v, datetime) else v for v in row])
+            if buf.tell() >= CSV_CHUNK_SIZE:
+                yield buf.getvalue().encode()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue().encode()
+    
+    def gzipped(chunks):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+    
+    if request.args.get("gzip") in ("1", "true", "yes"):
+        body, mimetype, filename = gzipped(generate_csv()), "application/gzip", "donations.csv.gz"
+    else:
+        body, mimetype, filename = generate_csv(), "text/csv", "donations.csv"
     
-    return app.response_class(output, mimetype='text/csv', headers={
-        'Content-Disposition': 'attachment; filename=donations.csv'
+    return app.response_class(stream_with_context(body), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename={filename}'
     })
 
 
 @app.route("/")
 def home():
-    FRONTEND_DIR = os.path.abspath(os.path.join(basedir, '..'))
-    index_path = os.path.join(FRONTEND_DIR, 'index.html')
-    
-    if os.path.exists(index_path):
-        return send_from_directory(FRONTEND_DIR, 'index.html')
+    asset = static_manifest.get('index.html')
+    if asset is not None:
+        return static_assets.serve(asset, request, app.response_class)
     
     return jsonify({"message": "Backend is running successfully!"})
 
 
 @app.route('/<path:path>')
 def serve_frontend(path):
-    FRONTEND_DIR = os.path.abspath(os.path.join(basedir, '..'))
-    
-    candidate = os.path.join(FRONTEND_DIR, path)
-    if os.path.exists(candidate):
-        return send_from_directory(FRONTEND_DIR, path)
-    
-    candidate = os.path.join(FRONTEND_DIR, 'frontend_cds', path)
-    if os.path.exists(candidate):
-        return send_from_directory(os.path.join(FRONTEND_DIR, 'frontend_cds'), path)
-    
-    candidate = os.path.join(FRONTEND_DIR, 'image', path)
-    if os.path.exists(candidate):
-        return send_from_directory(os.path.join(FRONTEND_DIR, 'image'), path)
-    
-    abort(404)
+    asset = static_manifest.get(path)
+    if asset is None:
+        abort(404)
+    return static_assets.serve(asset, request, app.response_class)
 
 
 if __name__ == "__main__":
+    # Local development convenience; deployments run migrate.py once instead
+    with app.app_context():
+        migrations.upgrade(db.engine, log=app.logger.info)
     port = int(os.environ.get("PORT", 10000))
     app.run(host="0.0.0.0", port=port, debug=(os.environ.get("FLASK_DEBUG", "False") == "True"))
\ No newline at end of file
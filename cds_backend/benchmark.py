@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+Seed a database and measure every route through the WSGI app.
+
+    python cds_backend/benchmark.py                              # 10k donations, temporary SQLite
+    python cds_backend/benchmark.py --donations 1000000 --database-url postgresql://localhost/cds_bench
+    python cds_backend/benchmark.py --output new.json --baseline old.json --threshold 0.2
+
+Each route gets --requests calls spread over --concurrency threads, and
+the report gives p50/p95/p99 latency, throughput, errors and the peak RSS
+of the process. --output writes the results as JSON; --baseline compares
+against an earlier file and exits 1 when a route's p95 or throughput, or
+the peak RSS, got worse by more than --threshold.
+
+Routes left out on purpose are listed in EXCLUDED_ROUTES with the reason;
+uncovered() names any route that is in neither.
+
+Media and proofs use the in-memory storage backend (--storage-latency
+seconds per call stands in for Cloudinary), so no external service is hit.
+Point --database-url at a scratch database: it is migrated and seeded.
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+SEED_BATCH_SIZE = 5000
+MEDIA_OBJECTS = 100  # gallery images given stored bytes for /media
+FIRST_NAMES = ["Ada", "Bola", "Chidi", "Dayo", "Emeka", "Funmi", "Gbenga", "Halima", "Ike", "Jide"]
+LAST_NAMES = ["Okafor", "Adeyemi", "Bello", "Eze", "Ogun", "Musa", "Nwosu", "Balogun"]
+TINY_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+BULK_BATCH_SIZE = 20  # references or ids per bulk admin call
+UPLOAD_CHUNK_SIZE = 64 * 1024
+UPLOAD_CHUNKS = 16
+
+# (endpoint, method) -> why there is no scenario for it
+EXCLUDED_ROUTES = {
+    ("static", "GET"): "Flask's built-in static folder; the frontend is served by serve_frontend (static_asset)",
+    ("reset_donations", "POST"): "deletes every seeded donation the other scenarios read",
+    ("admin_delete_image", "DELETE"): "same delete_images() path as delete_images, with one id",
+    ("admin_bank_account_item", "DELETE"): "each call consumes an account; same one-row write as update_bank_account",
+    ("finalize_upload", "POST"): "needs a freshly completed session per call, then runs the donate/upload_image ingest",
+}
+
+
+def _batches(rows, size=SEED_BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def seed(app_module, donations=10000, images=2000, bank_accounts=30, albums=40, seed_value=1):
+    """Insert synthetic rows through bulk inserts; returns what the scenarios need.
+
+    Keeps the derived state consistent: change_seq and the collection
+    versions move past the new rows and donation_stats is rebuilt. The
+    values come from *seed_value*; a random run prefix keeps unique columns
+    apart when seeding the same database twice.
+    """
+    app, db = app_module.app, app_module.db
+    rng = random.Random(seed_value)
+    run = uuid.uuid4().hex[:6]
+    now = datetime.utcnow()
+    pending = []
+    references = []  # a sample of at most ~10k, for /donation-status
+    step = max(1, donations // 10000)
+    with app.app_context():
+        bank_table = app_module.BankAccount.__table__
+        bank_ids = []
+        for i in range(bank_accounts):
+            bank_ids.append(db.session.execute(bank_table.insert().values(
+                bank_name=f"Bench Bank {i}", account_name="CDS Bench", account_number=f"{i:010d}",
+                bank_type="savings", active=i % 5 != 0, created_at=now - timedelta(days=i),
+            )).inserted_primary_key[0])
+        db.session.commit()
+
+        base_seq = app_module.collection_version("donations")
+
+        def donation_rows():
+            for i in range(donations):
+                reference = f"b{run}{i:09d}"
+                status = "paid" if rng.random() < 0.7 else "pending"
+                created = now - timedelta(minutes=donations - i)
+                if i % step == 0:
+                    references.append(reference)
+                if status == "pending" and len(pending) < 10000:
+                    pending.append(reference)
+                yield {
+                    "fullname": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    "email": f"donor{i}@example.org",
+                    "phone": f"080{i:08d}",
+                    "amount": rng.choice([500, 1000, 2000, 5000, 10000, 25000]),
+                    "reference": reference,
+                    "status": status,
+                    "proof_filename": None,
+                    "approved_by": "bench" if status == "paid" else None,
+                    "approved_at": created if status == "paid" else None,
+                    "bank_account_id": rng.choice(bank_ids) if bank_ids and rng.random() < 0.8 else None,
+                    "idempotency_key": f"bench-{run}-{i}",
+                    "processing_status": "done",
+                    "created_at": created,
+                    "updated_at": created,
+                    "change_seq": base_seq + i + 1,
+                }
+
+        donation_table = app_module.Donation.__table__
+        for batch in _batches(donation_rows()):
+            db.session.execute(donation_table.insert(), batch)
+            db.session.commit()
+
+        image_table = app_module.Image.__table__
+        storage = app_module.media_storage
+        titles = [f"Bench album {i}" for i in range(albums)]
+        media_keys = []
+
+        def image_rows():
+            for i in range(images):
+                key = f"gallery/bench-{run}-{i}.png"
+                if len(media_keys) < MEDIA_OBJECTS:
+                    storage.put(key, io.BytesIO(TINY_PNG), "image/png")
+                    media_keys.append(key)
+                yield {
+                    "filename": f"bench-{i}.png", "url": storage.url(key), "public_id": key,
+                    "has_variants": False, "title": titles[i % albums] if albums else None,
+                    "taken_at": now - timedelta(days=i % 365), "uploaded_at": now,
+                }
+
+        for batch in _batches(image_rows()):
+            db.session.execute(image_table.insert(), batch)
+            db.session.commit()
+
+        version_table = app_module.CollectionVersion.__table__
+        seq = base_seq + donations
+        db.session.execute(app_module.dialect_insert(version_table).values(name="donations", version=seq)
+                           .on_conflict_do_update(index_elements=[version_table.c.name], set_={"version": seq}))
+        for name in ("images", "bank_accounts", "paid_donations"):
+            app_module.bump_collection_version(name)
+        app_module.DonationStat.query.delete()
+        app_module.add_to_stats(app_module.compute_donation_stats())
+        db.session.commit()
+
+        image_ids = [image_id for (image_id,) in db.session.query(app_module.Image.id)
+                     .filter(app_module.Image.public_id.like(f"gallery/bench-{run}-%"))
+                     .order_by(app_module.Image.id)]
+
+    # one stored proof for /protected-proof and one pre-storage file for /gallery-image
+    proof_key, _, _ = app_module.proof_store.save_stream(io.BytesIO(TINY_PNG), "png")
+    legacy_image = f"bench-legacy-{run}.png"
+    with open(os.path.join(app_module.UPLOAD_FOLDER, legacy_image), "wb") as f:
+        f.write(TINY_PNG)
+
+    return {
+        "references": references, "pending": pending, "titles": titles, "media_keys": media_keys,
+        "bank_ids": bank_ids, "image_ids": image_ids, "proof_key": proof_key, "legacy_image": legacy_image,
+    }
+
+
+def scenarios(app_module, seeded):
+    """[(name, method, make(i) -> (url, kwargs))] covering every route but EXCLUDED_ROUTES.
+
+    Scenarios that delete seeded rows come last, after the reads they would
+    otherwise change.
+    """
+    token = app_module.generate_admin_token("bench")
+    admin = {"Authorization": f"Bearer {token}"}
+    refs, pending, titles = seeded["references"], seeded["pending"], seeded["titles"]
+    media_keys, bank_ids, image_ids = seeded["media_keys"], seeded["bank_ids"], seeded["image_ids"]
+    run = uuid.uuid4().hex[:8]
+    # chunks are rewritten in place, so one session serves every call
+    upload_id = app_module.upload_sessions.create(
+        "bench.png", UPLOAD_CHUNK_SIZE * UPLOAD_CHUNKS, UPLOAD_CHUNK_SIZE, kind="proof"
+    )
+    chunk = bytes(UPLOAD_CHUNK_SIZE)
+
+    def batch(items, i):
+        start = i * BULK_BATCH_SIZE % len(items)
+        return items[start:start + BULK_BATCH_SIZE]
+
+    def get(url, **kwargs):
+        return lambda i: (url(i) if callable(url) else url, kwargs)
+
+    def donate(i):
+        return "/donate", {"content_type": "multipart/form-data", "data": {
+            "fullname": "Bench Donor", "email": "bench@example.org", "phone": "0800", "amount": "1000",
+            "proof": (io.BytesIO(TINY_PNG + f"{run}{i}".encode()), "proof.png"),
+            "idempotency_key": f"bench-donate-{run}-{i}",
+        }}
+
+    def upload(i):
+        return "/upload-image", {"headers": admin, "content_type": "multipart/form-data", "data": {
+            "album_title": titles[i % len(titles)] if titles else "", "album_date": "2025-01-01",
+            "file": [(io.BytesIO(TINY_PNG), f"bench-{i}-{n}.png") for n in range(3)],
+        }}
+
+    def validate(i):
+        return "/admin/validate-donation", {"headers": admin, "json": {"reference": pending[i % len(pending)]}}
+
+    def validate_bulk(i):
+        return "/admin/validate-donations", {"headers": admin, "json": {"references": batch(pending, i)}}
+
+    def create_bank_account(i):
+        return "/admin/bank-accounts", {"headers": admin, "json": {
+            "bank_name": "Bench Bank", "account_name": "CDS Bench", "account_number": f"9{i:09d}",
+        }}
+
+    def update_bank_account(i):
+        return f"/admin/bank-accounts/{bank_ids[i % len(bank_ids)]}", {
+            "headers": admin, "json": {"account_name": f"CDS Bench {i}"},
+        }
+
+    def create_upload(i):
+        return "/uploads", {"json": {"filename": f"bench-{i}.png", "size": len(TINY_PNG), "kind": "proof"}}
+
+    def put_chunk(i):
+        return f"/uploads/{upload_id}/chunks/{i % UPLOAD_CHUNKS}", {"data": chunk}
+
+    def delete_images(i):
+        return "/admin/delete-images", {"headers": admin, "json": {"ids": batch(image_ids, i)}}
+
+    routes = [
+        ("home", "GET", get("/")),
+        ("static_asset", "GET", get("/style.css", headers={"Accept-Encoding": "gzip"})),
+        ("bank_accounts", "GET", get("/bank-accounts")),
+        ("admin_bank_accounts", "GET", get("/admin/bank-accounts", headers=admin)),
+        ("stats", "GET", get("/stats")),
+        ("paid_users", "GET", get("/paid-users")),
+        ("pending_donations", "GET", get("/pending-donations", headers=admin)),
+        ("donation_status", "GET", get(lambda i: f"/donation-status/{refs[i * 7919 % len(refs)]}")),
+        ("change_feed", "GET", get("/admin/changes?limit=500", headers=admin)),
+        ("gallery", "GET", get("/gallery")),
+        ("albums", "GET", get("/albums")),
+        ("album_images", "GET", get(lambda i: f"/albums/{titles[i % len(titles)]}/images")),
+        ("media", "GET", get(lambda i: f"/media/{media_keys[i % len(media_keys)]}")),
+        ("gallery_image", "GET", get(f"/gallery-image/{seeded['legacy_image']}")),
+        ("protected_proof", "GET", get(f"/protected-proof/{seeded['proof_key']}", headers=admin)),
+        ("metrics", "GET", get("/metrics")),
+        ("download_csv", "GET", get("/download-csv", headers=admin)),
+        ("upload_status", "GET", get(f"/uploads/{upload_id}")),
+        ("admin_login", "POST", lambda i: ("/admin/login", {"json": {"password": app_module.ADMIN_PASSWORD}})),
+        ("donate", "POST", donate),
+        ("upload_image", "POST", upload),
+        ("create_upload", "POST", create_upload),
+        ("upload_chunk", "PUT", put_chunk),
+        ("create_bank_account", "POST", create_bank_account),
+    ]
+    if bank_ids:
+        routes.append(("update_bank_account", "PUT", update_bank_account))
+    if pending:
+        routes.append(("validate_donation", "POST", validate))
+        routes.append(("validate_donations", "POST", validate_bulk))
+    if image_ids:
+        routes.append(("delete_images", "POST", delete_images))
+    if not refs:
+        routes = [r for r in routes if r[0] != "donation_status"]
+    if not titles:
+        routes = [r for r in routes if r[0] != "album_images"]
+    if not media_keys:
+        routes = [r for r in routes if r[0] != "media"]
+    return routes
+
+
+def uncovered(app, routes):
+    """(endpoint, method) pairs of *app* with neither a scenario nor an EXCLUDED_ROUTES entry."""
+    adapter = app.url_map.bind("localhost")
+    covered = set()
+    for _, method, make in routes:
+        url, _ = make(0)
+        endpoint, _ = adapter.match(url.split("?", 1)[0], method)
+        covered.add((endpoint, method))
+    return sorted(
+        (rule.endpoint, method)
+        for rule in app.url_map.iter_rules()
+        for method in rule.methods - {"HEAD", "OPTIONS"}
+        if (rule.endpoint, method) not in covered and (rule.endpoint, method) not in EXCLUDED_ROUTES
+    )
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024  # bytes vs KiB
+
+
+def run_route(app, method, make, requests=200, concurrency=8):
+    """Call one route *requests* times from *concurrency* threads; returns its summary."""
+    local = threading.local()
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def call(i):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        url, kwargs = make(i)
+        started = time.perf_counter()
+        try:
+            resp = client.open(url, method=method, **kwargs)
+            resp.get_data()  # drain streamed bodies
+            failed = resp.status_code >= 400
+            resp.close()
+        except Exception:
+            failed = True
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    ms = [s * 1000 for s in latencies]
+    return {
+        "requests": requests,
+        "errors": errors[0],
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "mean_ms": round(sum(ms) / len(ms), 3),
+        "throughput_rps": round(requests / wall, 2),
+    }
+
+
+def run(app_module, routes, requests=200, concurrency=8, only=None, log=print):
+    results = {}
+    for name, method, make in routes:
+        if only and name not in only:
+            continue
+        # the CSV export reads every donation, so it gets a fraction of the calls
+        count = max(3, requests // 20) if name == "download_csv" else requests
+        results[name] = summary = run_route(app_module.app, method, make, count, concurrency)
+        log(f"{name:22} p50 {summary['p50_ms']:9.2f} ms  p95 {summary['p95_ms']:9.2f} ms  "
+            f"p99 {summary['p99_ms']:9.2f} ms  {summary['throughput_rps']:9.1f} req/s  "
+            f"errors {summary['errors']}")
+    return results
+
+
+def compare(results, baseline, threshold=0.2):
+    """Regressions as strings: p95 or throughput per route, and peak RSS, beyond *threshold*."""
+    regressions = []
+    for name, new in results["routes"].items():
+        old = baseline.get("routes", {}).get(name)
+        if not old:
+            continue
+        if new["p95_ms"] > old["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {old['p95_ms']:.2f} -> {new['p95_ms']:.2f} ms")
+        if new["throughput_rps"] < old["throughput_rps"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {old['throughput_rps']:.1f} -> {new['throughput_rps']:.1f} req/s")
+    old_rss = baseline.get("peak_rss_mb")
+    if old_rss and results["peak_rss_mb"] > old_rss * (1 + threshold):
+        regressions.append(f"peak RSS {old_rss:.1f} -> {results['peak_rss_mb']:.1f} MB")
+    return regressions
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Seed a database and benchmark every route.")
+    parser.add_argument("--database-url", help="scratch database (default: temporary SQLite file)")
+    parser.add_argument("--donations", type=int, default=10000)
+    parser.add_argument("--images", type=int, default=2000)
+    parser.add_argument("--bank-accounts", type=int, default=30)
+    parser.add_argument("--albums", type=int, default=40)
+    parser.add_argument("--requests", type=int, default=200, help="calls per route")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--storage-latency", type=float, default=0.0, help="seconds per media storage call")
+    parser.add_argument("--routes", help="comma-separated scenario names (default: all)")
+    parser.add_argument("--seed-only", action="store_true", help="seed the database and exit")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed regression (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    work_dir = tempfile.mkdtemp(prefix="cds_bench_")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+    os.environ.setdefault("GALLERY_FOLDER", os.path.join(work_dir, "gallery_images"))
+    os.environ["MEDIA_STORAGE"] = os.environ["PROOF_STORAGE"] = "memory"
+    os.environ["MEDIA_STORAGE_LATENCY"] = str(args.storage_latency)
+    os.environ.setdefault("ACCESS_LOG_SAMPLE_RATE", "0")
+    os.environ.setdefault("ACCESS_LOG_SLOW_MS", "1e9")
+    os.environ.setdefault("STATIC_PRECOMPRESS", "False")
+
+    from cds_backend import app as app_module
+    from cds_backend import migrations
+    with app_module.app.app_context():
+        migrations.upgrade(app_module.db.engine)
+
+    started = time.perf_counter()
+    seeded = seed(app_module, args.donations, args.images, args.bank_accounts, args.albums)
+    print(f"✓ Seeded {args.donations} donations, {args.images} images, {args.bank_accounts} bank accounts "
+          f"in {time.perf_counter() - started:.1f}s")
+    if args.seed_only:
+        return True
+
+    only = set(args.routes.split(",")) if args.routes else None
+    scenario_list = scenarios(app_module, seeded)
+    for endpoint, method in uncovered(app_module.app, scenario_list):
+        print(f"⚠ No scenario for {method} {endpoint}")
+    routes = run(app_module, scenario_list, args.requests, args.concurrency, only)
+    with app_module.app.app_context():
+        database = app_module.db.engine.dialect.name
+    results = {
+        "meta": {
+            "donations": args.donations, "images": args.images, "bank_accounts": args.bank_accounts,
+            "requests": args.requests, "concurrency": args.concurrency,
+            "storage_latency": args.storage_latency,
+            "database": database, "python": sys.version.split()[0],
+            "created_at": datetime.utcnow().isoformat() + "Z",
+        },
+        "routes": routes,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    print(f"Peak RSS: {results['peak_rss_mb']} MB")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"❌ {line}")
+        if regressions:
+            return False
+        print(f"✓ No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
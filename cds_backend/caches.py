@@ -0,0 +1,88 @@
+"""
+Small in-process caches shared by the request handlers.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU mapping whose entries expire after ``ttl`` seconds.
+
+    Each process (gunicorn worker) has its own copy, so anything stored here
+    must be safe to lose or to be briefly stale.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            value, expires_at = item
+            if expires_at <= now:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+        return default if item is _MISSING else item[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class VersionedCache:
+    """Holds one value built by ``loader()`` and tagged with a version.
+
+    Callers pass the current version (e.g. a collection_versions row, which
+    every gunicorn worker can read); the value is rebuilt only when it
+    differs from the version it was built for. Read the version before the
+    data it describes, so a concurrent write can only make the cache rebuild
+    once more, never serve old data under a new version.
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self._entry = None
+        self._lock = threading.Lock()
+
+    def get(self, version):
+        entry = self._entry
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        with self._lock:
+            entry = self._entry
+            if entry is None or entry[0] != version:
+                entry = (version, self.loader())
+                self._entry = entry
+        return entry[1]
+
+    def invalidate(self):
+        with self._lock:
+            self._entry = None
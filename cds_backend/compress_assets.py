@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Write the .gz/.br siblings of the static frontend ahead of time.
+
+    python cds_backend/compress_assets.py
+
+The app does the same at startup (STATIC_PRECOMPRESS); running it in the
+build step keeps that work off the first boot and works on read-only hosts.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from cds_backend import static_assets
+from cds_backend.app import FRONTEND_DIR, STATIC_DIRS, UPLOAD_FOLDER, basedir
+
+
+def compress_all():
+    try:
+        manifest = static_assets.build_manifest(
+            FRONTEND_DIR, STATIC_DIRS, exclude=(basedir, UPLOAD_FOLDER), log=print
+        )
+    except OSError as e:
+        print(f"❌ Could not compress static assets: {e}")
+        return False
+    compressed = sum(1 for asset in manifest.values() if asset.encodings)
+    encodings = sorted(static_assets.COMPRESSORS)
+    print(f"✓ {compressed} of {len(manifest)} assets have {'/'.join(encodings)} variants")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if compress_all() else 1)
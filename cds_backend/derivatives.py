@@ -0,0 +1,71 @@
+"""
+Resized WebP/JPEG variants of gallery images and image proofs.
+
+Backends that can resize on delivery (Cloudinary transformation URLs, see
+MediaStorage.variant_url) need nothing stored. For the others the variants
+are rendered once at ingest with Pillow and stored next to the original.
+Pillow is optional: without it only originals are served.
+"""
+
+import io
+
+try:
+    from PIL import Image as PILImage
+except ImportError:
+    PILImage = None
+
+# name -> maximum width in pixels; images are never upscaled
+VARIANT_WIDTHS = {"thumb": 320, "medium": 960, "full": 1920}
+VARIANT_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+QUALITY = 80
+
+
+def available():
+    return PILImage is not None
+
+
+def derived_key(key, variant, fmt):
+    """Storage key of a stored variant of gallery image *key*."""
+    return f"{key.rsplit('.', 1)[0]}@{variant}.{fmt}"
+
+
+def all_variants():
+    return [(variant, fmt) for variant in VARIANT_WIDTHS for fmt in VARIANT_FORMATS]
+
+
+def render(img, width, fmt):
+    """Encode a copy of *img* at most *width* pixels wide; returns a BytesIO."""
+    copy = img.copy()
+    if copy.width > width:
+        copy = copy.resize((width, max(1, round(copy.height * width / copy.width))), PILImage.LANCZOS)
+    if copy.mode not in ("RGB", "RGBA") or fmt == "jpeg":
+        copy = copy.convert("RGB")
+    out = io.BytesIO()
+    copy.save(out, VARIANT_FORMATS[fmt], quality=QUALITY)
+    out.seek(0)
+    return out
+
+
+def generate(storage, source, keys):
+    """Render every variant of *source* (path or file object) into *storage*.
+
+    *keys* maps (variant, fmt) to the storage key to write. Returns False
+    when Pillow is unavailable.
+    """
+    if PILImage is None:
+        return False
+    with PILImage.open(source) as img:
+        img.load()
+        for (variant, fmt), key in keys.items():
+            storage.put(key, render(img, VARIANT_WIDTHS[variant], fmt), f"image/{fmt}")
+    return True
+
+
+def srcset(urls):
+    """{(variant, fmt): url} -> {"variants": {...}, "srcset": {fmt: "url 320w, ..."}}."""
+    variants = {}
+    sets = {}
+    for (variant, fmt), url in urls.items():
+        variants.setdefault(variant, {})[fmt] = url
+        sets.setdefault(fmt, []).append(f"{url} {VARIANT_WIDTHS[variant]}w")
+    return {"variants": variants, "srcset": {fmt: ", ".join(parts) for fmt, parts in sets.items()}}
@@ -0,0 +1,90 @@
+"""
+Sending stored files: validators, 304s, byte ranges and proxy offload.
+
+serve_path() stats the file once and either lets werkzeug stream it
+(conditional + Range support, wsgi.file_wrapper/sendfile under gunicorn) or,
+with FILE_OFFLOAD set, returns an empty response that tells the front proxy
+to send the bytes itself, so a sync worker is only held for the auth check.
+
+FILE_OFFLOAD:
+- ``x-accel``: nginx X-Accel-Redirect. FILE_OFFLOAD_LOCATIONS maps local
+  directories to ``internal`` nginx locations, e.g.
+  ``{"/srv/gallery_images": "/_files/"}``.
+- ``x-sendfile``: Apache/lighttpd X-Sendfile with the absolute path.
+"""
+
+import json
+import mimetypes
+import os
+import stat
+from urllib.parse import quote
+
+from flask import abort, current_app, request, send_file
+
+FILE_OFFLOAD = os.environ.get("FILE_OFFLOAD", "").lower()
+FILE_OFFLOAD_LOCATIONS = {
+    os.path.abspath(root): prefix
+    for root, prefix in json.loads(os.environ.get("FILE_OFFLOAD_LOCATIONS", "{}")).items()
+}
+
+
+def file_etag(st):
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+
+def accel_location(path):
+    for root, prefix in FILE_OFFLOAD_LOCATIONS.items():
+        if path.startswith(root + os.sep):
+            return prefix.rstrip("/") + "/" + quote(os.path.relpath(path, root).replace(os.sep, "/"))
+    return None
+
+
+def _finish(resp, cache_control):
+    resp.headers["Cache-Control"] = cache_control
+    resp.headers["Accept-Ranges"] = "bytes"
+    return resp
+
+
+def serve_path(path, mimetype=None, etag=None, cache_control="private, no-cache", download_name=None):
+    """Send the regular file at *path* or abort(404).
+
+    *etag* defaults to one derived from mtime and size; content-addressed
+    files should pass their digest so every host agrees on it.
+    """
+    path = os.path.abspath(path)
+    try:
+        st = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        abort(404)
+    if not stat.S_ISREG(st.st_mode):
+        abort(404)
+    etag = etag or file_etag(st)
+    mimetype = mimetype or mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    offload_header = None
+    if FILE_OFFLOAD == "x-accel":
+        location = accel_location(path)
+        if location:
+            offload_header = ("X-Accel-Redirect", location)
+    elif FILE_OFFLOAD == "x-sendfile":
+        offload_header = ("X-Sendfile", path)
+
+    if offload_header is None:
+        resp = send_file(path, mimetype=mimetype, conditional=True, etag=etag,
+                         last_modified=st.st_mtime, download_name=download_name)
+        return _finish(resp, cache_control)
+
+    # The proxy sends the body (and handles Range); validators are answered here
+    resp = current_app.response_class(mimetype=mimetype)
+    resp.set_etag(etag)
+    resp.last_modified = st.st_mtime
+    resp = resp.make_conditional(request)
+    if resp.status_code == 200:  # a 304/412 must stay empty
+        resp.headers[offload_header[0]] = offload_header[1]
+    return _finish(resp, cache_control)
+
+
+def serve_stream(fileobj, mimetype, etag, cache_control="private, no-cache"):
+    """Send a file object from a non-local storage backend with the same validators."""
+    resp = send_file(fileobj, mimetype=mimetype, conditional=True, etag=etag)
+    return _finish(resp, cache_control)
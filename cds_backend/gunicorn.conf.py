@@ -0,0 +1,73 @@
+"""
+gunicorn settings for production.
+
+    gunicorn -c cds_backend/gunicorn.conf.py cds_backend.app:app
+
+Workers default to threaded (gthread) so a slow upload or Cloudinary call
+holds one thread, not a whole worker. The app is preloaded once in the
+master and forked, so post_fork gives every worker its own DB pool.
+Everything can be overridden from the environment:
+
+- WEB_CONCURRENCY: worker processes (default: CPUs + 1 for gthread,
+  2 x CPUs + 1 for sync)
+- GUNICORN_WORKER_CLASS: gthread (default) or sync
+- GUNICORN_THREADS: threads per gthread worker (default 4)
+- GUNICORN_TIMEOUT: seconds a worker may stay silent before it is
+  restarted (default 120, sized for large proof/gallery uploads)
+- GUNICORN_MAX_REQUESTS / GUNICORN_MAX_REQUESTS_JITTER: recycle workers
+  after about this many requests (default 1000 / 100)
+- GUNICORN_PRELOAD: "False" to import the app in each worker instead
+- PROMETHEUS_MULTIPROC_DIR: where workers share /metrics values
+"""
+
+import glob
+import multiprocessing
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+cpus = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", 4)) if worker_class == "gthread" else 1
+workers = int(os.environ.get("WEB_CONCURRENCY", cpus + 1 if worker_class == "gthread" else 2 * cpus + 1))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "True") == "True"
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+# recycle workers now and then; the jitter keeps them from restarting together
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+# heartbeat files on tmpfs, so a busy disk cannot get workers killed
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+forwarded_allow_ips = os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1")
+accesslog = None  # the app writes its own JSON access log (access_log.py)
+errorlog = "-"
+
+# Several workers need a shared directory for /metrics; prometheus_client
+# reads the variable when it is imported, i.e. when the app is loaded, so
+# it is set and emptied here, before that.
+if workers > 1:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "cds_prometheus"))
+metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+if metrics_dir:
+    os.makedirs(metrics_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(metrics_dir, "*.db")):  # values from a previous run
+        os.remove(stale)
+
+
+def post_fork(server, worker):
+    from cds_backend.app import after_fork
+    after_fork()
+
+
+def child_exit(server, worker):
+    from cds_backend import metrics
+    metrics.mark_process_dead(worker.pid)
@@ -0,0 +1,296 @@
+"""
+Media storage backends for gallery images and proofs of payment.
+
+Every backend stores opaque bytes under a string key and offers the same
+operations: put, open (get), exists, delete, delete_many, url, variant_url
+and local_path. create_storage() picks one from configuration:
+
+- ``cloudinary``: Cloudinary's upload and admin APIs.
+- ``local``: files under a root directory, served by the app at /media.
+- ``memory``: a per-process dict with optional latency, for tests and
+  benchmarks that must run offline.
+"""
+
+import io
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+import urllib.error
+import urllib.request
+
+import cloudinary.api
+import cloudinary.uploader
+import cloudinary.utils
+
+CHUNK_SIZE = 64 * 1024
+CLOUDINARY_BATCH_SIZE = 100  # Admin API limit for delete_resources
+
+
+class MediaStorage:
+    """Interface. Keys are '/'-separated names chosen by the caller."""
+
+    resizes_on_delivery = False  # True when variant_url() works without stored variants
+    observer = None  # callable(backend, operation, seconds) for remote API calls, see metrics.py
+
+    @contextmanager
+    def _timed(self, backend, operation):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.observer is not None:
+                self.observer(backend, operation, time.perf_counter() - started)
+
+    def put(self, key, stream, content_type=None):
+        """Store *stream* under *key*; returns *key*."""
+        raise NotImplementedError
+
+    def put_file(self, key, path, content_type=None):
+        """Store the file at *path* and remove it; returns *key*."""
+        with open(path, "rb") as f:
+            stored = self.put(key, f, content_type)
+        os.remove(path)
+        return stored
+
+    def open(self, key):
+        """Binary file object for *key*; raises FileNotFoundError if missing."""
+        raise NotImplementedError
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Remove *key*; returns False if it did not exist."""
+        raise NotImplementedError
+
+    def delete_many(self, keys):
+        """Remove several keys; returns the ones that existed."""
+        return [key for key in keys if self.delete(key)]
+
+    def url(self, key):
+        raise NotImplementedError
+
+    def variant_url(self, key, width, fmt):
+        """URL of *key* resized on delivery, or None if variants must be stored."""
+        return None
+
+    def local_path(self, key):
+        """Path of the stored file when the backend is the local disk, else None."""
+        return None
+
+
+class LocalStorage(MediaStorage):
+    def __init__(self, root, base_url="/media"):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def _path(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid media key: {key!r}")
+        return path
+
+    def put(self, key, stream, content_type=None):
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                shutil.copyfileobj(stream, out, CHUNK_SIZE)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return self.put_file(key, tmp_path, content_type)
+
+    def put_file(self, key, path, content_type=None):
+        final = self._path(key)
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        try:
+            os.replace(path, final)
+        except OSError:  # different filesystem
+            shutil.move(path, final)
+        return key
+
+    def open(self, key):
+        return open(self._path(key), "rb")
+
+    def exists(self, key):
+        return os.path.exists(self._path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def url(self, key):
+        return f"{self.base_url}/{key}"
+
+    def local_path(self, key):
+        return self._path(key)
+
+
+class MemoryStorage(MediaStorage):
+    """Keeps bytes in a dict. ``latency`` seconds are slept per call to mimic a remote store."""
+
+    def __init__(self, latency=0.0, base_url="/media"):
+        self.latency = latency
+        self.base_url = base_url.rstrip("/")
+        self.objects = {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _call(self, op, key):
+        with self._lock:
+            self.calls.append((op, key))
+        if self.latency:
+            time.sleep(self.latency)
+
+    def put(self, key, stream, content_type=None):
+        self._call("put", key)
+        data = stream.read()
+        with self._lock:
+            self.objects[key] = data
+        return key
+
+    def open(self, key):
+        self._call("get", key)
+        with self._lock:
+            if key not in self.objects:
+                raise FileNotFoundError(key)
+            return io.BytesIO(self.objects[key])
+
+    def exists(self, key):
+        with self._lock:
+            return key in self.objects
+
+    def delete(self, key):
+        self._call("delete", key)
+        with self._lock:
+            return self.objects.pop(key, None) is not None
+
+    def delete_many(self, keys):
+        self._call("delete_many", tuple(keys))
+        with self._lock:
+            return [key for key in keys if self.objects.pop(key, None) is not None]
+
+    def url(self, key):
+        return f"{self.base_url}/{key}"
+
+
+class CloudinaryStorage(MediaStorage):
+    """Cloudinary upload API. The public_id is the key without its extension.
+
+    ``delivery_type`` "authenticated" keeps assets private behind signed URLs
+    (used for proofs); "upload" is the public default used by the gallery.
+    ``credentials`` (cloud_name, api_key, api_secret) are applied to the
+    global cloudinary config on first use rather than at import time.
+    """
+
+    resizes_on_delivery = True
+    _configured = False  # process-wide, like cloudinary's own config
+
+    def __init__(self, resource_type="image", delivery_type="upload", credentials=None):
+        self.resource_type = resource_type
+        self.delivery_type = delivery_type
+        self.credentials = credentials
+
+    def _configure(self):
+        if self.credentials and not CloudinaryStorage._configured:
+            cloudinary.config(**self.credentials, secure=True)
+            CloudinaryStorage._configured = True
+
+    @staticmethod
+    def _public_id(key):
+        head, _, name = key.rpartition("/")
+        name = name.rsplit(".", 1)[0]
+        return f"{head}/{name}" if head else name
+
+    def put(self, key, stream, content_type=None):
+        self._configure()
+        with self._timed("cloudinary", "upload"):
+            cloudinary.uploader.upload(
+                stream, public_id=self._public_id(key), resource_type=self.resource_type,
+                type=self.delivery_type, overwrite=False,
+            )
+        return key
+
+    def open(self, key):
+        try:
+            with self._timed("cloudinary", "download"), urllib.request.urlopen(self.url(key)) as resp:
+                return io.BytesIO(resp.read())
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                raise FileNotFoundError(key)
+            raise
+
+    def exists(self, key):
+        self._configure()
+        try:
+            with self._timed("cloudinary", "resource"):
+                cloudinary.api.resource(
+                    self._public_id(key), resource_type=self.resource_type, type=self.delivery_type
+                )
+            return True
+        except cloudinary.api.NotFound:
+            return False
+
+    def delete(self, key):
+        self._configure()
+        with self._timed("cloudinary", "destroy"):
+            result = cloudinary.uploader.destroy(
+                self._public_id(key), resource_type=self.resource_type, type=self.delivery_type
+            )
+        return result.get("result") == "ok"
+
+    def delete_many(self, keys):
+        self._configure()
+        deleted = []
+        by_public_id = {self._public_id(key): key for key in keys}
+        public_ids = list(by_public_id)
+        for i in range(0, len(public_ids), CLOUDINARY_BATCH_SIZE):
+            with self._timed("cloudinary", "delete_resources"):
+                result = cloudinary.api.delete_resources(
+                    public_ids[i:i + CLOUDINARY_BATCH_SIZE], resource_type=self.resource_type,
+                    type=self.delivery_type,
+                )
+            deleted += [by_public_id[p] for p, status in result.get("deleted", {}).items()
+                        if status == "deleted" and p in by_public_id]
+        return deleted
+
+    def url(self, key):
+        self._configure()
+        url, _ = cloudinary.utils.cloudinary_url(
+            self._public_id(key), resource_type=self.resource_type, type=self.delivery_type,
+            secure=True, sign_url=self.delivery_type != "upload",
+        )
+        return url
+
+    def variant_url(self, key, width, fmt):
+        self._configure()
+        url, _ = cloudinary.utils.cloudinary_url(
+            self._public_id(key), resource_type=self.resource_type, type=self.delivery_type,
+            secure=True, sign_url=self.delivery_type != "upload",
+            width=width, crop="limit", format=fmt, quality="auto",
+        )
+        return url
+
+
+def create_storage(backend, root=None, base_url="/media", latency=0.0, **cloudinary_options):
+    """Build a backend by name ('cloudinary', 'local' or 'memory')."""
+    if backend == "cloudinary":
+        return CloudinaryStorage(**cloudinary_options)
+    if backend == "local":
+        return LocalStorage(root, base_url=base_url)
+    if backend == "memory":
+        return MemoryStorage(latency=float(latency), base_url=base_url)
+    raise ValueError(f"Unknown media storage backend: {backend!r}")
+
+
+def guess_type(key):
+    return mimetypes.guess_type(key)[0] or "application/octet-stream"
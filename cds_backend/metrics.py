@@ -0,0 +1,129 @@
+"""
+Prometheus metrics for the API, served at /metrics.
+
+Per route: latency histogram, request and error counters, in-flight gauge,
+DB query count and time (from the counters access_log keeps on ``g``),
+and the admin credential check per endpoint.
+Also SQLAlchemy pool checkouts/overflow and media storage (Cloudinary)
+call latency.
+
+Under gunicorn every worker has its own counters. Set
+PROMETHEUS_MULTIPROC_DIR to an empty directory before the app is imported
+and the values live in memory-mapped files there, which render() merges
+across workers; gunicorn.conf.py marks dead workers so their live gauges
+drop out.
+"""
+
+import os
+import time
+
+from flask import g
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+
+# scripts (migrate.py, worker.py) import the app too; give them the directory
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+UNMATCHED = "<unmatched>"  # 404s without a rule share one label
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency by route", ["method", "route"], buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter("http_requests_total", "Requests by route and status", ["method", "route", "status"])
+ERRORS = Counter("http_request_errors_total", "Requests answered with a 5xx", ["method", "route"])
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests being handled", ["route"], multiprocess_mode="livesum")
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed, by route", ["route"])
+DB_SECONDS = Counter("db_query_seconds_total", "Time spent in SQL statements, by route", ["route"])
+POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections checked out of the pool")
+POOL_CONNECTS = Counter("db_pool_connections_opened_total", "New DB connections opened by the pool")
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out", multiprocess_mode="livesum")
+POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections open beyond pool_size", multiprocess_mode="livesum")
+AUTH_SECONDS = Histogram(
+    "admin_auth_seconds", "Admin credential check latency", ["endpoint"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+STORAGE_SECONDS = Histogram(
+    "media_storage_call_duration_seconds", "Media storage API call latency", ["backend", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+def route_label(request):
+    return request.url_rule.rule if request.url_rule else UNMATCHED
+
+
+def start_request(request):
+    g.metrics_route = route_label(request)
+    IN_FLIGHT.labels(g.metrics_route).inc()
+
+
+def observe_request(request, resp):
+    """Record the finished request (after_request; uses access_log's timer)."""
+    route = g.get("metrics_route") or route_label(request)
+    if "request_started" in g:
+        REQUEST_SECONDS.labels(request.method, route).observe(time.perf_counter() - g.request_started)
+    REQUESTS.labels(request.method, route, str(resp.status_code)).inc()
+    if resp.status_code >= 500:
+        ERRORS.labels(request.method, route).inc()
+    if g.get("db_queries"):
+        DB_QUERIES.labels(route).inc(g.db_queries)
+        DB_SECONDS.labels(route).inc(g.db_seconds)
+
+
+def end_request():
+    """teardown_request: runs even when after_request did not."""
+    route = g.pop("metrics_route", None)
+    if route is not None:
+        IN_FLIGHT.labels(route).dec()
+
+
+def observe_auth(endpoint, seconds):
+    AUTH_SECONDS.labels(endpoint or UNMATCHED).observe(seconds)
+
+
+def observe_storage_call(backend, operation, seconds):
+    STORAGE_SECONDS.labels(backend, operation).observe(seconds)
+
+
+def track_pool(engine):
+    """Follow checkouts and overflow of *engine*'s connection pool.
+
+    The listeners move with the pool when engine.dispose() replaces it.
+    """
+    pool = engine.pool
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        POOL_CONNECTS.inc()
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        POOL_CHECKOUTS.inc()
+        POOL_CHECKED_OUT.inc()
+        if hasattr(engine.pool, "overflow"):
+            POOL_OVERFLOW.set(max(engine.pool.overflow(), 0))
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        POOL_CHECKED_OUT.dec()
+
+
+def render():
+    """(body, content type) for /metrics, merged across workers when multiprocess."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """gunicorn child_exit hook: drop the live gauges of a finished worker."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Apply pending schema migrations from cds_backend/migrations/.
+
+Run once per deploy, before the web and worker processes start:
+
+    python cds_backend/migrate.py            # upgrade to the latest version
+    python cds_backend/migrate.py --to 3     # upgrade up to version 3
+    python cds_backend/migrate.py --status   # show current and pending versions
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from cds_backend.app import app, db
+from cds_backend import migrations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--to', type=int, default=None, help='stop after this version')
+    parser.add_argument('--status', action='store_true', help='only report the schema version')
+    args = parser.parse_args(argv)
+
+    with app.app_context():
+        try:
+            if args.status:
+                print(f"Current schema version: {migrations.current_version(db.engine)}")
+                for version, name in migrations.pending(db.engine):
+                    print(f"  pending: {version:04d}_{name}")
+                return True
+
+            applied = migrations.upgrade(db.engine, target=args.to, log=lambda m: print(f"✓ {m}"))
+            print(f"✓ Schema at version {migrations.current_version(db.engine)}"
+                  f" ({len(applied)} migration(s) applied)")
+        except Exception as e:
+            print(f"❌ Migration failed: {e}")
+            return False
+
+    return True
+
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Migration script to move legacy proof files into the content-addressed store.
+
+Older donations saved proofs as UPLOAD_FOLDER/<unix-seconds>_<filename>.
+This moves every such file referenced by a donation into PROOF_STORE_FOLDER
+(ab/cd/<sha256>.<ext>), repoints Donation.proof_filename at the new key and
+rebuilds the proof_blobs reference counts. Leftover *_proof.* files that no
+donation references are moved in with a zero reference count.
+
+Usage: python cds_backend/migrate_proofs.py [--dry-run]
+"""
+
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from cds_backend.app import (
+    app, db, Donation, ProofBlob, UPLOAD_FOLDER, proof_store, file_extension,
+)
+
+
+def _store_legacy_file(path, refs, dry_run):
+    key, size = None, os.path.getsize(path)
+    if not dry_run:
+        key, size, _ = proof_store.save_file(path, file_extension(path))
+        blob = db.session.get(ProofBlob, key)
+        if blob is None:
+            blob = ProofBlob(key=key, size=size, ref_count=0)
+            db.session.add(blob)
+        blob.ref_count += refs
+    return key
+
+
+def migrate(dry_run=False):
+    """Move legacy proofs into the store and update donations"""
+    with app.app_context():
+        try:
+            legacy = {}
+            for d in Donation.query.filter(Donation.proof_filename.isnot(None)):
+                if not proof_store.is_key(d.proof_filename):
+                    legacy.setdefault(d.proof_filename, []).append(d)
+
+            moved, missing = [], []
+            for name, donations in legacy.items():
+                path = os.path.join(UPLOAD_FOLDER, name)
+                if not os.path.exists(path):
+                    missing.append(name)
+                    continue
+                key = _store_legacy_file(path, len(donations), dry_run)
+                if not dry_run:
+                    for d in donations:
+                        d.proof_filename = key
+                moved.append(path)
+
+            referenced = {os.path.join(UPLOAD_FOLDER, name) for name in legacy}
+            orphans = [
+                p for p in glob.glob(os.path.join(UPLOAD_FOLDER, '*_proof.*'))
+                if p not in referenced
+            ]
+            for path in orphans:
+                _store_legacy_file(path, 0, dry_run)
+
+            if dry_run:
+                db.session.rollback()
+            else:
+                db.session.commit()
+                for path in moved + orphans:
+                    os.remove(path)
+
+            print(f"✓ {len(moved)} referenced proof file(s) {'would be ' if dry_run else ''}moved")
+            print(f"✓ {len(orphans)} unreferenced proof file(s) {'would be ' if dry_run else ''}moved")
+            for name in missing:
+                print(f"⚠ Missing file for proof '{name}' - left unchanged")
+        except Exception as e:
+            print(f"❌ Migration failed: {e}")
+            db.session.rollback()
+            return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = migrate(dry_run='--dry-run' in sys.argv[1:])
+    exit(0 if success else 1)
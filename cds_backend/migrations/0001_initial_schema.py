@@ -0,0 +1,49 @@
+"""Donations, images and bank accounts as originally created by db.create_all()."""
+
+import sqlalchemy as sa
+
+metadata = sa.MetaData()
+
+sa.Table(
+    "bank_accounts", metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("bank_name", sa.String(128), nullable=False),
+    sa.Column("account_name", sa.String(128), nullable=False),
+    sa.Column("account_number", sa.String(64), nullable=False),
+    sa.Column("bank_type", sa.String(64)),
+    sa.Column("active", sa.Boolean),
+    sa.Column("created_at", sa.DateTime),
+)
+
+sa.Table(
+    "donations", metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("fullname", sa.String(150), nullable=False),
+    sa.Column("email", sa.String(150)),
+    sa.Column("phone", sa.String(20), nullable=False),
+    sa.Column("amount", sa.Integer, nullable=False),
+    sa.Column("reference", sa.String(50), unique=True, nullable=False),
+    sa.Column("status", sa.String(20)),
+    sa.Column("proof_filename", sa.String(255)),
+    sa.Column("approved_by", sa.String(100)),
+    sa.Column("approved_at", sa.DateTime),
+    sa.Column("bank_account_id", sa.Integer, sa.ForeignKey("bank_accounts.id")),
+    sa.Column("idempotency_key", sa.String(100), unique=True),
+    sa.Column("created_at", sa.DateTime),
+)
+
+sa.Table(
+    "images", metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("filename", sa.String(255), nullable=False),
+    sa.Column("url", sa.String(500)),
+    sa.Column("public_id", sa.String(255)),
+    sa.Column("title", sa.String(255)),
+    sa.Column("taken_at", sa.DateTime),
+    sa.Column("uploaded_at", sa.DateTime),
+)
+
+
+def upgrade(conn):
+    # Existing deployments already have these tables; only create what is missing
+    metadata.create_all(conn, checkfirst=True)
@@ -0,0 +1,10 @@
+"""Cloudinary url/public_id on images (previously an import-time ALTER in app.py)."""
+
+import sqlalchemy as sa
+
+from cds_backend.migrations import add_column
+
+
+def upgrade(conn):
+    add_column(conn, "images", sa.Column("url", sa.String(500)))
+    add_column(conn, "images", sa.Column("public_id", sa.String(255)))
@@ -0,0 +1,44 @@
+"""Content-addressed proof index, background job queue and per-donation processing status."""
+
+import sqlalchemy as sa
+
+from cds_backend.migrations import add_column
+
+metadata = sa.MetaData()
+
+sa.Table(
+    "proof_blobs", metadata,
+    sa.Column("key", sa.String(80), primary_key=True),
+    sa.Column("size", sa.Integer, nullable=False),
+    sa.Column("ref_count", sa.Integer, nullable=False),
+    sa.Column("mime_type", sa.String(100)),
+    sa.Column("page_count", sa.Integer),
+    sa.Column("has_thumbnail", sa.Boolean),
+    sa.Column("processed_at", sa.DateTime),
+    sa.Column("created_at", sa.DateTime),
+)
+
+sa.Table(
+    "jobs", metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("kind", sa.String(50), nullable=False),
+    sa.Column("payload", sa.Text, nullable=False),
+    sa.Column("status", sa.String(20), nullable=False),
+    sa.Column("attempts", sa.Integer, nullable=False),
+    sa.Column("run_after", sa.DateTime, nullable=False),
+    sa.Column("locked_at", sa.DateTime),
+    sa.Column("last_error", sa.Text),
+    sa.Column("created_at", sa.DateTime),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
+    # proof_blobs may predate the processing columns
+    add_column(conn, "proof_blobs", sa.Column("mime_type", sa.String(100)))
+    add_column(conn, "proof_blobs", sa.Column("page_count", sa.Integer))
+    add_column(conn, "proof_blobs", sa.Column("has_thumbnail", sa.Boolean))
+    add_column(conn, "proof_blobs", sa.Column("processed_at", sa.DateTime))
+    # NULL for donations recorded before background processing existed
+    add_column(conn, "donations", sa.Column("processing_status", sa.String(20)))
+    add_column(conn, "donations", sa.Column("processing_error", sa.String(255)))
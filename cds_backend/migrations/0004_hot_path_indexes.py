@@ -0,0 +1,17 @@
+"""Indexes for the list endpoints, the job queue claim and bank account lookups."""
+
+from cds_backend.migrations import create_index
+
+
+def upgrade(conn):
+    # /pending-donations, /paid-users: WHERE status = ? ORDER BY created_at DESC, id DESC
+    create_index(conn, "ix_donations_status_created_at", "donations", "status", "created_at", "id")
+    # status=all listings, date-range filters and exports
+    create_index(conn, "ix_donations_created_at", "donations", "created_at", "id")
+    create_index(conn, "ix_donations_bank_account_id", "donations", "bank_account_id", "created_at")
+    # /gallery: ORDER BY taken_at DESC, title
+    create_index(conn, "ix_images_taken_at_title", "images", "taken_at", "title")
+    # /bank-accounts: WHERE active ORDER BY created_at DESC
+    create_index(conn, "ix_bank_accounts_active_created_at", "bank_accounts", "active", "created_at")
+    # worker.claim_job(): WHERE status = 'queued' AND run_after <= now
+    create_index(conn, "ix_jobs_status_run_after", "jobs", "status", "run_after")
@@ -0,0 +1,15 @@
+"""Per-collection version counters used for list ETags."""
+
+import sqlalchemy as sa
+
+metadata = sa.MetaData()
+
+sa.Table(
+    "collection_versions", metadata,
+    sa.Column("name", sa.String(50), primary_key=True),
+    sa.Column("version", sa.Integer, nullable=False),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
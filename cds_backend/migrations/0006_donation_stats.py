@@ -0,0 +1,32 @@
+"""Pre-aggregated totals of paid donations, backfilled from existing rows."""
+
+import sqlalchemy as sa
+
+metadata = sa.MetaData()
+
+sa.Table(
+    "donation_stats", metadata,
+    sa.Column("scope", sa.String(20), primary_key=True),
+    sa.Column("bucket", sa.String(32), primary_key=True),
+    sa.Column("total_amount", sa.BigInteger, nullable=False),
+    sa.Column("donation_count", sa.Integer, nullable=False),
+)
+
+BACKFILL = [
+    """INSERT INTO donation_stats (scope, bucket, total_amount, donation_count)
+       SELECT 'overall', '', SUM(amount), COUNT(*) FROM donations
+       WHERE status = 'paid' HAVING COUNT(*) > 0""",
+    """INSERT INTO donation_stats (scope, bucket, total_amount, donation_count)
+       SELECT 'account', COALESCE(CAST(bank_account_id AS VARCHAR(32)), 'none'), SUM(amount), COUNT(*)
+       FROM donations WHERE status = 'paid' GROUP BY bank_account_id""",
+    """INSERT INTO donation_stats (scope, bucket, total_amount, donation_count)
+       SELECT 'day', CAST(date(created_at) AS VARCHAR(32)), SUM(amount), COUNT(*)
+       FROM donations WHERE status = 'paid' AND created_at IS NOT NULL GROUP BY date(created_at)""",
+]
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
+    conn.execute(sa.text("DELETE FROM donation_stats"))
+    for statement in BACKFILL:
+        conn.execute(sa.text(statement))
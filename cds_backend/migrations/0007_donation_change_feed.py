@@ -0,0 +1,21 @@
+"""updated_at and change_seq on donations for the /admin/changes feed."""
+
+import sqlalchemy as sa
+
+from cds_backend.migrations import add_column, create_index
+
+
+def upgrade(conn):
+    add_column(conn, "donations", sa.Column("updated_at", sa.DateTime))
+    add_column(conn, "donations", sa.Column("change_seq", sa.BigInteger))
+    # existing rows: replay them in id order, then continue the counter after them
+    conn.execute(sa.text(
+        "UPDATE donations SET change_seq = id, updated_at = COALESCE(approved_at, created_at) "
+        "WHERE change_seq IS NULL"
+    ))
+    last = conn.execute(sa.text("SELECT MAX(change_seq) FROM donations")).scalar()
+    if last:
+        conn.execute(sa.text("DELETE FROM collection_versions WHERE name = 'donations'"))
+        conn.execute(sa.text("INSERT INTO collection_versions (name, version) VALUES ('donations', :v)"),
+                     {"v": last})
+    create_index(conn, "ix_donations_change_seq", "donations", "change_seq", "id")
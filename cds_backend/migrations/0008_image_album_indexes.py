@@ -0,0 +1,13 @@
+"""Indexes for the paginated gallery and per-album listings."""
+
+import sqlalchemy as sa
+
+from cds_backend.migrations import create_index
+
+
+def upgrade(conn):
+    # /gallery: ORDER BY taken_at DESC, id DESC (replaces the taken_at, title index)
+    create_index(conn, "ix_images_taken_at_id", "images", "taken_at", "id")
+    # /albums GROUP BY title, /albums/<title>/images: WHERE title = ? ORDER BY id
+    create_index(conn, "ix_images_title_id", "images", "title", "id")
+    conn.execute(sa.text("DROP INDEX IF EXISTS ix_images_taken_at_title"))
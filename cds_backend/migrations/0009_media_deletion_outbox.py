@@ -0,0 +1,24 @@
+"""Outbox of stored media files waiting to be deleted by the worker."""
+
+import sqlalchemy as sa
+
+from cds_backend.migrations import create_index
+
+metadata = sa.MetaData()
+
+sa.Table(
+    "media_deletions", metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("storage_key", sa.String(255), nullable=False),
+    sa.Column("status", sa.String(20), nullable=False),
+    sa.Column("attempts", sa.Integer, nullable=False),
+    sa.Column("run_after", sa.DateTime, nullable=False),
+    sa.Column("last_error", sa.Text),
+    sa.Column("created_at", sa.DateTime),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
+    # worker drain: WHERE status = 'queued' AND run_after <= now
+    create_index(conn, "ix_media_deletions_status_run_after", "media_deletions", "status", "run_after")
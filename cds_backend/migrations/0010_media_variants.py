@@ -0,0 +1,10 @@
+"""Flags for stored resized variants of gallery images and proofs."""
+
+import sqlalchemy as sa
+
+from cds_backend.migrations import add_column
+
+
+def upgrade(conn):
+    add_column(conn, "images", sa.Column("has_variants", sa.Boolean))
+    add_column(conn, "proof_blobs", sa.Column("has_variants", sa.Boolean))
@@ -0,0 +1,107 @@
+"""
+Versioned schema migrations.
+
+Each NNNN_description.py file in this directory defines ``upgrade(conn)``
+and is applied once, in version order, inside its own transaction. Applied
+versions are recorded in the ``schema_version`` table. Scripts describe
+tables explicitly instead of importing the models, so they keep meaning the
+same thing as the models evolve, and they must work on SQLite and Postgres.
+
+Run them with ``python cds_backend/migrate.py``.
+"""
+
+import importlib.util
+import os
+import re
+from datetime import datetime
+
+import sqlalchemy as sa
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+_FILENAME_RE = re.compile(r"^(\d{4})_(\w+)\.py$")
+
+# Arbitrary key for pg_advisory_xact_lock so concurrent deploys run migrations one at a time
+_PG_LOCK_KEY = 7120426
+
+schema_version = sa.Table(
+    "schema_version", sa.MetaData(),
+    sa.Column("version", sa.Integer, primary_key=True, autoincrement=False),
+    sa.Column("name", sa.String(255), nullable=False),
+    sa.Column("applied_at", sa.DateTime, nullable=False),
+)
+
+
+def discover():
+    """All migration scripts as (version, name, path), in order."""
+    found = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        m = _FILENAME_RE.match(filename)
+        if m:
+            found.append((int(m.group(1)), m.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    versions = [version for version, _, _ in found]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError("Duplicate migration version numbers")
+    return found
+
+
+def _load(path):
+    spec = importlib.util.spec_from_file_location(f"cds_migration_{os.path.basename(path)[:-3]}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def applied_versions(conn):
+    schema_version.create(conn, checkfirst=True)
+    return {row.version for row in conn.execute(sa.select(schema_version.c.version))}
+
+
+def current_version(engine):
+    with engine.begin() as conn:
+        return max(applied_versions(conn), default=0)
+
+
+def pending(engine):
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+    return [(version, name) for version, name, _ in discover() if version not in done]
+
+
+def upgrade(engine, target=None, log=None):
+    """Apply every pending migration up to *target*; returns the versions applied."""
+    applied = []
+    for version, name, path in discover():
+        if target is not None and version > target:
+            break
+        with engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                conn.execute(sa.text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PG_LOCK_KEY})
+            if version in applied_versions(conn):
+                continue
+            _load(path).upgrade(conn)
+            conn.execute(schema_version.insert().values(
+                version=version, name=name, applied_at=datetime.utcnow()
+            ))
+        applied.append(version)
+        if log:
+            log(f"Applied migration {version:04d}_{name}")
+    return applied
+
+
+# Helpers for migration scripts
+def has_column(conn, table, column):
+    return any(c["name"] == column for c in sa.inspect(conn).get_columns(table))
+
+
+def add_column(conn, table, column):
+    """ALTER TABLE ... ADD COLUMN unless the column is already there."""
+    if has_column(conn, table, column.name):
+        return False
+    ddl = sa.schema.CreateColumn(column).compile(dialect=conn.dialect)
+    conn.execute(sa.text(f"ALTER TABLE {table} ADD COLUMN {ddl}"))
+    return True
+
+
+def create_index(conn, name, table, *columns, unique=False):
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    conn.execute(sa.text(f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
@@ -0,0 +1,117 @@
+"""
+Checks run by the background worker on uploaded proofs of payment.
+
+Everything here works on a file path in the proof store and raises
+ProofRejected for uploads that should not be accepted. Pillow is optional:
+without it images are only sniffed, not decoded or thumbnailed.
+"""
+
+import os
+import re
+
+try:
+    from PIL import Image as PILImage
+except ImportError:
+    PILImage = None
+
+MAX_PROOF_BYTES = int(os.environ.get("MAX_PROOF_BYTES", 10 * 1024 * 1024))
+MAX_IMAGE_PIXELS = int(os.environ.get("MAX_IMAGE_PIXELS", 40_000_000))
+MAX_PDF_PAGES = int(os.environ.get("MAX_PDF_PAGES", 10))
+THUMBNAIL_SIZE = (320, 320)
+
+_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"%PDF-", "application/pdf"),
+]
+
+EXTENSION_MIME_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "gif": "image/gif",
+    "pdf": "application/pdf",
+}
+
+_PDF_PAGE_RE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+
+class ProofRejected(Exception):
+    """The proof is not an acceptable file; retrying will not help."""
+
+
+def sniff_mime(path):
+    with open(path, "rb") as f:
+        head = f.read(16)
+    for signature, mime in _SIGNATURES:
+        if head.startswith(signature):
+            return mime
+    return None
+
+
+def count_pdf_pages(path):
+    """Page objects found in the file, or None when the count is unknown.
+
+    Page objects kept in compressed object streams (common in bank and
+    mobile-app receipts) are not visible to the scan, so finding none does
+    not mean the PDF is empty.
+    """
+    with open(path, "rb") as f:
+        return len(_PDF_PAGE_RE.findall(f.read())) or None
+
+
+def check_image(path):
+    """Decode the image fully; returns (width, height) or None without Pillow."""
+    if PILImage is None:
+        return None
+    try:
+        with PILImage.open(path) as img:
+            width, height = img.size
+            if width * height > MAX_IMAGE_PIXELS:
+                raise ProofRejected(f"Image too large ({width}x{height})")
+            img.load()
+    except ProofRejected:
+        raise
+    except Exception as e:
+        raise ProofRejected(f"Image could not be decoded: {e}")
+    return width, height
+
+
+def make_thumbnail(path, thumb_path):
+    """Write a JPEG thumbnail; returns False when Pillow is unavailable."""
+    if PILImage is None:
+        return False
+    os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+    with PILImage.open(path) as img:
+        img.thumbnail(THUMBNAIL_SIZE)
+        img.convert("RGB").save(thumb_path, "JPEG", quality=80)
+    return True
+
+
+def inspect_proof(path, ext, thumb_path):
+    """Run every check on a stored proof.
+
+    Returns a dict with ``mime_type``, ``page_count`` and ``has_thumbnail``.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        raise ProofRejected("Empty file")
+    if size > MAX_PROOF_BYTES:
+        raise ProofRejected(f"File too large ({size} bytes)")
+
+    mime = sniff_mime(path)
+    if mime is None or mime != EXTENSION_MIME_TYPES.get(ext):
+        raise ProofRejected(f"File content does not match .{ext} extension")
+
+    result = {"mime_type": mime, "page_count": None, "has_thumbnail": False}
+    if mime == "application/pdf":
+        pages = count_pdf_pages(path)
+        if pages is not None and pages > MAX_PDF_PAGES:
+            raise ProofRejected(f"PDF has too many pages ({pages})")
+        result["page_count"] = pages
+    else:
+        check_image(path)
+        result["has_thumbnail"] = make_thumbnail(path, thumb_path)
+    return result
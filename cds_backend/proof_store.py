@@ -0,0 +1,156 @@
+"""
+Content-addressed store for proof-of-payment uploads.
+
+Files are hashed while they stream to a local temporary file and kept once
+under a sharded ``ab/cd/<sha256>.<ext>`` layout in a media storage backend
+(the local disk unless configured otherwise, see media_storage.py), so
+retries and identical uploads share the same bytes. Reference counts live
+in the ``proof_blobs`` table (see app.py); this module only deals with the
+stored files.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+
+from cds_backend.derivatives import all_variants
+from cds_backend.media_storage import LocalStorage
+
+CHUNK_SIZE = 64 * 1024
+
+_KEY_RE = re.compile(r"^([0-9a-f]{64})\.([a-z0-9]{1,8})$")
+THUMBNAIL_VARIANT = ("thumb", "jpeg")  # the same 320px JPEG as the thumbnail
+
+
+class ProofStore:
+    def __init__(self, root, storage=None):
+        self.root = root
+        self.storage = storage or LocalStorage(root)
+        self.tmp_dir = os.path.join(root, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    @staticmethod
+    def is_key(name):
+        return bool(name) and _KEY_RE.match(name) is not None
+
+    @staticmethod
+    def _digest(key):
+        m = _KEY_RE.match(key or "")
+        if not m:
+            raise ValueError(f"Not a proof store key: {key!r}")
+        return m.group(1)
+
+    def storage_key(self, key):
+        digest = self._digest(key)
+        return f"{digest[:2]}/{digest[2:4]}/{key}"
+
+    def thumbnail_key(self, key):
+        digest = self._digest(key)
+        return f"thumbs/{digest[:2]}/{digest[2:4]}/{digest}.jpg"
+
+    def variant_key(self, key, variant, fmt):
+        """Resized copy of an image proof (see derivatives.py).
+
+        The JPEG thumb is the thumbnail itself, so it is not stored twice.
+        """
+        if (variant, fmt) == THUMBNAIL_VARIANT:
+            return self.thumbnail_key(key)
+        return self._variant_key(key, variant, fmt)
+
+    def _variant_key(self, key, variant, fmt):
+        digest = self._digest(key)
+        return f"variants/{digest[:2]}/{digest[2:4]}/{digest}-{variant}.{fmt}"
+
+    def path_for(self, key):
+        """Local path of the stored file, or None for remote backends."""
+        return self.storage.local_path(self.storage_key(key))
+
+    def thumbnail_path(self, key):
+        return self.storage.local_path(self.thumbnail_key(key))
+
+    def exists(self, key):
+        return self.is_key(key) and self.storage.exists(self.storage_key(key))
+
+    def has_thumbnail(self, key):
+        return self.storage.exists(self.thumbnail_key(key))
+
+    def open(self, key, thumbnail=False):
+        return self.storage.open(self.thumbnail_key(key) if thumbnail else self.storage_key(key))
+
+    def save_stream(self, stream, ext):
+        """Copy *stream* into the store, hashing it on the way.
+
+        Returns ``(key, size, created)``; ``created`` is False when identical
+        bytes were already stored and the new copy was discarded.
+        """
+        ext = ext.lower()
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            key = f"{digest.hexdigest()}.{ext}"
+            return (key, size, self._commit(tmp_path, key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def save_file(self, path, ext):
+        """Store an existing file (used by the legacy proof migration)."""
+        with open(path, "rb") as f:
+            return self.save_stream(f, ext)
+
+    def _commit(self, tmp_path, key):
+        if self.storage.exists(self.storage_key(key)):
+            os.remove(tmp_path)
+            return False
+        self.storage.put_file(self.storage_key(key), tmp_path)
+        return True
+
+    @contextmanager
+    def working_copy(self, key):
+        """Yield ``(path, thumbnail_path)`` for checks that need real files.
+
+        With the local backend these are the stored files themselves; other
+        backends get a temporary download, and a thumbnail written to the
+        yielded path is uploaded on exit.
+        """
+        path, thumb_path = self.path_for(key), self.thumbnail_path(key)
+        if path is not None:
+            yield path, thumb_path
+            return
+        work_dir = tempfile.mkdtemp(dir=self.tmp_dir)
+        path = os.path.join(work_dir, key)
+        thumb_path = os.path.join(work_dir, "thumb.jpg")
+        try:
+            with self.open(key) as src, open(path, "wb") as out:
+                while True:
+                    chunk = src.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+            yield path, thumb_path
+            if os.path.exists(thumb_path):
+                self.storage.put_file(self.thumbnail_key(key), thumb_path)
+        finally:
+            for name in os.listdir(work_dir):
+                os.remove(os.path.join(work_dir, name))
+            os.rmdir(work_dir)
+
+    def delete(self, key):
+        # _variant_key also covers thumb JPEGs stored before they were shared
+        self.storage.delete_many(
+            [self.thumbnail_key(key)]
+            + [self._variant_key(key, variant, fmt) for variant, fmt in all_variants()]
+        )
+        return self.storage.delete(self.storage_key(key))
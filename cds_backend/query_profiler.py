@@ -0,0 +1,107 @@
+"""
+Per-request SQL profiler for development and staging (QUERY_PROFILER=True).
+
+Every statement a request runs is recorded from SQLAlchemy cursor events.
+When the request finishes the profiler:
+
+- adds ``X-Query-Count`` and a ``Server-Timing: db`` entry to the response;
+- flags statements repeated ``n_plus_one`` times or more (the same SQL with
+  different parameters, usually a query inside a loop) as N+1;
+- runs EXPLAIN on SELECTs slower than ``slow_ms`` and logs the plan.
+
+The cursor listeners are installed by the first profiled request, so with
+the profiler off production queries never run them. count_queries() works
+without the profiler and is what tests use to hold endpoints to a query
+budget.
+"""
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("profiler_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    pending = conn.info.get("profiler_started")
+    if not pending:  # listeners were installed while this statement ran
+        return
+    started = pending.pop()
+    if has_request_context() and "query_log" in g and not g.get("query_explaining"):
+        g.query_log.append((statement, parameters, time.perf_counter() - started))
+
+
+def install():
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryProfiler:
+    def __init__(self, log, slow_ms=100, n_plus_one=5):
+        self.log = log  # e.g. app.logger.warning
+        self.slow_ms = slow_ms
+        self.n_plus_one = n_plus_one
+
+    def start(self):
+        install()
+        g.query_log = []  # (statement, parameters, seconds)
+
+    def repeated(self, queries):
+        """[(statement, count)] for statements run at least n_plus_one times."""
+        counts = Counter(statement for statement, _, _ in queries)
+        return [(statement, n) for statement, n in counts.most_common() if n >= self.n_plus_one]
+
+    def slow(self, queries):
+        return [q for q in queries if q[2] * 1000 >= self.slow_ms]
+
+    def explain(self, engine, statement, parameters):
+        """Query plan lines for a SELECT, or None."""
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return None
+        prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+        g.query_explaining = True
+        try:
+            with engine.connect() as conn:
+                rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+        except Exception as e:  # the plan is best effort; never fail the request
+            return [f"EXPLAIN failed: {e}"]
+        finally:
+            g.query_explaining = False
+        return [" | ".join(str(col) for col in row) for row in rows]
+
+    def finish(self, resp, engine, endpoint):
+        queries = g.pop("query_log", None)
+        if queries is None:
+            return resp
+        total_ms = sum(seconds for _, _, seconds in queries) * 1000
+        resp.headers["X-Query-Count"] = str(len(queries))
+        resp.headers.add("Server-Timing", f'db;dur={total_ms:.2f};desc="{len(queries)} queries"')
+        for statement, n in self.repeated(queries):
+            self.log(f"N+1 in {endpoint}: {n}x {statement}")
+        for statement, parameters, seconds in self.slow(queries):
+            plan = self.explain(engine, statement, parameters)
+            self.log(f"Slow query in {endpoint} ({seconds * 1000:.1f} ms): {statement}"
+                     + ("\n  plan: " + "\n        ".join(plan) if plan else ""))
+        return resp
+
+
+@contextmanager
+def count_queries():
+    """Collect the statements executed inside the block (any thread, any engine)."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, "after_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "after_cursor_execute", record)
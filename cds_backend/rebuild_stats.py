@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Recompute the donation_stats aggregates from the donations table.
+
+    python cds_backend/rebuild_stats.py           # report drift, then rewrite the table
+    python cds_backend/rebuild_stats.py --verify  # only report drift; exit 1 if any
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from cds_backend.app import app, db, DonationStat, add_to_stats, compute_donation_stats
+
+
+def stored_stats():
+    return {
+        (s.scope, s.bucket): [s.total_amount, s.donation_count]
+        for s in DonationStat.query.all()
+    }
+
+
+def drift(expected, stored):
+    """(scope, bucket, expected, stored) for every row that differs."""
+    return [
+        (scope, bucket, expected.get((scope, bucket)), stored.get((scope, bucket)))
+        for scope, bucket in sorted(set(expected) | set(stored))
+        if expected.get((scope, bucket)) != stored.get((scope, bucket))
+    ]
+
+
+def rebuild(verify_only=False):
+    with app.app_context():
+        try:
+            if db.engine.dialect.name == "postgresql":
+                # hold off concurrent approvals until the rewrite commits
+                db.session.execute(db.text("LOCK TABLE donation_stats IN EXCLUSIVE MODE"))
+            expected = compute_donation_stats()
+            differences = drift(expected, stored_stats())
+            for scope, bucket, want, have in differences:
+                print(f"⚠ {scope}/{bucket or '-'}: expected {want}, stored {have}")
+
+            if verify_only:
+                db.session.rollback()
+                print(f"✓ donation_stats verified ({len(differences)} difference(s))")
+                return not differences
+
+            DonationStat.query.delete()
+            add_to_stats(expected)
+            db.session.commit()
+            print(f"✓ donation_stats rebuilt ({len(expected)} row(s), {len(differences)} corrected)")
+        except Exception as e:
+            print(f"❌ Rebuild failed: {e}")
+            db.session.rollback()
+            return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = rebuild(verify_only='--verify' in sys.argv[1:])
+    exit(0 if success else 1)
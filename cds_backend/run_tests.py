@@ -1,12 +1,67 @@
-import sys, os, traceback
+import sys, os, tempfile, traceback
 # ensure parent workspace path on sys.path so cds_backend package imports resolve when running directly
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from cds_backend import tests_admin_auth, tests_bank_accounts, tests_donations
+# run against a throwaway database and upload folder unless told otherwise
+_tmp = tempfile.mkdtemp(prefix='cds_tests_')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(_tmp, 'donations.db')}")
+os.environ.setdefault('GALLERY_FOLDER', os.path.join(_tmp, 'gallery_images'))
+os.environ.setdefault('ADMIN_PASSWORD', 'admin123')
+os.environ.setdefault('MEDIA_STORAGE', 'local')
+os.environ.setdefault('STATIC_PRECOMPRESS', 'False')
+from cds_backend.app import app, db
+from cds_backend import migrations
+from cds_backend import tests_admin_auth, tests_bank_accounts, tests_donations, tests_proof_processing, tests_idempotency
+from cds_backend import tests_migrations, tests_caching, tests_stats, tests_export, tests_gallery, tests_uploads
+from cds_backend import tests_media_storage, tests_file_serving, tests_static_assets
+from cds_backend import tests_access_log, tests_metrics, tests_query_budgets, tests_benchmark
+from cds_backend import tests_deployment
+
+with app.app_context():
+    migrations.upgrade(db.engine)
 
 TESTS = [
+    tests_migrations.test_fresh_database_matches_models,
+    tests_migrations.test_upgrades_legacy_database,
     tests_admin_auth.test_admin_login_and_protected_routes,
+    tests_admin_auth.test_verified_tokens_are_cached,
     tests_bank_accounts.test_bank_accounts_crud,
     tests_donations.test_donation_flow,
+    tests_donations.test_identical_proofs_stored_once,
+    tests_donations.test_bulk_validation,
+    tests_donations.test_paginated_donation_lists,
+    tests_proof_processing.test_worker_processes_queued_proofs,
+    tests_proof_processing.test_proof_variants_are_srcset_ready,
+    tests_proof_processing.test_no_stored_variants_when_storage_resizes_on_delivery,
+    tests_proof_processing.test_failed_insert_leaves_proof_removal_to_the_worker,
+    tests_idempotency.test_parallel_identical_submissions,
+    tests_idempotency.test_retry_answered_from_cache_or_db,
+    tests_caching.test_list_etags_and_revalidation,
+    tests_caching.test_bank_account_cache_follows_version,
+    tests_stats.test_stats_follow_validations,
+    tests_stats.test_stats_window_bounds_and_daily_etag,
+    tests_export.test_streaming_csv_export,
+    tests_export.test_change_feed_pages_and_resumes,
+    tests_gallery.test_albums_and_paginated_gallery,
+    tests_gallery.test_bulk_delete_drains_outbox_in_batches,
+    tests_gallery.test_gallery_variants,
+    tests_uploads.test_uploads_run_in_parallel,
+    tests_uploads.test_chunked_upload_resumes_and_finalizes,
+    tests_uploads.test_chunked_upload_to_gallery,
+    tests_media_storage.test_storage_backends,
+    tests_media_storage.test_proof_store_on_remote_backend,
+    tests_media_storage.test_cloudinary_variants_are_transformation_urls,
+    tests_file_serving.test_conditional_and_range_requests,
+    tests_file_serving.test_offload_to_proxy_after_auth,
+    tests_static_assets.test_manifest_serves_precompressed_assets,
+    tests_access_log.test_sampled_json_access_log,
+    tests_metrics.test_metrics_endpoint,
+    tests_metrics.test_metrics_merge_across_worker_processes,
+    tests_query_budgets.test_endpoint_query_budgets,
+    tests_query_budgets.test_profiler_headers_n_plus_one_and_explain,
+    tests_benchmark.test_benchmark_seeds_runs_and_compares,
+    tests_deployment.test_gunicorn_config,
+    tests_deployment.test_workers_get_their_own_pool,
+    tests_deployment.test_cloudinary_configured_on_first_use,
 ]
 
 failures = []
@@ -25,3 +80,4 @@ if failures:
     print('Failures:')
     for name, err in failures:
         print('-', name, err)
+    sys.exit(1)
@@ -0,0 +1,189 @@
+"""
+Manifest of the static frontend, built once at startup.
+
+build_manifest() walks the frontend directories and maps every URL path to
+an Asset (resolved file, size, content hash, precompressed variants), so a
+request is one dict lookup instead of a chain of os.path.exists calls.
+Text assets get ``.gz`` (and ``.br`` when the optional ``brotli`` package
+is installed) siblings, written at startup unless they are already up to
+date; ``python cds_backend/compress_assets.py`` does the same at build time.
+
+Names carrying a content hash (``app.3f9a1c2e.js``), or requests whose
+``?v=`` matches the asset's hash, are cached as immutable; everything else
+revalidates against the hash ETag.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from collections import namedtuple
+
+from werkzeug.wsgi import wrap_file
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_EXTENSIONS = {
+    "html", "css", "js", "json", "svg", "txt", "xml", "webmanifest", "map",
+    "png", "jpg", "jpeg", "gif", "webp", "avif", "ico", "pdf", "woff", "woff2",
+}
+COMPRESSIBLE_EXTENSIONS = {"html", "css", "js", "json", "svg", "txt", "xml", "webmanifest", "map"}
+MIN_COMPRESS_SIZE = 256  # smaller bodies gain nothing from compression
+SKIP_DIRS = {"__pycache__", "node_modules"}
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]  # preference order
+COMPRESSORS = {".gz": lambda data: gzip.compress(data, 9, mtime=0)}
+if brotli is not None:
+    COMPRESSORS[".br"] = brotli.compress
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, no-cache"
+
+_FINGERPRINT_RE = re.compile(r"\.[0-9a-f]{8,}\.[a-z0-9]+$")
+_PROOF_RE = re.compile(r"_proof\.[a-z0-9]+$", re.IGNORECASE)  # payment receipts, wherever they sit
+
+Asset = namedtuple("Asset", "path size mtime hash mimetype encodings fingerprinted")
+Encoded = namedtuple("Encoded", "path size")
+
+
+def _ext(name):
+    return name.rsplit(".", 1)[-1].lower() if "." in name else ""
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def compress(path, mtime):
+    """Write missing or stale .gz/.br siblings of *path*; returns how many were written."""
+    written = 0
+    data = None
+    for suffix, encode in COMPRESSORS.items():
+        target = path + suffix
+        try:
+            if os.stat(target).st_mtime >= mtime:
+                continue
+        except FileNotFoundError:
+            pass
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+        _write_atomic(target, encode(data))
+        os.utime(target, (mtime, mtime))  # fresh exactly while the source is unchanged
+        written += 1
+    return written
+
+
+def _encodings(path, size, mtime):
+    found = {}
+    for encoding, suffix in ENCODINGS:
+        try:
+            st = os.stat(path + suffix)
+        except FileNotFoundError:
+            continue
+        # stale or useless variants are ignored rather than served
+        if st.st_mtime >= mtime and st.st_size < size:
+            found[encoding] = Encoded(path + suffix, st.st_size)
+    return found
+
+
+def iter_files(root, dirs, exclude=()):
+    """(url_path, file_path) for servable files; earlier *dirs* win on clashes.
+
+    *dirs* are relative to *root* ("" for root itself); *exclude* lists
+    directories that are never served (the backend, uploads). ``*_proof.*``
+    files are skipped everywhere.
+    """
+    exclude = {os.path.abspath(p) for p in exclude}
+    for sub in dirs:
+        base = os.path.abspath(os.path.join(root, sub))
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames[:] = sorted(
+                d for d in dirnames
+                if not d.startswith(".") and d not in SKIP_DIRS
+                and os.path.join(dirpath, d) not in exclude
+            )
+            for name in sorted(filenames):
+                if name.startswith(".") or _ext(name) not in STATIC_EXTENSIONS or _PROOF_RE.search(name):
+                    continue
+                path = os.path.join(dirpath, name)
+                yield os.path.relpath(path, base).replace(os.sep, "/"), path
+
+
+def build_manifest(root, dirs=("",), exclude=(), precompress=True, log=None):
+    """{url_path: Asset} for the frontend under *root*."""
+    manifest = {}
+    written = 0
+    for url, path in iter_files(root, dirs, exclude):
+        if url in manifest:
+            continue
+        st = os.stat(path)
+        ext = _ext(url)
+        if precompress and ext in COMPRESSIBLE_EXTENSIONS and st.st_size >= MIN_COMPRESS_SIZE:
+            try:
+                written += compress(path, st.st_mtime)
+            except OSError as e:  # read-only deploys fall back to identity bodies
+                if log:
+                    log(f"Could not precompress {path}: {e}")
+        manifest[url] = Asset(
+            path=path,
+            size=st.st_size,
+            mtime=st.st_mtime,
+            hash=_sha256(path)[:16],
+            mimetype=mimetypes.guess_type(url)[0] or "application/octet-stream",
+            encodings=_encodings(path, st.st_size, st.st_mtime) if ext in COMPRESSIBLE_EXTENSIONS else {},
+            fingerprinted=_FINGERPRINT_RE.search(url) is not None,
+        )
+    if log:
+        log(f"Static manifest: {len(manifest)} assets, {written} compressed variant(s) written")
+    return manifest
+
+
+def negotiate(asset, accept_encodings):
+    """Best precompressed variant the client accepts: (encoding, Encoded) or (None, None)."""
+    for encoding, _ in ENCODINGS:
+        if encoding in asset.encodings and accept_encodings[encoding]:
+            return encoding, asset.encodings[encoding]
+    return None, None
+
+
+def serve(asset, request, response_class):
+    """Response for *asset* with validators, Range support and content negotiation."""
+    encoding, encoded = negotiate(asset, request.accept_encodings)
+    path, size = (encoded.path, encoded.size) if encoded else (asset.path, asset.size)
+    resp = response_class(
+        wrap_file(request.environ, open(path, "rb")),
+        mimetype=asset.mimetype,
+        direct_passthrough=True,
+    )
+    resp.content_length = size
+    resp.last_modified = asset.mtime
+    # each encoding is its own representation, so each needs its own validator
+    resp.set_etag(f"{asset.hash}-{encoding}" if encoding else asset.hash)
+    if encoding:
+        resp.headers["Content-Encoding"] = encoding
+    if asset.encodings:
+        resp.vary.add("Accept-Encoding")
+    fingerprinted = asset.fingerprinted or request.args.get("v") == asset.hash
+    resp.headers["Cache-Control"] = IMMUTABLE if fingerprinted else REVALIDATE
+    return resp.make_conditional(request, accept_ranges=True, complete_length=size)
@@ -0,0 +1,41 @@
+import json
+import logging
+from cds_backend import app as app_module
+from cds_backend.access_log import AccessLog
+from cds_backend.app import app, generate_admin_token
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(json.loads(self.format(record)))
+
+
+def test_sampled_json_access_log():
+    handler = ListHandler()
+    saved = app_module.access_logger
+    app_module.access_logger = AccessLog(handler, rates={'donation_stats': 0}, slow_ms=60000)
+    headers = {'Authorization': f"Bearer {generate_admin_token('logs')}"}
+    try:
+        with app.test_client() as client:
+            assert client.get('/pending-donations', headers=headers).status_code == 200
+            assert client.get('/stats').status_code == 200  # sampled out
+            assert client.get('/donation-status/NOPE').status_code == 404
+            app_module.access_logger.flush()
+
+            first, second = handler.lines
+            assert first['method'] == 'GET' and first['route'] == '/pending-donations'
+            assert first['status'] == 200 and first['bytes'] > 0 and first['duration_ms'] > 0
+            assert first['db_queries'] >= 1 and first['db_ms'] >= 0
+            assert second['route'] == '/donation-status/<reference>' and second['path'] == '/donation-status/NOPE'
+
+            # slow requests are kept whatever the rate
+            app_module.access_logger.slow_ms = 0
+            client.get('/stats')
+            app_module.access_logger.flush()
+            assert handler.lines[-1]['endpoint'] == 'donation_stats'
+    finally:
+        app_module.access_logger = saved
@@ -23,15 +23,15 @@ def test_admin_login_and_protected_routes():
         assert r3.status_code == 200
 
         # upload a proof and get protected proof link
-        import io
+        import io, uuid
         proof = (io.BytesIO(b"receipt"), 'proof.png')
-        r4 = client.post('/donate', data={'fullname':'A','email':'a@b','phone':'0','amount':'50','proof': proof}, content_type='multipart/form-data')
+        r4 = client.post('/donate', data={'fullname':'A','email':'a@b','phone':'0','amount':'50','proof': proof, 'idempotency_key': uuid.uuid4().hex}, content_type='multipart/form-data')
         assert r4.status_code == 201
         ref = r4.get_json()['reference']
 
         # read pending donations to get proof filename
         r5 = client.get('/pending-donations', headers={'Authorization': f'Bearer {token}'})
-        pend = r5.get_json()
+        pend = r5.get_json()['items']
         assert any(p.get('proof_filename') for p in pend)
         proof_name = next(p['proof_filename'] for p in pend if p.get('proof_filename'))
 
@@ -56,3 +56,30 @@ def test_admin_login_and_protected_routes():
         assert sjson.get('status') == 'paid'
         assert sjson.get('approved_by') is not None
 
+
+def test_verified_tokens_are_cached():
+    from cds_backend import app as app_module
+    token = generate_admin_token('cache')
+    headers = {'Authorization': f'Bearer {token}'}
+    with app.test_client() as client:
+        r = client.get('/pending-donations', headers=headers)
+        assert r.status_code == 200
+        assert r.headers['Server-Timing'].startswith('auth;dur=')
+        checks = app_module.metrics.REGISTRY.get_sample_value(
+            'admin_auth_seconds_count', {'endpoint': 'pending_donations'})
+
+        # the second request is answered from the cache without re-checking the signature
+        loads = app_module._token_serializer.loads
+        app_module._token_serializer.loads = None
+        try:
+            assert client.get('/pending-donations', headers=headers).status_code == 200
+        finally:
+            app_module._token_serializer.loads = loads
+        assert app_module.metrics.REGISTRY.get_sample_value(
+            'admin_auth_seconds_count', {'endpoint': 'pending_donations'}) == checks + 1
+
+        # tampered tokens and bank-account routes go through the same check
+        assert client.get('/pending-donations', headers={'Authorization': f'Bearer {token}x'}).status_code == 401
+        assert client.post('/admin/bank-accounts', json={}).status_code == 401
+        assert client.put('/admin/bank-accounts/1', query_string={'token': token + 'x'}, json={}).status_code == 401
+        assert client.options('/admin/bank-accounts').status_code in (200, 204)
@@ -63,12 +63,12 @@ def test_bank_accounts_crud():
         assert r.status_code == 201
         new_acc = r.get_json()['id']
         # submit a donation choosing that bank account
-        import io
+        import io, uuid
         proof = (io.BytesIO(b"receipt"), 'proof.png')
-        r = client.post('/donate', data={'fullname':'Z','email':'z@z','phone':'000','amount':'300','proof': proof, 'bank_account_id': str(new_acc)}, content_type='multipart/form-data')
+        r = client.post('/donate', data={'fullname':'Z','email':'z@z','phone':'000','amount':'300','proof': proof, 'bank_account_id': str(new_acc), 'idempotency_key': uuid.uuid4().hex}, content_type='multipart/form-data')
         assert r.status_code == 201
         # now pending-donations (admin) should include bank_account_id on that entry
         r = client.get('/pending-donations', headers=headers)
         assert r.status_code == 200
-        pend = r.get_json()
+        pend = r.get_json()['items']
         assert any(p.get('bank_account_id') == new_acc for p in pend)
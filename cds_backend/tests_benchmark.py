@@ -0,0 +1,26 @@
+from cds_backend import app as app_module
+from cds_backend import benchmark
+
+
+def test_benchmark_seeds_runs_and_compares():
+    seeded = benchmark.seed(app_module, donations=60, images=12, bank_accounts=3, albums=2)
+    assert len(seeded['references']) == 60 and len(seeded['titles']) == 2
+    with app_module.app.app_context():
+        assert app_module.collection_version('donations') >= 60
+
+    routes = benchmark.scenarios(app_module, seeded)
+    assert {'donate', 'upload_image', 'download_csv', 'album_images'} <= {name for name, _, _ in routes}
+    # a new route needs a scenario or an EXCLUDED_ROUTES entry
+    assert benchmark.uncovered(app_module.app, routes) == []
+    results = benchmark.run(app_module, routes, requests=4, concurrency=2, log=lambda line: None)
+    assert set(results) == {name for name, _, _ in routes}
+    for name, summary in results.items():
+        assert summary['errors'] == 0, name
+        assert summary['p50_ms'] <= summary['p95_ms'] <= summary['p99_ms']
+
+    baseline = {'routes': {'stats': {'p95_ms': 10.0, 'throughput_rps': 100.0}}, 'peak_rss_mb': 100.0}
+    same = {'routes': {'stats': {'p95_ms': 11.0, 'throughput_rps': 95.0}}, 'peak_rss_mb': 110.0}
+    worse = {'routes': {'stats': {'p95_ms': 13.0, 'throughput_rps': 70.0}}, 'peak_rss_mb': 130.0}
+    assert benchmark.compare(same, baseline, threshold=0.2) == []
+    assert len(benchmark.compare(worse, baseline, threshold=0.2)) == 3
+    assert benchmark.percentile([1, 2, 3, 4], 50) == 2 and benchmark.percentile([1, 2, 3, 4], 99) == 4
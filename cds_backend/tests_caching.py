@@ -0,0 +1,71 @@
+import io
+import uuid
+from cds_backend.app import app, db, BankAccount, bump_collection_version, bank_accounts_snapshot
+
+
+def test_list_etags_and_revalidation():
+    headers = {'X-ADMIN-KEY': 'admin123'}
+    with app.test_client() as client:
+        r = client.get('/bank-accounts')
+        assert r.status_code == 200
+        etag = r.headers['ETag']
+        assert not etag.startswith('W/')
+        assert r.headers['Cache-Control'] == 'public, no-cache'
+
+        r = client.get('/bank-accounts', headers={'If-None-Match': etag})
+        assert r.status_code == 304
+        assert r.data == b''
+        assert r.headers['ETag'] == etag
+
+        # a write bumps the collection version, so the old ETag no longer matches
+        r = client.post('/admin/bank-accounts', headers=headers,
+                        json={'bank_name': 'Etag Bank', 'account_name': 'E', 'account_number': '1'})
+        assert r.status_code == 201
+        r = client.get('/bank-accounts', headers={'If-None-Match': etag})
+        assert r.status_code == 200
+        assert r.headers['ETag'] != etag
+        assert any(a['bank_name'] == 'Etag Bank' for a in r.get_json())
+
+        # different query strings are different representations
+        a = client.get('/paid-users', query_string={'limit': 1}).headers['ETag']
+        b = client.get('/paid-users', query_string={'limit': 2}).headers['ETag']
+        assert a != b
+        assert client.get('/paid-users', query_string={'limit': 1},
+                          headers={'If-None-Match': a}).status_code == 304
+
+        r = client.get('/gallery')
+        assert r.headers['Cache-Control'] == 'public, max-age=60'
+        assert client.get('/gallery', headers={'If-None-Match': r.headers['ETag']}).status_code == 304
+
+
+def test_bank_account_cache_follows_version():
+    headers = {'X-ADMIN-KEY': 'admin123'}
+    with app.test_client() as client:
+        r = client.post('/admin/bank-accounts', headers=headers,
+                        json={'bank_name': 'Cache Bank', 'account_name': 'C', 'account_number': '42'})
+        acc_id = r.get_json()['id']
+        r = client.post('/donate', data={
+            'fullname': 'Cache Donor', 'email': 'c@x.com', 'phone': '089', 'amount': '10',
+            'proof': (io.BytesIO(b"cache-proof"), 'receipt.png'),
+            'bank_account_id': str(acc_id), 'idempotency_key': uuid.uuid4().hex
+        }, content_type='multipart/form-data')
+        ref = r.get_json()['reference']
+
+        first = client.get('/bank-accounts').data
+        with app.app_context():
+            assert bank_accounts_snapshot() is bank_accounts_snapshot()  # served from memory
+        assert client.get(f'/donation-status/{ref}').get_json()['bank_account']['account_number'] == '42'
+
+        # a write through the API is visible on the next request
+        client.put(f'/admin/bank-accounts/{acc_id}', headers=headers, json={'account_number': '43'})
+        assert client.get(f'/donation-status/{ref}').get_json()['bank_account']['account_number'] == '43'
+        assert client.get('/bank-accounts').data != first
+
+        # so is one made by another worker: only the shared version row changes
+        with app.app_context():
+            db.session.execute(db.update(BankAccount).where(BankAccount.id == acc_id).values(active=False))
+            bump_collection_version("bank_accounts")
+            db.session.commit()
+        assert all(a['id'] != acc_id for a in client.get('/bank-accounts').get_json())
+        # inactive accounts are still resolved for existing donations
+        assert client.get(f'/donation-status/{ref}').get_json()['bank_account']['id'] == acc_id
@@ -0,0 +1,60 @@
+import os
+import runpy
+import tempfile
+from cds_backend import app as app_module
+from cds_backend.app import app, db
+
+CONF = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py')
+
+
+def _load_conf(**env):
+    saved = dict(os.environ)
+    os.environ.update(env)
+    try:
+        return runpy.run_path(CONF)
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+
+def test_gunicorn_config():
+    conf = _load_conf(WEB_CONCURRENCY='1')
+    assert conf['worker_class'] == 'gthread' and conf['threads'] == 4 and conf['workers'] == 1
+    assert conf['preload_app'] is True and conf['timeout'] >= 120
+    assert conf['max_requests'] > 0 and conf['max_requests_jitter'] > 0
+
+    conf = _load_conf(GUNICORN_WORKER_CLASS='sync', WEB_CONCURRENCY='3', GUNICORN_MAX_REQUESTS='50')
+    assert conf['threads'] == 1 and conf['workers'] == 3 and conf['max_requests'] == 50
+
+    # several workers share /metrics through an emptied multiprocess directory
+    metrics_dir = tempfile.mkdtemp(prefix='cds_prom_')
+    open(os.path.join(metrics_dir, 'counter_1.db'), 'wb').close()
+    _load_conf(WEB_CONCURRENCY='2', PROMETHEUS_MULTIPROC_DIR=metrics_dir)
+    assert os.listdir(metrics_dir) == []
+
+
+def test_workers_get_their_own_pool():
+    with app.app_context():
+        db.session.execute(db.text('SELECT 1'))
+        db.session.remove()
+        inherited = db.engine.pool
+    runpy.run_path(CONF)['post_fork'](None, None)
+    with app.app_context():
+        assert db.engine.pool is not inherited
+        assert db.session.execute(db.text('SELECT 1')).scalar() == 1
+        db.session.remove()
+
+
+def test_cloudinary_configured_on_first_use():
+    import cloudinary
+    from cds_backend.media_storage import CloudinaryStorage
+    previous = cloudinary.config().cloud_name
+    CloudinaryStorage._configured = False
+    try:
+        storage = CloudinaryStorage(credentials={'cloud_name': 'lazy-cloud', 'api_key': 'k', 'api_secret': 's'})
+        assert cloudinary.config().cloud_name != 'lazy-cloud'  # nothing happens at construction
+        assert '/lazy-cloud/' in storage.url('gallery/abc.jpg')
+        assert app_module.CLOUDINARY_CREDENTIALS.keys() == {'cloud_name', 'api_key', 'api_secret'}
+    finally:
+        CloudinaryStorage._configured = False
+        cloudinary.config(cloud_name=previous)
@@ -1,5 +1,6 @@
 import json
-from cds_backend.app import app
+import uuid
+from cds_backend.app import app, db, Donation, ProofBlob, proof_store
 
 
 def test_donation_flow():
@@ -12,7 +13,8 @@ def test_donation_flow():
             'email': 't@t.com',
             'phone': '080',
             'amount': '500',
-            'proof': proof
+            'proof': proof,
+            'idempotency_key': uuid.uuid4().hex
         }
         # create donation (multipart/form-data)
         r = client.post('/donate', data=data, content_type='multipart/form-data')
@@ -24,15 +26,121 @@ def test_donation_flow():
         # pending list requires admin key
         resp = client.get('/pending-donations', headers={'X-ADMIN-KEY': 'admin123'})
         assert resp.status_code == 200
-        pendings = resp.get_json()
+        pendings = resp.get_json()['items']
         assert any(p['reference'] == ref and p.get('proof_filename') for p in pendings)
 
         # validate
         resp = client.post('/admin/validate-donation', headers={'X-ADMIN-KEY': 'admin123'}, json={'reference': ref})
         assert resp.status_code == 200
 
-        # now paid-users should include it and proof filename preserved
+        # now paid-users should include it, without exposing the proof
         resp = client.get('/paid-users')
         assert resp.status_code == 200
-        paid = resp.get_json()
-        assert any(p['reference'] == ref and p['status'] == 'paid' and p.get('proof_filename') for p in paid)
+        paid = resp.get_json()['items']
+        mine = next(p for p in paid if p['reference'] == ref)
+        assert 'proof_filename' not in mine and 'status' not in mine
+
+
+def test_identical_proofs_stored_once():
+    import io, os
+    with app.test_client() as client:
+        refs = []
+        for name in ('receipt.png', 'retry.png'):
+            r = client.post('/donate', data={
+                'fullname': 'Dup', 'email': 'd@d.com', 'phone': '081', 'amount': '200',
+                'proof': (io.BytesIO(b"same-receipt-bytes"), name),
+                'idempotency_key': uuid.uuid4().hex
+            }, content_type='multipart/form-data')
+            assert r.status_code == 201
+            refs.append(r.get_json()['reference'])
+
+        with app.app_context():
+            keys = {Donation.query.filter_by(reference=ref).first().proof_filename for ref in refs}
+            assert len(keys) == 1
+            key = keys.pop()
+            assert proof_store.is_key(key)
+            assert os.path.exists(proof_store.path_for(key))
+            assert db.session.get(ProofBlob, key).ref_count == 2
+
+        r = client.get(f'/protected-proof/{key}', headers={'X-ADMIN-KEY': 'admin123'})
+        assert r.status_code == 200
+        assert r.data == b"same-receipt-bytes"
+
+
+def test_bulk_validation():
+    import io
+    headers = {'X-ADMIN-KEY': 'admin123', 'X-ADMIN-NAME': 'treasurer'}
+    with app.test_client() as client:
+        refs = []
+        for i in range(3):
+            r = client.post('/donate', data={
+                'fullname': f'Bulk {i}', 'email': 'b@b.com', 'phone': '084', 'amount': '1000',
+                'proof': (io.BytesIO(f"bulk-{i}".encode()), 'receipt.png'),
+                'idempotency_key': uuid.uuid4().hex
+            }, content_type='multipart/form-data')
+            assert r.status_code == 201
+            refs.append(r.get_json()['reference'])
+
+        r = client.post('/admin/validate-donation', headers=headers, json={'reference': refs[0]})
+        assert r.status_code == 200
+
+        r = client.post('/admin/validate-donations', json={'references': refs})
+        assert r.status_code == 401
+
+        r = client.post('/admin/validate-donations', headers=headers,
+                        json={'references': refs + ['nosuchref']})
+        assert r.status_code == 200
+        body = r.get_json()
+        assert body['updated'] == 2
+        results = {x['reference']: x['result'] for x in body['results']}
+        assert results == {refs[0]: 'already_paid', refs[1]: 'updated', refs[2]: 'updated',
+                           'nosuchref': 'not_found'}
+
+        with app.app_context():
+            for ref in refs[1:]:
+                d = Donation.query.filter_by(reference=ref).first()
+                assert d.status == 'paid' and d.approved_by == 'treasurer'
+
+        r = client.post('/admin/validate-donations', headers=headers, json={'min_amount': 'lots'})
+        assert r.status_code == 400
+        for body in ([refs[0]], 'x', 7, {'references': [1, refs[0]]}, {'references': [None]}):
+            assert client.post('/admin/validate-donations', headers=headers, json=body).status_code == 400
+
+
+def test_paginated_donation_lists():
+    import io
+    headers = {'X-ADMIN-KEY': 'admin123'}
+    with app.test_client() as client:
+        refs = []
+        for i in range(5):
+            r = client.post('/donate', data={
+                'fullname': f'Page {i}', 'email': 'p@g.com', 'phone': '085', 'amount': '31337',
+                'proof': (io.BytesIO(f"page-{i}".encode()), 'receipt.png'),
+                'idempotency_key': uuid.uuid4().hex
+            }, content_type='multipart/form-data')
+            assert r.status_code == 201
+            refs.append(r.get_json()['reference'])
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {'limit': 2, 'min_amount': 31337, 'max_amount': 31337}
+            if cursor:
+                params['cursor'] = cursor
+            r = client.get('/pending-donations', headers=headers, query_string=params)
+            assert r.status_code == 200
+            body = r.get_json()
+            assert len(body['items']) <= 2
+            seen += [p['reference'] for p in body['items']]
+            pages += 1
+            cursor = body['next_cursor']
+            if not cursor:
+                break
+        assert pages == 3
+        assert seen == list(reversed(refs))  # newest first, no gaps or repeats
+
+        client.post('/admin/validate-donations', headers=headers, json={'references': refs[:2]})
+        r = client.get('/paid-users', query_string={'min_amount': 31337, 'max_amount': 31337})
+        assert sorted(p['reference'] for p in r.get_json()['items']) == sorted(refs[:2])
+
+        r = client.get('/pending-donations', headers=headers, query_string={'cursor': 'garbage!'})
+        assert r.status_code == 400
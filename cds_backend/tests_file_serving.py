@@ -0,0 +1,66 @@
+import io
+import os
+import uuid
+from cds_backend import app as app_module
+from cds_backend import file_serving
+from cds_backend.app import app, generate_admin_token
+
+
+def _stored_proof(client, body):
+    r = client.post('/donate', data={'fullname': 'F', 'email': 'f@s', 'phone': '0', 'amount': '10',
+                                     'proof': (io.BytesIO(body), 'proof.pdf'), 'idempotency_key': uuid.uuid4().hex},
+                    content_type='multipart/form-data')
+    assert r.status_code == 201
+    with app.app_context():
+        return app_module.Donation.query.filter_by(reference=r.get_json()['reference']).first().proof_filename
+
+
+def test_conditional_and_range_requests():
+    headers = {'Authorization': f"Bearer {generate_admin_token('files')}"}
+    body = b'%PDF-1.4 ' + os.urandom(64)
+    with app.test_client() as client:
+        key = _stored_proof(client, body)
+        r = client.get(f'/protected-proof/{key}', headers=headers)
+        assert r.status_code == 200 and r.data == body
+        assert r.headers['ETag'] == f'"{app_module.proof_store.storage_key(key).replace("/", "-")}"'
+        assert r.headers['Last-Modified'] and r.headers['Accept-Ranges'] == 'bytes'
+        assert r.headers['Cache-Control'] == 'private, max-age=86400'
+
+        r = client.get(f'/protected-proof/{key}', headers=dict(headers, **{'If-None-Match': r.headers['ETag']}))
+        assert r.status_code == 304 and r.data == b''
+
+        r = client.get(f'/protected-proof/{key}', headers=dict(headers, Range='bytes=0-3'))
+        assert r.status_code == 206 and r.data == body[:4]
+        assert r.headers['Content-Range'] == f'bytes 0-3/{len(body)}'
+
+        # legacy gallery files revalidate on mtime
+        with open(os.path.join(app_module.UPLOAD_FOLDER, 'legacy.jpg'), 'wb') as f:
+            f.write(b'legacy')
+        r = client.get('/gallery-image/legacy.jpg')
+        assert r.status_code == 200 and r.mimetype == 'image/jpeg'
+        r = client.get('/gallery-image/legacy.jpg', headers={'If-Modified-Since': r.headers['Last-Modified']})
+        assert r.status_code == 304
+
+
+def test_offload_to_proxy_after_auth():
+    headers = {'Authorization': f"Bearer {generate_admin_token('files')}"}
+    saved = file_serving.FILE_OFFLOAD, file_serving.FILE_OFFLOAD_LOCATIONS
+    file_serving.FILE_OFFLOAD = 'x-accel'
+    file_serving.FILE_OFFLOAD_LOCATIONS = {os.path.abspath(app_module.PROOF_STORE_FOLDER): '/_proofs/'}
+    try:
+        with app.test_client() as client:
+            key = _stored_proof(client, b'%PDF-1.4 offloaded')
+            assert client.get(f'/protected-proof/{key}').status_code == 401
+
+            r = client.get(f'/protected-proof/{key}', headers=headers)
+            assert r.status_code == 200 and r.data == b''
+            assert r.headers['X-Accel-Redirect'] == '/_proofs/' + app_module.proof_store.storage_key(key)
+            assert r.mimetype == 'application/pdf' and r.headers['ETag']
+            r = client.get(f'/protected-proof/{key}', headers=dict(headers, **{'If-None-Match': r.headers['ETag']}))
+            assert r.status_code == 304 and 'X-Accel-Redirect' not in r.headers
+
+            file_serving.FILE_OFFLOAD = 'x-sendfile'
+            r = client.get(f'/protected-proof/{key}', headers=headers)
+            assert r.headers['X-Sendfile'] == app_module.proof_store.path_for(key)
+    finally:
+        file_serving.FILE_OFFLOAD, file_serving.FILE_OFFLOAD_LOCATIONS = saved
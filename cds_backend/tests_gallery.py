@@ -0,0 +1,140 @@
+import io
+from datetime import datetime
+from cds_backend import app as app_module, worker
+from cds_backend.app import app, db, Image, MediaDeletion, bump_collection_version
+from cds_backend.media_storage import MemoryStorage
+
+
+def _add_images(title, taken_at, count):
+    with app.app_context():
+        ids = []
+        for i in range(count):
+            img = Image(filename=f'{title or "untitled"}-{i}.jpg', url=f'https://cdn.test/{title}/{i}.jpg',
+                        public_id=f'gallery/{title}-{i}', title=title, taken_at=taken_at)
+            db.session.add(img)
+            db.session.flush()
+            ids.append(img.id)
+        bump_collection_version("images")
+        db.session.commit()
+        return ids
+
+
+def _collect(client, url, limit):
+    items, cursor = [], None
+    while True:
+        params = {'limit': limit, **({'cursor': cursor} if cursor else {})}
+        data = client.get(url, query_string=params).get_json()
+        items += data['items']
+        cursor = data['next_cursor']
+        if not cursor:
+            return items
+
+
+def test_albums_and_paginated_gallery():
+    older = _add_images('Album Old', datetime(2023, 1, 5), 3)
+    newer = _add_images('Album New/2024', datetime(2024, 6, 1), 5)
+    undated = _add_images('', None, 2)
+    with app.test_client() as client:
+        albums = {a['title']: a for a in client.get('/albums').get_json()}
+        assert albums['Album New/2024']['count'] == 5
+        assert albums['Album New/2024']['cover_url'] == 'https://cdn.test/Album New/2024/0.jpg'
+        assert albums['Album Old']['taken_at'] == '2023-01-05T00:00:00'
+        titles = list(albums)
+        assert titles.index('Album New/2024') < titles.index('Album Old')
+
+        url = albums['Album New/2024']['images_url']
+        assert [i['id'] for i in _collect(client, url, 2)] == newer
+        assert [i['id'] for i in _collect(client, albums['']['images_url'], 1)][-2:] == undated
+
+        ids = [i['id'] for i in _collect(client, '/gallery', 3)]
+        assert len(ids) == len(set(ids))
+        assert ids.index(newer[-1]) < ids.index(older[-1]) < ids.index(undated[-1])
+
+        assert client.get('/gallery', query_string={'cursor': 'bogus'}).status_code == 400
+
+
+class FlakyStorage(MemoryStorage):
+    def __init__(self):
+        super().__init__()
+        self.down = True
+
+    def delete_many(self, keys):
+        if self.down:
+            raise ConnectionError('storage unavailable')
+        return super().delete_many(keys)
+
+
+def test_bulk_delete_drains_outbox_in_batches():
+    storage = FlakyStorage()
+    original = app_module.media_storage, worker.media_storage
+    app_module.media_storage = worker.media_storage = storage
+    try:
+        album = _add_images('Delete Album', datetime(2022, 3, 1), 3)
+        loose = _add_images('Keep Album', datetime(2022, 3, 2), 3)
+        with app.app_context():
+            for img in Image.query.filter(Image.id.in_(album + loose)):
+                storage.put(img.public_id, io.BytesIO(b'x'))
+
+        headers = {'X-ADMIN-KEY': 'admin123'}
+        with app.test_client() as client:
+            assert client.post('/admin/delete-images', json={}, headers=headers).status_code == 400
+            assert client.post('/admin/delete-images', json=[1, 2], headers=headers).status_code == 400
+            r = client.post('/admin/delete-images', json={'album_title': 'Delete Album'}, headers=headers)
+            assert r.get_json()['deleted'] == 3
+            r = client.post('/admin/delete-images', json={'ids': loose[:2]}, headers=headers)
+            assert sorted(r.get_json()['ids']) == loose[:2]
+            assert client.delete(f'/admin/delete-image/{loose[2]}', headers=headers).status_code == 200
+            assert client.delete(f'/admin/delete-image/{loose[2]}', headers=headers).status_code == 404
+
+        with app.app_context():
+            assert Image.query.filter(Image.id.in_(album + loose)).count() == 0
+            assert MediaDeletion.query.count() == 6 and len(storage.objects) == 6
+
+            # storage outage: rows stay queued with a backoff
+            worker.drain_media_deletions()
+            row = MediaDeletion.query.first()
+            assert row.attempts == 1 and row.status == 'queued' and row.run_after > datetime.utcnow()
+            assert 'unavailable' in row.last_error
+
+            storage.down = False
+            MediaDeletion.query.update({'run_after': datetime.utcnow()})
+            db.session.add_all(MediaDeletion(storage_key=f'gallery/old-{i}.jpg') for i in range(150))
+            db.session.commit()
+            worker.run_once()
+            assert MediaDeletion.query.count() == 0 and storage.objects == {}
+            batches = [len(keys) for op, keys in storage.calls if op == 'delete_many']
+            assert max(batches) <= 100 and sum(batches) == 156
+    finally:
+        app_module.media_storage, worker.media_storage = original
+
+
+def test_gallery_variants():
+    from PIL import Image as PILImage
+    buf = io.BytesIO()
+    PILImage.new('RGB', (2400, 1600), color='red').save(buf, 'JPEG')
+    storage = MemoryStorage()
+    original = app_module.media_storage
+    app_module.media_storage = storage
+    try:
+        with app.test_client() as client:
+            r = client.post('/upload-image', data={
+                'album_title': 'Variant Album', 'file': [(io.BytesIO(buf.getvalue()), 'big.jpg')]
+            }, content_type='multipart/form-data')
+            assert r.status_code == 201
+            item = client.get('/albums/Variant Album/images').get_json()['items'][0]
+            assert item['url'].startswith('/media/gallery/')
+            assert set(item['srcset']) == {'webp', 'jpeg'}
+            thumb = client.get(item['variants']['thumb']['webp'])
+            assert thumb.mimetype == 'image/webp'
+            assert PILImage.open(io.BytesIO(thumb.data)).size == (320, 213)
+
+            # deleting the image queues the variants as well
+            image_id = item['id']
+            client.delete(f'/admin/delete-image/{image_id}', headers={'X-ADMIN-KEY': 'admin123'})
+        with app.app_context():
+            queued = {row.storage_key for row in MediaDeletion.query}
+            assert len(queued) == 7 and all(key.startswith('gallery/') for key in queued)
+            MediaDeletion.query.delete()
+            db.session.commit()
+    finally:
+        app_module.media_storage = original
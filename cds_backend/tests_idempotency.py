@@ -0,0 +1,59 @@
+import io
+import threading
+import uuid
+from cds_backend.app import app, Donation, _idempotency_cache
+
+
+def _submit(client, key):
+    return client.post('/donate', data={
+        'fullname': 'Twice', 'email': 'tw@ice.com', 'phone': '083', 'amount': '750',
+        'proof': (io.BytesIO(b"double-click-receipt"), 'receipt.png'),
+        'idempotency_key': key
+    }, content_type='multipart/form-data')
+
+
+def test_parallel_identical_submissions():
+    key = uuid.uuid4().hex
+    n = 8
+    barrier = threading.Barrier(n)
+    results = []
+    lock = threading.Lock()
+
+    def worker():
+        with app.test_client() as client:
+            barrier.wait()
+            r = _submit(client, key)
+            with lock:
+                results.append((r.status_code, r.get_json().get('reference')))
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    statuses = sorted(code for code, _ in results)
+    assert statuses == [201] + [409] * (n - 1), statuses
+    assert len({ref for _, ref in results}) == 1
+
+    with app.app_context():
+        assert Donation.query.filter_by(idempotency_key=key).count() == 1
+
+
+def test_retry_answered_from_cache_or_db():
+    key = uuid.uuid4().hex
+    with app.test_client() as client:
+        first = _submit(client, key)
+        assert first.status_code == 201
+        ref = first.get_json()['reference']
+
+        # served from the in-process cache
+        again = _submit(client, key)
+        assert again.status_code == 409
+        assert again.get_json()['reference'] == ref
+
+        # and from the database once the cache has forgotten it
+        _idempotency_cache.clear()
+        again = _submit(client, key)
+        assert again.status_code == 409
+        assert again.get_json()['reference'] == ref
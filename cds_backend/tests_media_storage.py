@@ -0,0 +1,88 @@
+import io
+import os
+import tempfile
+import time
+from cds_backend.media_storage import LocalStorage, MemoryStorage, create_storage
+from cds_backend.proof_store import ProofStore
+
+
+def _exercise(storage):
+    assert storage.put('gallery/a.jpg', io.BytesIO(b'aaa'), 'image/jpeg') == 'gallery/a.jpg'
+    storage.put('gallery/b.jpg', io.BytesIO(b'bbb'))
+    assert storage.exists('gallery/a.jpg') and not storage.exists('gallery/c.jpg')
+    with storage.open('gallery/b.jpg') as f:
+        assert f.read() == b'bbb'
+    assert storage.url('gallery/a.jpg') == '/media/gallery/a.jpg'
+    assert storage.delete('gallery/a.jpg') and not storage.delete('gallery/a.jpg')
+    assert storage.delete_many(['gallery/b.jpg', 'gallery/c.jpg']) == ['gallery/b.jpg']
+    try:
+        storage.open('gallery/b.jpg')
+        assert False, 'deleted key still readable'
+    except FileNotFoundError:
+        pass
+
+
+def test_storage_backends():
+    root = tempfile.mkdtemp(prefix='cds_media_')
+    local = create_storage('local', root=root)
+    _exercise(local)
+    try:
+        local.local_path('../escape.jpg')
+        assert False, 'key outside the root accepted'
+    except ValueError:
+        pass
+    _exercise(create_storage('memory'))
+
+    # files land under the root, so the app can serve them directly
+    disk = LocalStorage(tempfile.mkdtemp(prefix='cds_media_'), base_url='/files/')
+    disk.put('proofs/ab/x.pdf', io.BytesIO(b'%PDF'))
+    path = disk.local_path('proofs/ab/x.pdf')
+    assert path.startswith(disk.root + os.sep) and os.path.isfile(path)
+    with disk.open('proofs/ab/x.pdf') as f:
+        assert f.read() == b'%PDF'
+    assert disk.url('proofs/ab/x.pdf') == '/files/proofs/ab/x.pdf'
+    assert disk.delete('proofs/ab/x.pdf') and not os.path.exists(path)
+    assert os.listdir(disk.tmp_dir) == []  # the upload temp file was moved, not copied
+
+    slow = MemoryStorage(latency=0.05)
+    started = time.perf_counter()
+    slow.put('k', io.BytesIO(b'x'))
+    slow.delete_many(['k'])
+    assert time.perf_counter() - started >= 0.1
+    assert [op for op, _ in slow.calls] == ['put', 'delete_many']
+
+
+def test_proof_store_on_remote_backend():
+    remote = MemoryStorage()
+    store = ProofStore(tempfile.mkdtemp(prefix='cds_proofs_'), remote)
+    key, size, created = store.save_stream(io.BytesIO(b'%PDF-1.4 proof'), 'pdf')
+    assert created and size == 14 and store.exists(key)
+    assert store.path_for(key) is None
+    assert list(remote.objects) == [store.storage_key(key)]
+    assert store.save_stream(io.BytesIO(b'%PDF-1.4 proof'), 'pdf') == (key, 14, False)
+
+    # checks run on a temporary copy and the thumbnail they write is uploaded
+    with store.working_copy(key) as (path, thumb_path):
+        with open(path, 'rb') as f:
+            assert f.read() == b'%PDF-1.4 proof'
+        with open(thumb_path, 'wb') as f:
+            f.write(b'thumb')
+    assert not os.path.exists(path)
+    assert store.has_thumbnail(key) and store.open(key, thumbnail=True).read() == b'thumb'
+
+    assert store.delete(key) and remote.objects == {}
+
+
+def test_cloudinary_variants_are_transformation_urls():
+    import cloudinary
+    from cds_backend.media_storage import CloudinaryStorage
+    previous = cloudinary.config().cloud_name
+    cloudinary.config(cloud_name='demo')
+    try:
+        storage = CloudinaryStorage()
+        url = storage.variant_url('gallery/abc.jpg', 320, 'webp')
+        assert url.startswith('https://res.cloudinary.com/demo/image/upload/')
+        assert 'w_320' in url and 'c_limit' in url and url.endswith('gallery/abc.webp')
+        assert storage.url('gallery/abc.jpg').endswith('/gallery/abc')
+    finally:
+        cloudinary.config(cloud_name=previous)
@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+import tempfile
+from cds_backend import app as app_module
+from cds_backend import media_storage
+from cds_backend.app import app
+from cds_backend.media_storage import CloudinaryStorage
+
+
+def _sample(text, line_prefix):
+    return next(float(line.rsplit(' ', 1)[1]) for line in text.splitlines() if line.startswith(line_prefix))
+
+
+def test_metrics_endpoint():
+    with app.test_client() as client:
+        assert client.get('/stats').status_code == 200
+        assert client.get('/no-such-page.html').status_code == 404
+
+        # Cloudinary calls are timed through the storage observer
+        storage = CloudinaryStorage()
+        storage.observer = app_module.metrics.observe_storage_call
+        destroy = media_storage.cloudinary.uploader.destroy
+        media_storage.cloudinary.uploader.destroy = lambda *a, **kw: {'result': 'ok'}
+        try:
+            assert storage.delete('gallery/x.jpg')
+        finally:
+            media_storage.cloudinary.uploader.destroy = destroy
+
+        r = client.get('/metrics')
+        assert r.status_code == 200 and r.mimetype == 'text/plain'
+        text = r.get_data(as_text=True)
+        assert _sample(text, 'http_requests_total{method="GET",route="/stats",status="200"}') >= 1
+        assert _sample(text, 'http_request_duration_seconds_count{method="GET",route="/stats"}') >= 1
+        assert 'route="<unmatched>"' in text or 'route="/<path:path>",status="404"' in text
+        assert _sample(text, 'db_queries_total{route="/stats"}') >= 1
+        assert _sample(text, 'http_requests_in_flight{route="/metrics"}') == 1
+        assert _sample(text, 'db_pool_checkouts_total') >= 1
+        assert _sample(text, 'media_storage_call_duration_seconds_count{backend="cloudinary",operation="destroy"}') == 1
+
+        app_module.METRICS_TOKEN = 'scrape'
+        try:
+            assert client.get('/metrics').status_code == 401
+            assert client.get('/metrics', headers={'Authorization': 'Bearer scrape'}).status_code == 200
+        finally:
+            app_module.METRICS_TOKEN = None
+
+
+def test_metrics_merge_across_worker_processes():
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=tempfile.mkdtemp(prefix='cds_prom_'))
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    worker = (
+        "import sys; sys.path.insert(0, %r)\n"
+        "from cds_backend import metrics\n"
+        "metrics.REQUESTS.labels('GET', '/stats', '200').inc()\n"
+        "metrics.IN_FLIGHT.labels('/stats').inc()\n"
+        "import os; print(os.getpid())\n" % root
+    )
+    pids = [int(subprocess.run([sys.executable, '-c', worker], env=env, check=True,
+                               capture_output=True, text=True).stdout) for _ in range(2)]
+
+    def scrape(dead=None):
+        return subprocess.run(
+            [sys.executable, '-c', "import sys; sys.path.insert(0, %r)\n"
+                                   "from cds_backend import metrics\n"
+                                   "if %r: metrics.mark_process_dead(%r)\n"
+                                   "sys.stdout.write(metrics.render()[0].decode())" % (root, dead, dead)],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+
+    out = scrape()
+    assert _sample(out, 'http_requests_total{method="GET",route="/stats",status="200"}') == 2
+    assert _sample(out, 'http_requests_in_flight{route="/stats"}') == 2
+    # counters survive a worker exit, its live gauges do not
+    out = scrape(dead=pids[0])
+    assert _sample(out, 'http_requests_total{method="GET",route="/stats",status="200"}') == 2
+    assert _sample(out, 'http_requests_in_flight{route="/stats"}') == 1
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import sqlalchemy as sa
+from cds_backend.app import db
+from cds_backend import migrations
+
+
+def _engine():
+    path = os.path.join(tempfile.mkdtemp(prefix='cds_migrations_'), 'schema.db')
+    return sa.create_engine(f"sqlite:///{path}")
+
+
+def test_fresh_database_matches_models():
+    engine = _engine()
+    applied = migrations.upgrade(engine)
+    assert applied == [v for v, _, _ in migrations.discover()]
+    assert migrations.upgrade(engine) == []
+
+    inspector = sa.inspect(engine)
+    for table in db.metadata.sorted_tables:
+        columns = {c['name'] for c in inspector.get_columns(table.name)}
+        assert {c.name for c in table.columns} <= columns, table.name
+        indexes = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        assert {ix.name for ix in table.indexes} <= indexes, table.name
+
+
+def test_upgrades_legacy_database():
+    # what an old deployment looks like: create_all() tables, no url/public_id, no schema_version
+    engine = _engine()
+    with engine.begin() as conn:
+        conn.execute(sa.text("CREATE TABLE images (id INTEGER PRIMARY KEY, filename VARCHAR(255) NOT NULL, "
+                             "title VARCHAR(255), taken_at DATETIME, uploaded_at DATETIME)"))
+        conn.execute(sa.text("INSERT INTO images (filename, title) VALUES ('a.png', 'Old album')"))
+
+    migrations.upgrade(engine, target=2)
+    assert migrations.current_version(engine) == 2
+    assert [v for v, _ in migrations.pending(engine)] == [v for v, _, _ in migrations.discover() if v > 2]
+
+    migrations.upgrade(engine)
+    with engine.begin() as conn:
+        assert migrations.has_column(conn, 'images', 'public_id')
+        assert migrations.has_column(conn, 'donations', 'processing_status')
+        assert conn.execute(sa.text("SELECT title FROM images")).scalar() == 'Old album'
@@ -0,0 +1,131 @@
+import io
+import uuid
+from cds_backend.app import app, db, Donation, Job, ProofBlob, proof_store
+from cds_backend import worker
+
+
+def _png_bytes():
+    from PIL import Image as PILImage
+    buf = io.BytesIO()
+    PILImage.new('RGB', (40, 30), color='green').save(buf, 'PNG')
+    return buf.getvalue()
+
+
+def _donate(client, payload, name):
+    r = client.post('/donate', data={
+        'fullname': 'Proc', 'email': 'p@p.com', 'phone': '082', 'amount': '100',
+        'proof': (io.BytesIO(payload), name),
+        'idempotency_key': uuid.uuid4().hex
+    }, content_type='multipart/form-data')
+    assert r.status_code == 201
+    return r.get_json()['reference']
+
+
+def test_worker_processes_queued_proofs():
+    with app.test_client() as client:
+        good = _donate(client, _png_bytes(), 'good.png')
+        fake = _donate(client, b"not really a png", 'fake.png')
+        pdf = _donate(client, b"%PDF-1.4\n1 0 obj << /Type /Page >> endobj\n%%EOF", 'proof.pdf')
+        # pages inside a compressed object stream: the count is unknown, not zero
+        packed = _donate(client, b"%PDF-1.5\n1 0 obj << /Type /ObjStm /Filter /FlateDecode >> stream\nx\x9c"
+                                 b"\nendstream endobj\n%%EOF", 'receipt.pdf')
+
+        with app.app_context():
+            assert Donation.query.filter_by(reference=good).first().processing_status == 'queued'
+
+        worker.main(once=True)
+
+        with app.app_context():
+            done = Donation.query.filter_by(reference=good).first()
+            assert done.processing_status == 'done'
+            assert Donation.query.filter_by(reference=fake).first().processing_status == 'rejected'
+            assert Donation.query.filter_by(reference=pdf).first().processing_status == 'done'
+            packed = Donation.query.filter_by(reference=packed).first()
+            assert packed.processing_status == 'done'
+            assert db.session.get(ProofBlob, packed.proof_filename).page_count is None
+            assert Job.query.filter_by(status='queued').count() == 0
+            key = done.proof_filename
+
+        r = client.get('/pending-donations', headers={'X-ADMIN-KEY': 'admin123'})
+        pend = {p['reference']: p for p in r.get_json()['items']}
+        assert pend[fake]['processing_status'] == 'rejected'
+        assert pend[fake]['processing_error']
+
+        r = client.get(f'/protected-proof/{key}', query_string={'variant': 'thumb'}, headers={'X-ADMIN-KEY': 'admin123'})
+        assert r.status_code == 200
+        assert r.data.startswith(b"\xff\xd8\xff")
+
+
+def test_proof_variants_are_srcset_ready():
+    from PIL import Image as PILImage
+    buf = io.BytesIO()
+    PILImage.new('RGB', (1200, 800), color='blue').save(buf, 'PNG')
+    headers = {'X-ADMIN-KEY': 'admin123'}
+    with app.test_client() as client:
+        ref = _donate(client, buf.getvalue(), 'screenshot.png')
+        pdf = _donate(client, b"%PDF-1.4\n1 0 obj << /Type /Page >> endobj\n%%EOF variants", 'doc.pdf')
+        worker.main(once=True)
+
+        pend = {p['reference']: p for p in client.get('/pending-donations', headers=headers).get_json()['items']}
+        assert pend[pdf]['proof_variants'] is None
+        variants = pend[ref]['proof_variants']
+        assert set(variants['variants']) == {'thumb', 'medium', 'full'}
+        assert variants['srcset']['webp'].endswith(' 1920w') and ' 320w, ' in variants['srcset']['webp']
+
+        r = client.get(variants['variants']['medium']['webp'], headers=headers)
+        assert r.status_code == 200 and r.mimetype == 'image/webp'
+        assert PILImage.open(io.BytesIO(r.data)).size == (960, 640)
+        # never upscaled
+        r = client.get(variants['variants']['full']['jpeg'], headers=headers)
+        assert PILImage.open(io.BytesIO(r.data)).size == (1200, 800)
+        assert client.get(variants['variants']['thumb']['jpeg']).status_code == 401
+        # the JPEG thumb is the thumbnail, not a second copy of it
+        r = client.get(variants['variants']['thumb']['jpeg'], headers=headers)
+        thumb = client.get(f"/protected-proof/{pend[ref]['proof_filename']}", headers=headers,
+                           query_string={'variant': 'thumb'})
+        assert r.status_code == 200 and r.data == thumb.data
+
+
+def test_no_stored_variants_when_storage_resizes_on_delivery():
+    from PIL import Image as PILImage
+    buf = io.BytesIO()
+    PILImage.new('RGB', (1000, 700), color='red').save(buf, 'PNG')
+    headers = {'X-ADMIN-KEY': 'admin123'}
+    storage = proof_store.storage
+    storage.resizes_on_delivery = True
+    storage.variant_url = lambda key, width, fmt: f'https://cdn.example/w_{width}/{key}.{fmt}'
+    try:
+        with app.test_client() as client:
+            ref = _donate(client, buf.getvalue(), 'delivered.png')
+            worker.main(once=True)
+            item = next(p for p in client.get('/pending-donations', headers=headers).get_json()['items']
+                        if p['reference'] == ref)
+            key = item['proof_filename']
+            assert not storage.exists(proof_store.variant_key(key, 'medium', 'webp'))
+            r = client.get(item['proof_variants']['variants']['medium']['webp'], headers=headers)
+            assert r.status_code == 302
+            assert r.headers['Location'] == f'https://cdn.example/w_960/{proof_store.storage_key(key)}.webp'
+    finally:
+        del storage.resizes_on_delivery, storage.variant_url
+
+
+def test_failed_insert_leaves_proof_removal_to_the_worker():
+    from datetime import datetime
+    from cds_backend.app import discard_proof, retain_proof
+    run = uuid.uuid4().hex.encode()
+    with app.app_context():
+        orphan, _, _ = proof_store.save_stream(io.BytesIO(b'%PDF-1.4 orphan ' + run), 'pdf')
+        shared, size, _ = proof_store.save_stream(io.BytesIO(b'%PDF-1.4 shared ' + run), 'pdf')
+        discard_proof(orphan, True)
+        discard_proof(shared, True)
+        # nothing is deleted while a concurrent identical upload may still commit
+        assert proof_store.exists(orphan) and proof_store.exists(shared)
+        retain_proof(shared, size)
+        Job.query.filter_by(kind='discard_proof').update({'run_after': datetime.utcnow()})
+        db.session.commit()
+
+    worker.main(once=True)
+    with app.app_context():
+        assert not proof_store.exists(orphan)
+        assert proof_store.exists(shared)
+        assert Job.query.filter_by(kind='discard_proof').count() == 0
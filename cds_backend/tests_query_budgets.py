@@ -0,0 +1,71 @@
+import io
+import uuid
+from cds_backend import app as app_module
+from cds_backend.app import app, generate_admin_token
+from cds_backend.query_profiler import count_queries
+
+
+def assert_query_budget(client, budget, method, url, **kwargs):
+    """Call *url* and fail if it ran more than *budget* SQL statements."""
+    with count_queries() as statements:
+        resp = client.open(url, method=method, **kwargs)
+    assert len(statements) <= budget, (
+        f"{method} {url}: {len(statements)} queries (budget {budget}):\n" + "\n".join(statements)
+    )
+    return resp
+
+
+def test_endpoint_query_budgets():
+    headers = {'Authorization': f"Bearer {generate_admin_token('budget')}"}
+    with app.test_client() as client:
+        r = assert_query_budget(client, 3, 'POST', '/admin/bank-accounts', headers=headers,
+                                json={'bank_name': 'Budget', 'account_name': 'B', 'account_number': '9'})
+        bank_id = r.get_json()['id']
+        r = assert_query_budget(client, 5, 'POST', '/donate', content_type='multipart/form-data', data={
+            'fullname': 'Q', 'email': 'q@b', 'phone': '0', 'amount': '5', 'bank_account_id': str(bank_id),
+            'proof': (io.BytesIO(b'budget proof'), 'p.png'), 'idempotency_key': uuid.uuid4().hex,
+        })
+        assert r.status_code == 201
+        reference = r.get_json()['reference']
+
+        assert_query_budget(client, 2, 'GET', '/bank-accounts')  # version + reload after the write
+        assert_query_budget(client, 1, 'GET', '/bank-accounts')  # warm: the version the ETag already read
+        # the bank account comes from the snapshot, not a second lookup per status check
+        assert_query_budget(client, 2, 'GET', f'/donation-status/{reference}')
+        assert_query_budget(client, 2, 'GET', '/pending-donations', headers=headers)
+        assert_query_budget(client, 5, 'POST', '/admin/validate-donation', headers=headers, json={'reference': reference})
+        for url in ('/stats', '/gallery', '/paid-users'):
+            assert_query_budget(client, 2, 'GET', url)
+        assert_query_budget(client, 3, 'GET', '/albums')  # covers come in one batch, whatever the album count
+
+
+def test_profiler_headers_n_plus_one_and_explain():
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from cds_backend import query_profiler
+    # switched off, it leaves every query alone
+    with app.test_client() as client:
+        assert 'X-Query-Count' not in client.get('/paid-users').headers
+    assert not event.contains(Engine, 'after_cursor_execute', query_profiler._after_cursor_execute)
+
+    logged = []
+    profiler = app_module.query_profiler
+    saved = app_module.QUERY_PROFILER, profiler.log, profiler.slow_ms
+    app_module.QUERY_PROFILER, profiler.log, profiler.slow_ms = True, logged.append, 0
+    try:
+        with app.test_client() as client:
+            r = client.get('/paid-users')
+            assert int(r.headers['X-Query-Count']) >= 1
+            assert any(t.startswith('db;dur=') for t in r.headers.getlist('Server-Timing'))
+        assert any(line.startswith('Slow query in paid_users') and 'plan:' in line for line in logged)
+
+        # the same statement over and over is reported once as N+1
+        with app.test_request_context('/'):
+            profiler.start()
+            app_module.g.query_log += [('SELECT * FROM images WHERE id = ?', (i,), 0.0) for i in range(6)]
+            profiler.slow_ms = 1e9
+            resp = profiler.finish(app.response_class(), app_module.db.engine, 'gallery_list')
+        assert resp.headers['X-Query-Count'] == '6'
+        assert logged[-1] == 'N+1 in gallery_list: 6x SELECT * FROM images WHERE id = ?'
+    finally:
+        app_module.QUERY_PROFILER, profiler.log, profiler.slow_ms = saved
@@ -0,0 +1,65 @@
+import gzip
+import os
+import tempfile
+from cds_backend import app as app_module
+from cds_backend import static_assets
+from cds_backend.app import app
+
+
+def _write(root, rel, data):
+    path = os.path.join(root, *rel.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def test_manifest_serves_precompressed_assets():
+    # the app's own manifest covers the frontend but never the backend sources
+    assert 'frontend_cds/admin.html' in app_module.static_manifest and 'admin.html' in app_module.static_manifest
+    assert not any(url.startswith('cds_backend/') for url in app_module.static_manifest)
+    # receipts stay private whatever GALLERY_FOLDER is set to
+    assert not any(url.startswith('gallery_images/') for url in app_module.static_manifest)
+
+    root = tempfile.mkdtemp(prefix='cds_static_')
+    page = b'<html>' + b'<p>hello</p>' * 200 + b'</html>'
+    _write(root, 'index.html', page)
+    _write(root, 'frontend_cds/index.html', b'shadowed')
+    _write(root, 'frontend_cds/app.0123abcd.js', b'console.log(1);' * 50)
+    _write(root, 'image/logo.png', b'\x89PNG fake')
+    _write(root, 'backend/secret.js', b'no')
+    _write(root, 'image/1766918724_proof.png', b'receipt')
+    manifest = static_assets.build_manifest(root, ('', 'frontend_cds', 'image'), exclude=(os.path.join(root, 'backend'),))
+    assert manifest['index.html'].path == os.path.join(root, 'index.html')
+    assert 'logo.png' in manifest and 'backend/secret.js' not in manifest
+    assert '1766918724_proof.png' not in manifest
+    assert set(manifest['index.html'].encodings) == {'gzip'} | ({'br'} if static_assets.brotli else set())
+    assert manifest['logo.png'].encodings == {}
+
+    saved = app_module.static_manifest
+    app_module.static_manifest = manifest
+    try:
+        with app.test_client() as client:
+            r = client.get('/', headers={'Accept-Encoding': 'gzip'})
+            assert r.status_code == 200 and r.headers['Content-Encoding'] == 'gzip'
+            assert gzip.decompress(r.data) == page and r.mimetype == 'text/html'
+            assert 'Accept-Encoding' in r.headers['Vary'] and r.headers['Cache-Control'] == 'public, no-cache'
+            assert client.get('/', headers={'If-None-Match': r.headers['ETag'], 'Accept-Encoding': 'gzip'}).status_code == 304
+
+            r = client.get('/index.html', headers={'Accept-Encoding': 'identity'})
+            assert r.data == page and 'Content-Encoding' not in r.headers
+            assert client.get('/index.html', headers={'Range': 'bytes=0-5'}).data == b'<html>'
+
+            assert client.get('/app.0123abcd.js').headers['Cache-Control'] == static_assets.IMMUTABLE
+            r = client.get('/logo.png', query_string={'v': manifest['logo.png'].hash})
+            assert r.headers['Cache-Control'] == static_assets.IMMUTABLE and r.data == b'\x89PNG fake'
+            assert client.get('/secret.js').status_code == 404
+    finally:
+        app_module.static_manifest = saved
+
+    # an edited source gets fresh variants on the next build
+    path = _write(root, 'index.html', page + b'<!-- v2 -->')
+    os.utime(path, (os.stat(path).st_mtime + 5,) * 2)
+    rebuilt = static_assets.build_manifest(root, ('',), exclude=(os.path.join(root, 'backend'),))
+    with open(rebuilt['index.html'].encodings['gzip'].path, 'rb') as f:
+        assert gzip.decompress(f.read()).endswith(b'<!-- v2 -->')
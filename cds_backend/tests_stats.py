@@ -0,0 +1,51 @@
+import io
+import uuid
+from cds_backend.app import app, compute_donation_stats
+from cds_backend.rebuild_stats import drift, stored_stats
+
+
+def test_stats_follow_validations():
+    headers = {'X-ADMIN-KEY': 'admin123'}
+    with app.test_client() as client:
+        before = client.get('/stats').get_json()
+
+        refs = []
+        for amount in (1200, 800, 50):
+            r = client.post('/donate', data={
+                'fullname': 'Stats', 'email': 's@s.com', 'phone': '086', 'amount': str(amount),
+                'proof': (io.BytesIO(f"stats-{amount}".encode()), 'receipt.png'),
+                'idempotency_key': uuid.uuid4().hex
+            }, content_type='multipart/form-data')
+            refs.append(r.get_json()['reference'])
+
+        client.post('/admin/validate-donation', headers=headers, json={'reference': refs[0]})
+        client.post('/admin/validate-donations', headers=headers, json={'references': refs})
+
+        after = client.get('/stats').get_json()
+        assert after['total_raised'] - before['total_raised'] == 2050
+        assert after['donation_count'] - before['donation_count'] == 3
+        assert sum(d['total'] for d in after['by_day']) >= 2050
+        unassigned = next(a for a in after['by_bank_account'] if a['bank_account_id'] is None)
+        assert unassigned['total'] >= 2050
+
+        with app.app_context():
+            assert drift(compute_donation_stats(), stored_stats()) == []
+
+
+def test_stats_window_bounds_and_daily_etag():
+    from datetime import date
+    from cds_backend import app as app_module
+    with app.test_client() as client:
+        for days in ('-100000000', '0', '100000000'):
+            assert client.get('/stats', query_string={'days': days}).status_code == 200
+        assert client.get('/stats', query_string={'days': 'x'}).status_code == 400
+
+        etag = client.get('/stats').headers['ETag']
+        assert client.get('/stats', headers={'If-None-Match': etag}).status_code == 304
+        # after midnight the by_day window moves, so yesterday's ETag no longer matches
+        today = app_module.utc_today
+        app_module.utc_today = lambda: date(2999, 1, 1)
+        try:
+            assert client.get('/stats', headers={'If-None-Match': etag}).status_code == 200
+        finally:
+            app_module.utc_today = today
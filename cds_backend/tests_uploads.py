@@ -0,0 +1,123 @@
+import io
+import time
+import uuid
+from cds_backend import app as app_module
+from cds_backend.app import app, Image, Donation, proof_store
+from cds_backend.media_storage import MemoryStorage
+
+UPLOAD_LATENCY = 0.2
+
+
+class StubStorage(MemoryStorage):
+    """Remote-like storage that refuses files whose content starts with 'bad'."""
+
+    def put(self, key, stream, content_type=None):
+        key = super().put(key, stream, content_type)
+        if self.objects[key].startswith(b'bad'):
+            raise RuntimeError('rejected by stub')
+        return key
+
+
+def _upload(client, names):
+    return client.post('/upload-image', data={
+        'album_title': 'Parallel Album', 'album_date': '2024-02-03',
+        'file': [(io.BytesIO(name.encode()), name) for name in names],
+    }, content_type='multipart/form-data')
+
+
+def test_uploads_run_in_parallel():
+    original_storage, original_concurrency = app_module.media_storage, app_module.UPLOAD_CONCURRENCY
+    app_module.media_storage = StubStorage(latency=UPLOAD_LATENCY)
+    try:
+        names = [f'photo{i}.jpg' for i in range(8)]
+        with app.test_client() as client:
+            app_module.UPLOAD_CONCURRENCY = 1
+            started = time.perf_counter()
+            assert _upload(client, names).status_code == 201
+            serial = time.perf_counter() - started
+
+            app_module.UPLOAD_CONCURRENCY = 8
+            started = time.perf_counter()
+            r = _upload(client, names + ['bad.jpg', 'notes.txt'])
+            parallel = time.perf_counter() - started
+
+        assert serial >= len(names) * UPLOAD_LATENCY
+        assert parallel < serial / 3, (serial, parallel)
+
+        data = r.get_json()
+        assert r.status_code == 201
+        assert data['uploaded'] == 8 and data['failed'] == 2
+        results = {res['filename']: res for res in data['results']}
+        assert results['photo3.jpg']['ok'] and results['photo3.jpg']['url'].startswith('/media/gallery/')
+        assert results['bad.jpg'] == {'filename': 'bad.jpg', 'ok': False, 'error': 'Upload failed'}
+        assert not results['notes.txt']['ok']
+
+        with app.app_context():
+            assert Image.query.filter_by(title='Parallel Album').count() == 16
+            assert client.get(results['photo3.jpg']['url']).data == b'photo3.jpg'
+    finally:
+        app_module.media_storage, app_module.UPLOAD_CONCURRENCY = original_storage, original_concurrency
+
+
+def test_chunked_upload_resumes_and_finalizes():
+    payload = b'%PDF-1.4 ' + bytes(range(256)) * 40  # 10249 bytes
+    chunk = 4096
+    with app.test_client() as client:
+        r = client.post('/uploads', json={'filename': 'receipt.pdf', 'size': len(payload),
+                                          'kind': 'proof', 'chunk_size': chunk})
+        assert r.status_code == 201
+        upload_id = r.get_json()['upload_id']
+        assert client.post('/uploads', json={'filename': 'x.exe', 'size': 10, 'kind': 'proof'}).status_code == 400
+        assert client.post('/uploads', json=['receipt.pdf', 10]).status_code == 400
+        for bad in (0, -1, 'big', 1.5, True):
+            r = client.post('/uploads', json={'filename': 'r.pdf', 'size': 10, 'kind': 'proof', 'chunk_size': bad})
+            assert r.status_code == 400, bad
+
+        # the last chunk arrives first, then a connection drop loses chunk 1
+        r = client.put(f'/uploads/{upload_id}/chunks/2', data=payload[2 * chunk:])
+        assert r.get_json()['received'] == [[2 * chunk, len(payload)]]
+        client.put(f'/uploads/{upload_id}/chunks/0', query_string={'offset': 0}, data=payload[:chunk])
+        assert client.put(f'/uploads/{upload_id}/chunks/1', query_string={'offset': 1},
+                          data=payload[chunk:2 * chunk]).status_code == 400
+        assert client.put(f'/uploads/{upload_id}/chunks/1', data=payload[chunk:chunk + 10]).status_code == 400
+
+        status = client.get(f'/uploads/{upload_id}').get_json()
+        assert status['received'] == [[0, chunk], [2 * chunk, len(payload)]] and not status['complete']
+        assert client.post(f'/uploads/{upload_id}/finalize', json={}).status_code == 409
+
+        client.put(f'/uploads/{upload_id}/chunks/1', data=payload[chunk:2 * chunk])
+        assert client.get(f'/uploads/{upload_id}').get_json()['complete']
+        # a bad retry of a chunk that already arrived leaves its bytes alone
+        for body in (b'short', payload[:chunk] + b'!'):
+            assert client.put(f'/uploads/{upload_id}/chunks/0', data=body).status_code == 400
+        assert client.get(f'/uploads/{upload_id}').get_json()['complete']
+
+        # rejected form fields keep the session so finalize can be retried
+        assert client.post(f'/uploads/{upload_id}/finalize', json={'idempotency_key': 'k'}).status_code == 400
+        assert client.post(f'/uploads/{upload_id}/finalize', json=['Chunked Donor']).status_code == 400
+        r = client.post(f'/uploads/{upload_id}/finalize', json={
+            'fullname': 'Chunked Donor', 'email': 'c@x.com', 'phone': '090', 'amount': '700',
+            'idempotency_key': uuid.uuid4().hex
+        })
+        assert r.status_code == 201, r.get_json()
+        ref = r.get_json()['reference']
+        assert client.get(f'/uploads/{upload_id}').status_code == 404
+
+        with app.app_context():
+            key = Donation.query.filter_by(reference=ref).one().proof_filename
+            with open(proof_store.path_for(key), 'rb') as f:
+                assert f.read() == payload
+
+
+def test_chunked_upload_to_gallery():
+    original_storage = app_module.media_storage
+    app_module.media_storage = StubStorage()
+    try:
+        with app.test_client() as client:
+            upload_id = client.post('/uploads', json={'filename': 'big.jpg', 'size': 5, 'kind': 'image'}).get_json()['upload_id']
+            client.put(f'/uploads/{upload_id}/chunks/0', data=b'jpeg!')
+            r = client.post(f'/uploads/{upload_id}/finalize', data={'album_title': 'Chunked Album'})
+            assert r.status_code == 201
+            assert client.get(r.get_json()['url']).data == b'jpeg!'
+    finally:
+        app_module.media_storage = original_storage
@@ -0,0 +1,141 @@
+"""
+Resumable chunked uploads.
+
+A session is a directory holding ``meta.json``, a ``data`` file preallocated
+to the declared size, and one empty marker file per received chunk named
+``<start>-<end>``. Chunks are checked in a temporary file, then written in
+place at their offset, so they can arrive in any order, be retried, or be
+sent by several workers at once without a shared index to lock. Only the filesystem is touched here; the
+routes in app.py hand a finished file to the donation or gallery path.
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+
+CHUNK_SIZE = 64 * 1024
+
+_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+_MARKER_RE = re.compile(r"^(\d+)-(\d+)$")
+
+
+class UploadSessionError(Exception):
+    """The request does not fit the session (bad offset or size)."""
+
+
+class UploadNotFound(UploadSessionError):
+    """No such session, or it has expired."""
+
+
+class UploadSessions:
+    def __init__(self, root, ttl=24 * 3600):
+        self.root = root
+        self.ttl = ttl
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, upload_id):
+        if not _ID_RE.match(upload_id or ""):
+            raise UploadNotFound("Unknown upload")
+        return os.path.join(self.root, upload_id)
+
+    def create(self, filename, size, chunk_size, **meta):
+        """Start a session for *size* bytes; returns the upload id."""
+        if size <= 0 or chunk_size <= 0:
+            raise UploadSessionError("size and chunk_size must be positive")
+        upload_id = uuid.uuid4().hex
+        path = self._dir(upload_id)
+        os.makedirs(os.path.join(path, "chunks"))
+        with open(os.path.join(path, "data"), "wb") as f:
+            f.truncate(size)
+        meta = dict(meta, filename=filename, size=size, chunk_size=chunk_size, created_at=time.time())
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        return upload_id
+
+    def meta(self, upload_id):
+        try:
+            with open(os.path.join(self._dir(upload_id), "meta.json")) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            raise UploadNotFound("Unknown upload")
+        if meta["created_at"] + self.ttl < time.time():
+            raise UploadNotFound("Upload expired")
+        return meta
+
+    def write_chunk(self, upload_id, index, stream, offset=None):
+        """Write chunk *index* from *stream*; returns the received ranges.
+
+        *offset*, when given, must match ``index * chunk_size``. Only the last
+        chunk may be shorter than chunk_size.
+        """
+        meta = self.meta(upload_id)
+        size, chunk_size = meta["size"], meta["chunk_size"]
+        start = index * chunk_size
+        if index < 0 or start >= size or (offset is not None and offset != start):
+            raise UploadSessionError("Chunk offset out of range")
+        expected = min(chunk_size, size - start)
+
+        path = self._dir(upload_id)
+        # staged and checked first, so a bad retry of a chunk that already
+        # arrived cannot overwrite its bytes
+        fd, tmp_path = tempfile.mkstemp(dir=path, prefix=".chunk-")
+        try:
+            with os.fdopen(fd, "w+b") as tmp:
+                written = 0
+                while True:
+                    data = stream.read(min(CHUNK_SIZE, expected - written + 1))
+                    if not data:
+                        break
+                    written += len(data)
+                    if written > expected:
+                        raise UploadSessionError(f"Chunk larger than {expected} bytes")
+                    tmp.write(data)
+                if written != expected:
+                    raise UploadSessionError(f"Chunk has {written} bytes, expected {expected}")
+                tmp.seek(0)
+                with open(os.path.join(path, "data"), "r+b") as out:
+                    out.seek(start)
+                    shutil.copyfileobj(tmp, out, CHUNK_SIZE)
+        finally:
+            os.remove(tmp_path)
+        open(os.path.join(path, "chunks", f"{start}-{start + written}"), "w").close()
+        return self.received(upload_id)
+
+    def received(self, upload_id):
+        """Merged ``[start, end)`` byte ranges received so far."""
+        spans = []
+        for name in os.listdir(os.path.join(self._dir(upload_id), "chunks")):
+            m = _MARKER_RE.match(name)
+            if m:
+                spans.append((int(m.group(1)), int(m.group(2))))
+        ranges = []
+        for start, end in sorted(spans):
+            if ranges and start <= ranges[-1][1]:
+                ranges[-1][1] = max(ranges[-1][1], end)
+            else:
+                ranges.append([start, end])
+        return ranges
+
+    def is_complete(self, upload_id):
+        return self.received(upload_id) == [[0, self.meta(upload_id)["size"]]]
+
+    def data_path(self, upload_id):
+        return os.path.join(self._dir(upload_id), "data")
+
+    def delete(self, upload_id):
+        shutil.rmtree(self._dir(upload_id), ignore_errors=True)
+
+    def purge_expired(self):
+        """Remove sessions older than the TTL; returns how many were removed."""
+        removed = 0
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if _ID_RE.match(name) and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        return removed
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Background worker for jobs queued in the `jobs` table.
+
+/donate only stores the raw proof and the pending row; this process runs the
+expensive checks (MIME sniffing, image decoding, PDF page counts, thumbnails)
+and records the outcome on the donation's processing_status, and removes
+proofs that a failed donation insert left unreferenced. It also drains the
+media_deletions outbox left behind by image deletes, in batches.
+
+Usage: python cds_backend/worker.py [--once]
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from cds_backend.app import (
+    app, db, Donation, Job, MediaDeletion, ProofBlob, media_storage, proof_store, file_extension,
+)
+from cds_backend import derivatives
+from cds_backend.proof_processing import ProofRejected, inspect_proof
+from cds_backend.proof_store import THUMBNAIL_VARIANT
+
+POLL_INTERVAL = float(os.environ.get("WORKER_POLL_INTERVAL", 2))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 5))
+JOB_LOCK_TIMEOUT = int(os.environ.get("JOB_LOCK_TIMEOUT", 600))
+MEDIA_DELETE_BATCH_SIZE = min(int(os.environ.get("MEDIA_DELETE_BATCH_SIZE", 100)), 100)
+
+
+# Job handlers
+def process_proof(payload):
+    donation = Donation.query.filter_by(reference=payload["reference"]).first()
+    if not donation:
+        return  # removed (e.g. reset) before the worker got to it
+
+    key = donation.proof_filename
+    blob = db.session.get(ProofBlob, key) if proof_store.is_key(key) else None
+    if not blob or not proof_store.exists(key):
+        donation.processing_status = "failed"
+        donation.processing_error = "Proof file not found"
+        return
+
+    # Identical bytes were already checked for an earlier donation
+    if blob.processed_at is None:
+        try:
+            with proof_store.working_copy(key) as (path, thumb_path):
+                result = inspect_proof(path, file_extension(key), thumb_path)
+                # backends that resize on delivery need nothing stored, and
+                # inspect_proof has already written the JPEG thumb
+                if result["mime_type"].startswith("image/") and not proof_store.storage.resizes_on_delivery:
+                    blob.has_variants = derivatives.generate(proof_store.storage, path, {
+                        (variant, fmt): proof_store.variant_key(key, variant, fmt)
+                        for variant, fmt in derivatives.all_variants() if (variant, fmt) != THUMBNAIL_VARIANT
+                    })
+        except ProofRejected as e:
+            donation.processing_status = "rejected"
+            donation.processing_error = str(e)[:255]
+            return
+        blob.mime_type = result["mime_type"]
+        blob.page_count = result["page_count"]
+        blob.has_thumbnail = result["has_thumbnail"]
+        blob.processed_at = datetime.utcnow()
+
+    donation.processing_status = "done"
+    donation.processing_error = None
+
+
+def process_proof_failed(payload, error):
+    Donation.query.filter_by(reference=payload["reference"]).update(
+        {"processing_status": "failed", "processing_error": error[:255]},
+        synchronize_session=False,
+    )
+
+
+def discard_proof(payload):
+    """Delete a proof left behind by a failed donation insert, unless a donation now uses it."""
+    key = payload["key"]
+    if proof_store.is_key(key) and db.session.get(ProofBlob, key) is None:
+        proof_store.delete(key)
+
+
+HANDLERS = {
+    "process_proof": (process_proof, process_proof_failed),
+    "discard_proof": (discard_proof, None),
+}
+
+
+# Queue mechanics
+def claim_job():
+    """Atomically move one ready job to 'running'; returns it or None.
+
+    Postgres skips rows locked by other workers; on SQLite the
+    compare-and-set UPDATE is what keeps two workers off the same job.
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=JOB_LOCK_TIMEOUT)
+    row = (
+        db.session.query(Job.id, Job.status, Job.attempts)
+        .filter(db.or_(
+            db.and_(Job.status == "queued", Job.run_after <= now),
+            db.and_(Job.status == "running", Job.locked_at < stale),
+        ))
+        .order_by(Job.run_after, Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if row is None:
+        db.session.rollback()
+        return None
+
+    claimed = Job.query.filter(
+        Job.id == row.id, Job.status == row.status, Job.attempts == row.attempts
+    ).update(
+        {"status": "running", "locked_at": now, "attempts": row.attempts + 1},
+        synchronize_session=False,
+    )
+    db.session.commit()
+    if not claimed:
+        return claim_job()
+    return db.session.get(Job, row.id)
+
+
+def run_job(job):
+    handler, on_failure = HANDLERS.get(job.kind, (None, None))
+    payload = json.loads(job.payload or "{}")
+    try:
+        if handler is None:
+            raise ValueError(f"No handler for job kind '{job.kind}'")
+        handler(payload)
+        db.session.delete(job)
+        db.session.commit()
+        return True
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Job {job.id} ({job.kind}) failed on attempt {job.attempts}: {e}")
+        job.last_error = str(e)
+        if job.attempts >= JOB_MAX_ATTEMPTS or handler is None:
+            job.status = "failed"
+            if on_failure:
+                on_failure(payload, str(e))
+        else:
+            job.status = "queued"
+            job.run_after = datetime.utcnow() + retry_delay(job.attempts)
+        db.session.commit()
+        return False
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(300, 5 * 2 ** attempts))
+
+
+# Media deletion outbox
+def drain_media_deletions():
+    """Delete one batch of queued files from media storage; returns the batch size.
+
+    The batch stays row-locked (skipped by other workers on Postgres) while
+    the storage call runs. Keys that are already gone count as deleted; a
+    failed call puts the whole batch back with a backoff.
+    """
+    now = datetime.utcnow()
+    batch = (
+        MediaDeletion.query
+        .filter(MediaDeletion.status == "queued", MediaDeletion.run_after <= now)
+        .order_by(MediaDeletion.run_after, MediaDeletion.id)
+        .limit(MEDIA_DELETE_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not batch:
+        db.session.rollback()
+        return 0
+
+    try:
+        media_storage.delete_many(sorted({row.storage_key for row in batch}))
+    except Exception as e:
+        app.logger.error(f"Media delete batch of {len(batch)} failed: {e}")
+        for row in batch:
+            row.attempts += 1
+            row.last_error = str(e)
+            if row.attempts >= JOB_MAX_ATTEMPTS:
+                row.status = "failed"
+            else:
+                row.run_after = now + retry_delay(row.attempts)
+        db.session.commit()
+        return len(batch)
+
+    MediaDeletion.query.filter(MediaDeletion.id.in_([row.id for row in batch])).delete(
+        synchronize_session=False
+    )
+    db.session.commit()
+    return len(batch)
+
+
+def run_once():
+    """Run every job and outbox batch that is ready now; returns how many were attempted."""
+    count = 0
+    while True:
+        job = claim_job()
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    while True:
+        drained = drain_media_deletions()
+        if not drained:
+            return count
+        count += drained
+
+
+def main(once=False):
+    with app.app_context():
+        app.logger.info("Worker started")
+        while True:
+            ran = run_once()
+            if once:
+                return ran
+            if not ran:
+                time.sleep(POLL_INTERVAL)
+
+
+if __name__ == "__main__":
+    main(once='--once' in sys.argv[1:])
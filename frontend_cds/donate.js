@@ -144,6 +144,26 @@ if (form) {
     }
 })();
 
+// ----------------- TOTAL RAISED -----------------
+(async function loadRaisedTotal(){
+    const box = document.getElementById('raisedProgress');
+    if (!box) return;
+    try {
+        const resp = await fetch(`${BACKEND_URL}/stats?days=1`);
+        if (!resp.ok) return;
+        const stats = await resp.json();
+        const raised = `₦${Number(stats.total_raised).toLocaleString()} raised from ${stats.donation_count} donation(s)`;
+        document.getElementById('raisedText').innerText = stats.goal
+            ? `${raised} of ₦${Number(stats.goal).toLocaleString()}`
+            : raised;
+        document.getElementById('raisedBar').style.width = `${Math.min(100, (stats.progress || 0) * 100)}%`;
+        if (!stats.goal) document.getElementById('raisedBar').parentElement.style.display = 'none';
+        box.style.display = 'block';
+    } catch (err) {
+        // the progress bar is optional; leave it hidden
+    }
+})();
+
 // ------------------ CHECK STATUS ------------------
 async function checkStatus() {
     const ref = document.getElementById('checkRef').value.trim();